@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Колоночное хранилище статистики боев в памяти для аналитики
+
+Таблица fight_stats загружается один раз в NumPy-массивы (по массиву на
+колонку), отсортированные по fighter_id, с индексом fighter_id -> диапазон
+строк. Суммы по бойцу, точность ударов/тейкдаунов и перцентили внутри
+дивизиона считаются векторизованными свертками без запросов к БД.
+Хранилище пересобирается, когда импортер увеличивает версию 'fight_stats'
+или парсеры сбрасывают набор 'fighters' (дивизионы берутся из
+fighters.weight_class, а его меняют, например, профили бойцов).
+Версию проверяет и снимок пересобирает фоновый поток; запросы тем временем
+обслуживаются старым снимком и не ждут ни пересборки, ни сессии БД.
+
+Замер против SQL-агрегатов (SUM/GROUP BY по fight_stats) на синтетической
+БД во временной папке:
+    python -m backend.analytics
+    python -m backend.analytics --rows 500000 --repeat 200
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from database.config import SessionLocal
+from database.models import Fighter, FightStats
+from database.versions import GENERATION_PREFIX, get_data_version
+
+# Суммируемые колонки fight_stats
+COLUMNS = [
+    'knockdowns',
+    'significant_strikes_landed',
+    'significant_strikes_attempted',
+    'total_strikes_landed',
+    'total_strikes_attempted',
+    'takedown_successful',
+    'takedown_attempted',
+    'submission_attempt',
+    'reversals',
+    'head_landed',
+    'head_attempted',
+    'body_landed',
+    'body_attempted',
+    'leg_landed',
+    'leg_attempted',
+    'distance_landed',
+    'distance_attempted',
+    'clinch_landed',
+    'clinch_attempted',
+    'ground_landed',
+    'ground_attempted',
+]
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """Поэлементное деление с нулем там, где знаменатель равен нулю"""
+    result = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator * scale, denominator, out=result, where=denominator > 0)
+    return result
+
+
+# Производные метрики: функция от матрицы сумм (бойцы x колонки) и числа раундов
+METRICS = {
+    'significant_strikes_accuracy': lambda t, r: _ratio(
+        t[:, COLUMN_INDEX['significant_strikes_landed']], t[:, COLUMN_INDEX['significant_strikes_attempted']], 100.0),
+    'takedown_accuracy': lambda t, r: _ratio(
+        t[:, COLUMN_INDEX['takedown_successful']], t[:, COLUMN_INDEX['takedown_attempted']], 100.0),
+    'significant_strikes_per_round': lambda t, r: _ratio(
+        t[:, COLUMN_INDEX['significant_strikes_landed']], r),
+    'takedowns_per_round': lambda t, r: _ratio(
+        t[:, COLUMN_INDEX['takedown_successful']], r),
+    'knockdowns': lambda t, r: t[:, COLUMN_INDEX['knockdowns']].astype(np.float64),
+    'submission_attempts': lambda t, r: t[:, COLUMN_INDEX['submission_attempt']].astype(np.float64),
+    'significant_strikes_landed': lambda t, r: t[:, COLUMN_INDEX['significant_strikes_landed']].astype(np.float64),
+}
+
+
+def snapshot_version(db) -> Tuple[int, int]:
+    """Версия снимка: версия статистики боев и поколение бойцов (их весовых категорий)"""
+    return get_data_version(db, 'fight_stats'), get_data_version(db, f"{GENERATION_PREFIX}fighters")
+
+
+class FightStatsColumns:
+    """Неизменяемый колоночный снимок fight_stats"""
+
+    def __init__(self, version: Tuple[int, int], rows: list, divisions: Dict[int, Optional[str]]):
+        self.version = version
+        self.built_at = time.time()
+
+        # fromiter по плоскому потоку значений: np.array по строкам SQLAlchemy
+        # проверяет у каждой Row атрибуты протокола массивов и в разы медленнее
+        width = 2 + len(COLUMNS)
+        data = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * width).reshape(-1, width)
+        self.fighter_id = np.ascontiguousarray(data[:, 0])
+        self.fight_id = np.ascontiguousarray(data[:, 1])
+        self.values = np.ascontiguousarray(data[:, 2:])
+        self.columns = {name: self.values[:, i] for name, i in COLUMN_INDEX.items()}
+
+        # Индекс fighter_id -> диапазон строк (строки отсортированы по fighter_id, fight_id)
+        self.fighter_ids, starts, counts = np.unique(self.fighter_id, return_index=True, return_counts=True)
+        self.row_ranges = {
+            int(fighter_id): (int(start), int(start + count))
+            for fighter_id, start, count in zip(self.fighter_ids, starts, counts)
+        }
+        self.position = {int(fighter_id): i for i, fighter_id in enumerate(self.fighter_ids)}
+
+        # Суммы по бойцам для лидербордов и перцентилей
+        if len(starts):
+            self.totals = np.add.reduceat(self.values, starts, axis=0)
+            new_fight = np.ones(len(self.fight_id), dtype=np.int64)
+            new_fight[1:] = (self.fighter_id[1:] != self.fighter_id[:-1]) | (self.fight_id[1:] != self.fight_id[:-1])
+            self.fights = np.add.reduceat(new_fight, starts)
+        else:
+            self.totals = np.zeros((0, len(COLUMNS)), dtype=np.int64)
+            self.fights = np.zeros(0, dtype=np.int64)
+        self.rounds = counts.astype(np.int64)
+
+        self.divisions = np.array([divisions.get(int(fighter_id)) or '' for fighter_id in self.fighter_ids], dtype=object)
+        self.metrics = {name: metric(self.totals, self.rounds) for name, metric in METRICS.items()}
+
+    def __len__(self) -> int:
+        return len(self.fighter_id)
+
+
+class FightStatsStore:
+    """Хранилище колоночных снимков с проверкой версии не чаще check_interval секунд"""
+
+    def __init__(self, check_interval: float = 30.0, session_factory=SessionLocal):
+        self.check_interval = check_interval
+        self.session_factory = session_factory
+        self._columns: Optional[FightStatsColumns] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # Занят, пока идет фоновое обновление (не больше одного потока)
+        self._background = threading.Lock()
+
+    def refresh(self, force: bool = False) -> FightStatsColumns:
+        """Пересобирает снимок в текущем потоке, если изменилась его версия (snapshot_version)"""
+        with self._lock:
+            db = self.session_factory()
+            try:
+                version = snapshot_version(db)
+                columns = self._columns
+                if force or columns is None or columns.version != version:
+                    rows = db.query(
+                        FightStats.fighter_id,
+                        FightStats.fight_id,
+                        *[func.coalesce(getattr(FightStats, name), 0) for name in COLUMNS]
+                    ).order_by(FightStats.fighter_id, FightStats.fight_id).all()
+
+                    divisions = dict(db.query(Fighter.id, Fighter.weight_class).filter(
+                        Fighter.id.in_(db.query(FightStats.fighter_id).distinct())
+                    ).all())
+
+                    columns = FightStatsColumns(version, rows, divisions)
+                    # Атомарная замена снимка
+                    self._columns = columns
+                    print(f"📊 Аналитика: загружено {len(columns)} записей статистики")
+            finally:
+                db.close()
+
+            self._checked_at = time.monotonic()
+            return columns
+
+    def get(self) -> FightStatsColumns:
+        """
+        Возвращает текущий снимок.
+
+        Раз в check_interval запускает фоновую проверку версии и сразу
+        отдает имеющийся снимок. Ждать приходится только первому обращению,
+        когда отдавать еще нечего.
+        """
+        columns = self._columns
+        if columns is None:
+            return self.refresh()
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh_in_background()
+        return columns
+
+    def refresh_in_background(self) -> bool:
+        """Запускает refresh в фоновом потоке (False, если обновление уже идет)"""
+        if not self._background.acquire(blocking=False):
+            return False
+        # Следующие обращения не запускают проверку, пока идет эта
+        self._checked_at = time.monotonic()
+        threading.Thread(target=self._refresh_and_release, name="analytics-refresh", daemon=True).start()
+        return True
+
+    def _refresh_and_release(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            # Остается прежний снимок, следующая попытка - через check_interval
+            print(f"⚠️ Не удалось обновить аналитику: {e}")
+        finally:
+            self._background.release()
+
+    def fighter_summary(self, fighter_id: int) -> Optional[dict]:
+        """Суммы, точность и перцентили бойца внутри его дивизиона"""
+        columns = self.get()
+        row_range = columns.row_ranges.get(fighter_id)
+        if row_range is None:
+            return None
+
+        start, stop = row_range
+        totals = columns.values[start:stop].sum(axis=0)
+        position = columns.position[fighter_id]
+        division = columns.divisions[position]
+
+        in_division = columns.divisions == division
+        percentiles = {}
+        for name, values in columns.metrics.items():
+            peers = values[in_division]
+            value = values[position]
+            percentiles[name] = round(float(
+                ((peers < value).sum() + 0.5 * (peers == value).sum()) / len(peers) * 100
+            ), 1)
+
+        return {
+            'fighter_id': fighter_id,
+            'weight_class': division or None,
+            'total_fights': int(columns.fights[position]),
+            'total_rounds': int(stop - start),
+            'totals': {name: int(totals[i]) for name, i in COLUMN_INDEX.items()},
+            'metrics': {name: round(float(values[position]), 2) for name, values in columns.metrics.items()},
+            'division_percentiles': percentiles,
+            'division_size': int(in_division.sum())
+        }
+
+    def leaderboard(self, metric: str, weight_class: Optional[str] = None,
+                    min_rounds: int = 1, limit: int = 10) -> List[dict]:
+        """Топ бойцов по метрике (опционально внутри весовой категории)"""
+        columns = self.get()
+        values = columns.metrics[metric]
+
+        mask = columns.rounds >= min_rounds
+        if weight_class:
+            mask &= columns.divisions == weight_class
+
+        candidates = np.flatnonzero(mask)
+        if limit < len(candidates):
+            # argpartition выбирает топ за O(n), сортируем только его
+            top = candidates[np.argpartition(-values[candidates], limit - 1)[:limit]]
+        else:
+            top = candidates
+        top = top[np.argsort(-values[top], kind='stable')]
+
+        return [
+            {
+                'fighter_id': int(columns.fighter_ids[i]),
+                'weight_class': columns.divisions[i] or None,
+                'value': round(float(values[i]), 2),
+                'total_rounds': int(columns.rounds[i]),
+                'total_fights': int(columns.fights[i])
+            }
+            for i in top
+        ]
+
+    def get_status(self) -> dict:
+        """Состояние хранилища"""
+        columns = self._columns
+        if columns is None:
+            return {'loaded': False}
+
+        return {
+            'loaded': True,
+            'version': columns.version[0],
+            'fighters_generation': columns.version[1],
+            'rows': len(columns),
+            'fighters': len(columns.fighter_ids),
+            'memory_bytes': int(columns.values.nbytes + columns.totals.nbytes),
+            'built_at': columns.built_at,
+            'metrics': list(METRICS)
+        }
+
+
+# Глобальный экземпляр хранилища
+fight_stats_store = FightStatsStore()
+
+
+def _sql_fighter_totals(db, fighter_id: int) -> dict:
+    """Суммы бойца запросом к БД (как get_fighter_stats до колоночного хранилища)"""
+    row = db.query(
+        func.count(FightStats.id),
+        *[func.coalesce(func.sum(getattr(FightStats, name)), 0) for name in COLUMNS]
+    ).filter(FightStats.fighter_id == fighter_id).one()
+    return {'total_rounds': row[0], 'totals': dict(zip(COLUMNS, row[1:]))}
+
+
+def _sql_leaderboard(db, limit: int) -> List[int]:
+    """Топ по точности значимых ударов запросом GROUP BY по всей fight_stats"""
+    landed = func.sum(FightStats.significant_strikes_landed)
+    attempted = func.sum(FightStats.significant_strikes_attempted)
+    accuracy = landed * 100.0 / func.nullif(attempted, 0)
+    rows = db.query(FightStats.fighter_id).group_by(FightStats.fighter_id).order_by(
+        func.coalesce(accuracy, 0).desc(), FightStats.fighter_id
+    ).limit(limit).all()
+    return [fighter_id for (fighter_id,) in rows]
+
+
+def main():
+    """Замер колоночного хранилища против SQL-агрегатов на синтетической статистике"""
+    arg_parser = argparse.ArgumentParser(description="Замер колоночной аналитики fight_stats")
+    arg_parser.add_argument('--rows', type=int, default=120_000, help="строк статистики (раундов бойцов)")
+    arg_parser.add_argument('--fighters', type=int, default=2000, help="сколько бойцов")
+    arg_parser.add_argument('--repeat', type=int, default=100, help="сколько раз повторить запрос")
+    arg_parser.add_argument('--seed', type=int, default=0, help="зерно синтетических данных")
+    args = arg_parser.parse_args()
+
+    from sqlalchemy import create_engine, insert, text
+    from sqlalchemy.orm import sessionmaker
+    from database.models import Base
+    from database.migrations import upgrade_schema
+
+    path = os.path.join(tempfile.mkdtemp(prefix='ufc-analytics-'), 'bench.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    with engine.begin() as conn:
+        # Индекс, по которому SQL-путь ищет строки бойца (как в postgres_config)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_fight_stats_fighter_id ON fight_stats(fighter_id)"))
+
+    # Раунд боя - две строки (по бойцу), у бойца своя весовая категория
+    rng = np.random.default_rng(args.seed)
+    rounds = max(1, args.rows // 2)
+    fighter_ids = rng.integers(1, args.fighters + 1, size=(rounds, 2))
+    values = rng.integers(0, 30, size=(rounds * 2, len(COLUMNS)))
+    for landed, attempted in (('significant_strikes_landed', 'significant_strikes_attempted'),
+                              ('takedown_successful', 'takedown_attempted')):
+        values[:, COLUMN_INDEX[attempted]] = values[:, COLUMN_INDEX[landed]] + rng.integers(0, 30, rounds * 2)
+
+    with engine.begin() as conn:
+        conn.execute(insert(Fighter), [
+            {'id': i, 'name_ru': f"Боец {i}", 'name_en': f"Fighter {i}", 'weight_class': f"Категория {i % 12}"}
+            for i in range(1, args.fighters + 1)
+        ])
+        conn.execute(insert(FightStats), [
+            {'fight_id': row // 6 + 1, 'fighter_id': int(fighter_ids[row // 2, row % 2]),
+             'round_number': row // 2 % 3 + 1, **dict(zip(COLUMNS, map(int, values[row])))}
+            for row in range(rounds * 2)
+        ])
+
+    session_factory = sessionmaker(bind=engine)
+    store = FightStatsStore(session_factory=session_factory)
+    started = time.perf_counter()
+    columns = store.refresh()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    db = session_factory()
+    sample = rng.choice(columns.fighter_ids, size=min(args.repeat, len(columns.fighter_ids)), replace=False)
+
+    def measure(fn) -> float:
+        """Среднее время вызова, мкс"""
+        started = time.perf_counter()
+        for fighter_id in sample:
+            fn(int(fighter_id))
+        return (time.perf_counter() - started) * 1e6 / len(sample)
+
+    # Результаты обоих путей должны совпадать
+    for fighter_id in sample[:20]:
+        summary = store.fighter_summary(int(fighter_id))
+        expected = _sql_fighter_totals(db, int(fighter_id))
+        assert summary['total_rounds'] == expected['total_rounds'], fighter_id
+        assert summary['totals'] == expected['totals'], fighter_id
+    store_top = [row['fighter_id'] for row in store.leaderboard('significant_strikes_accuracy', limit=10)]
+    assert store_top == _sql_leaderboard(db, 10), (store_top, _sql_leaderboard(db, 10))
+
+    sql_totals_us = measure(lambda fighter_id: _sql_fighter_totals(db, fighter_id))
+    store_totals_us = measure(store.fighter_summary)
+    sql_top_us = measure(lambda _: _sql_leaderboard(db, 10))
+    store_top_us = measure(lambda _: store.leaderboard('significant_strikes_accuracy', limit=10))
+    db.close()
+
+    print(f"📊 {len(columns)} строк статистики, {len(columns.fighter_ids)} бойцов, "
+          f"снимок собран за {build_ms:.0f} мс ({store.get_status()['memory_bytes'] / 2 ** 20:.1f} МБ)")
+    print(f"  суммы бойца:      SQL {sql_totals_us:9.1f} мкс, NumPy (с перцентилями) {store_totals_us:9.1f} мкс "
+          f"(x{sql_totals_us / store_totals_us:.0f})")
+    print(f"  топ-10 точности:  SQL {sql_top_us:9.1f} мкс, NumPy {store_top_us:9.1f} мкс "
+          f"(x{sql_top_us / store_top_us:.0f})")
+
+
+if __name__ == "__main__":
+    main()
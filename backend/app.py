@@ -3,20 +3,35 @@
 FastAPI приложение для UFC Ranker
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
+from anyio import to_thread
+from sqlalchemy import select, union_all
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from functools import lru_cache
+import inspect
+import re
 import sys
 import os
 
 # Добавляем корневую папку в путь
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.config import get_db, init_database
-from database.models import Fighter, WeightClass, Ranking, FightRecord, UpcomingFight, Event, Fight, FightStats
-from pydantic import BaseModel
+from database.config import get_db, init_database, SessionLocal, DB_MAX_CONNECTIONS
+from database.models import Fighter, WeightClass, Ranking, FightRecord, UpcomingFight, Event, Fight, FightStats, ScheduledJob
+from backend.snapshots import VersionedSnapshot
+from backend import jobs as background_jobs
+from backend import home as home_page
+from backend.analytics import fight_stats_store, METRICS
+from backend.search import fighter_search
+from backend.pagination import keyset_page
+from backend.serialization import dumps, json_response
+from backend.cache_manager import cache_manager, cache_fighters, cache_rankings, cache_events, cache_fights
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 # Инициализируем FastAPI
 app = FastAPI(
@@ -40,6 +55,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Курсор следующей страницы списков
 )
 
 # Pydantic модели для API
@@ -81,7 +97,7 @@ class WeightClassResponse(BaseModel):
         from_attributes = True
 
 class RankingResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # None для записей из истории рейтингов
     fighter: FighterResponse
     weight_class: str
     rank_position: Optional[int] = None
@@ -217,6 +233,16 @@ class FightStatsResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class FighterSearchResult(BaseModel):
+    id: int
+    name: str
+    name_ru: Optional[str] = None
+    name_en: Optional[str] = None
+    nickname: Optional[str] = None
+    country: Optional[str] = None
+    image_url: Optional[str] = None
+    weight_class: Optional[str] = None
+
 class FighterStatsSummary(BaseModel):
     fighter: FighterResponse
     total_fights: int
@@ -234,10 +260,26 @@ class FighterStatsSummary(BaseModel):
     class Config:
         from_attributes = True
 
+def _build_in_memory_index(name: str, build) -> None:
+    """Строит индекс в памяти; при ошибке API запускается, а индекс соберется при первом запросе"""
+    try:
+        build()
+    except Exception as e:
+        print(f"⚠️ {name}: не удалось построить при запуске, соберется при первом запросе: {e}")
+
 # Инициализация БД при запуске
 @app.on_event("startup")
 async def startup_event():
-    init_database()
+    # Обработчики с доступом к БД объявлены через def и выполняются в пуле потоков,
+    # а не в event loop. Потоков столько же, сколько соединений в пуле БД,
+    # поэтому поток никогда не ждет свободного соединения
+    to_thread.current_default_thread_limiter().total_tokens = DB_MAX_CONNECTIONS
+    # Работа с БД при запуске тоже идет в пуле потоков, не блокируя event loop
+    await to_thread.run_sync(init_database)
+    # Колоночное хранилище статистики боев для /api/analytics/*
+    await to_thread.run_sync(_build_in_memory_index, "Аналитика", fight_stats_store.refresh)
+    # Индекс подсказок для /api/search/fighters
+    await to_thread.run_sync(_build_in_memory_index, "Поиск бойцов", fighter_search.refresh)
 
 # API эндпоинты
 @app.get("/")
@@ -250,20 +292,113 @@ async def root():
             "fighters": "/api/fighters",
             "weight_classes": "/api/weight-classes",
             "rankings": "/api/rankings/{class_id}",
-            "upcoming_fights": "/api/upcoming-fights"
+            "upcoming_fights": "/api/upcoming-fights",
+            "search": "/api/search/fighters?q=",
+            "home": "/api/home",
+            "batch": "/api/batch"
         }
     }
 
+# Сортировка списков для курсорной пагинации (backend/pagination.py), последняя колонка - id
+FIGHTER_KEYS = [(Fighter.id, False)]
+EVENT_KEYS = [(Event.date, True), (Event.id, True)]
+FIGHT_KEYS = [
+    (Fight.card_type, True),  # Main card -> Preliminary card -> Early preliminary card
+    (Fight.fight_order, False),  # Порядок внутри карты
+    (Fight.is_main_event, True),
+    (Fight.is_title_fight, True),
+    (Fight.fight_date, True),
+    (Fight.id, False)
+]
+
+def _paginate(query, keys, limit: int, cursor: Optional[str], skip: int):
+    """keyset_page с ошибкой 400 для поврежденного курсора"""
+    try:
+        return keyset_page(query, keys, limit, cursor, skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _page_items(response: Response, page: Dict) -> List:
+    """Элементы страницы; курсор следующей страницы уходит в заголовок X-Next-Cursor"""
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["items"]
+
+# Колонки бойца для _fighter_json
+FIGHTER_COLUMNS = (
+    Fighter.id, Fighter.name_ru, Fighter.name_en, Fighter.nickname, Fighter.country,
+    Fighter.country_flag_url, Fighter.image_url, Fighter.height, Fighter.weight, Fighter.reach,
+    Fighter.age, Fighter.weight_class, Fighter.wins, Fighter.losses, Fighter.draws, Fighter.career
+)
+
+# Сколько бойцов можно запросить через ids за раз
+MAX_FIGHTER_IDS = 100
+
+def _fighter_json(fighter) -> Dict:
+    """Словарь в форме FighterResponse из строки с колонками FIGHTER_COLUMNS"""
+    # Безопасная подстановка имени (защита от NULL)
+    safe_name_ru = fighter.name_ru or fighter.name_en or "Unknown Fighter"
+    safe_name_en = fighter.name_en or fighter.name_ru or "Unknown Fighter"
+    
+    return {
+        "id": fighter.id,
+        "name": safe_name_ru,  # Основное имя
+        "name_ru": safe_name_ru,
+        "name_en": safe_name_en,
+        "nickname": fighter.nickname,
+        "country": fighter.country,
+        "country_flag_url": fighter.country_flag_url,
+        "image_url": fighter.image_url,
+        "height": fighter.height,
+        "weight": fighter.weight,
+        "reach": fighter.reach,
+        "age": fighter.age,
+        "weight_class": fighter.weight_class,
+        "wins": fighter.wins or 0,
+        "losses": fighter.losses or 0,
+        "draws": fighter.draws or 0,
+        "weight_class_id": None,  # Пока нет связи
+        "career": fighter.career
+    }
+
+def _parse_ids(ids: str) -> List[int]:
+    """id из строки "1,2,3" без повторов, в исходном порядке. Ошибка 400 для некорректной строки"""
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(',') if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids должен быть списком чисел через запятую")
+    
+    if len(parsed) > MAX_FIGHTER_IDS:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_FIGHTER_IDS} id за запрос")
+    return parsed
+
 @app.get("/api/fighters", response_model=List[FighterResponse])
-async def get_fighters(
+def get_fighters(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     country: Optional[str] = None,
+    ids: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Получить список бойцов с фильтрацией"""
-    query = db.query(Fighter)
+    """
+    Получить список бойцов с фильтрацией (cursor - из X-Next-Cursor предыдущей страницы, вместо skip).
+    
+    ids=1,2,3 - бойцы по id одним запросом, в порядке ids (ненайденные пропускаются).
+    """
+    if ids is not None:
+        return json_response(_fighters_by_ids(ids=",".join(map(str, _parse_ids(ids))), db=db))
+    
+    page = _fighters_page(skip=skip, limit=limit, cursor=cursor, search=search, country=country, db=db)
+    headers = {"X-Next-Cursor": page["next_cursor"]} if page["next_cursor"] else None
+    return json_response(page["items"], headers)
+
+@cache_fighters(ttl=600)
+def _fighters_page(skip: int, limit: int, cursor: Optional[str], search: Optional[str],
+                   country: Optional[str], db: Session) -> Dict:
+    """Страница списка бойцов: {"items": [...], "next_cursor": ...}"""
+    query = db.query(*FIGHTER_COLUMNS)
     
     if search:
         query = query.filter(Fighter.name_ru.ilike(f"%{search}%"))
@@ -271,40 +406,80 @@ async def get_fighters(
     if country:
         query = query.filter(Fighter.country.ilike(f"%{country}%"))
     
-    fighters = query.offset(skip).limit(limit).all()
+    fighters, next_cursor = _paginate(query, FIGHTER_KEYS, limit, cursor, skip)
     
-    # Преобразуем данные для API
-    result = []
-    for fighter in fighters:
-        # Безопасная подстановка имени (защита от NULL)
-        safe_name_ru = fighter.name_ru or fighter.name_en or "Unknown Fighter"
-        safe_name_en = fighter.name_en or fighter.name_ru or "Unknown Fighter"
-        
-        result.append(FighterResponse(
-            id=fighter.id,
-            name=safe_name_ru,  # Основное имя
-            name_ru=safe_name_ru,
-            name_en=safe_name_en,
-            nickname=fighter.nickname,
-            country=fighter.country,
-            country_flag_url=fighter.country_flag_url,
-            image_url=fighter.image_url,
-            height=fighter.height,
-            weight=fighter.weight,
-            reach=fighter.reach,
-            age=fighter.age,
-            weight_class=fighter.weight_class,
-            wins=fighter.wins or 0,
-            losses=fighter.losses or 0,
-            draws=fighter.draws or 0,
-            weight_class_id=None,  # Пока нет связи
-            career=getattr(fighter, 'career', None)
-        ))
-    
-    return result
+    return {"items": [_fighter_json(fighter) for fighter in fighters], "next_cursor": next_cursor}
+
+@cache_fighters(ttl=600)
+def _fighters_by_ids(ids: str, db: Session) -> List[Dict]:
+    """Бойцы по id через запятую одним IN-запросом, в порядке ids"""
+    fighter_ids = [int(fighter_id) for fighter_id in ids.split(',') if fighter_id]
+    if not fighter_ids:
+        return []
+    
+    fighters = {fighter.id: fighter for fighter in db.query(*FIGHTER_COLUMNS).filter(Fighter.id.in_(fighter_ids))}
+    return [_fighter_json(fighters[fighter_id]) for fighter_id in fighter_ids if fighter_id in fighters]
+
+@app.get("/api/search/fighters", response_model=List[FighterSearchResult])
+def search_fighters(q: str = "", limit: int = 10):
+    """Подсказки при вводе: бойцы по началу слов имени (рус./англ.) или прозвища"""
+    limit = max(1, min(limit, 50))
+    try:
+        fighters = fighter_search.search(q, limit)
+    except Exception as e:
+        print(f"Ошибка поиска бойцов: {e}")
+        return []
+    
+    return [
+        FighterSearchResult(name=fighter['name_ru'] or fighter['name_en'] or "Боец", **fighter)
+        for fighter in fighters
+    ]
+
+# Адреса страниц строит фронтенд: /fighters/<имя> (FightersPage.tsx) и /events/<название>
+# (EventsPage.tsx) - пробелы заменены на "_", у событий удалены символы кроме [A-Za-z0-9_-]
+_SPACES = re.compile(r'\s+')
+_NON_SLUG = re.compile(r'[^\w\-]', re.ASCII)
+
+def _fighter_slug(name: Optional[str]) -> str:
+    return _SPACES.sub('_', name or '').lower()
+
+def _event_slug(name: Optional[str]) -> str:
+    return _NON_SLUG.sub('', _SPACES.sub('_', name or '')).lower()
+
+def _fighter_by_slug(db: Session, slug: str) -> Optional[Fighter]:
+    """Боец по адресу страницы: кандидаты по LIKE, точное сравнение адреса в Python"""
+    # Шаблон - из адреса как есть: в SQLite lower/LIKE не меняют регистр кириллицы
+    pattern = slug.replace('_', '%')
+    candidates = db.query(Fighter).filter(
+        Fighter.name_ru.ilike(pattern) | Fighter.name_en.ilike(pattern)
+    ).order_by(Fighter.id)
+    slug = slug.lower()
+    for fighter in candidates:
+        if slug in (_fighter_slug(fighter.name_ru), _fighter_slug(fighter.name_en)):
+            return fighter
+    return None
+
+def _event_by_slug(db: Session, slug: str) -> Optional[Event]:
+    """Событие по адресу страницы (удаленные из адреса символы покрывает % в шаблоне)"""
+    pattern = '%' + slug.replace('_', '%') + '%'
+    slug = slug.lower()
+    for event in db.query(Event).filter(Event.name.ilike(pattern)).order_by(Event.id):
+        if _event_slug(event.name) == slug:
+            return event
+    return None
+
+@app.get("/api/fighters/by-slug/{slug}", response_model=FighterDetailResponse)
+def get_fighter_by_slug(slug: str, db: Session = Depends(get_db)):
+    """Боец по адресу его страницы (/fighters/<имя>)"""
+    fighter = _fighter_by_slug(db, slug)
+    
+    if not fighter:
+        raise HTTPException(status_code=404, detail="Боец не найден")
+    
+    return fighter
 
 @app.get("/api/fighters/{fighter_id}", response_model=FighterDetailResponse)
-async def get_fighter(fighter_id: int, db: Session = Depends(get_db)):
+def get_fighter(fighter_id: int, db: Session = Depends(get_db)):
     """Получить детальную информацию о бойце"""
     fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
     
@@ -314,10 +489,18 @@ async def get_fighter(fighter_id: int, db: Session = Depends(get_db)):
     return fighter
 
 @app.get("/api/weight-classes", response_model=List[WeightClassResponse])
-async def get_weight_classes(db: Session = Depends(get_db)):
+def get_weight_classes(db: Session = Depends(get_db)):
     """Получить список весовых категорий"""
+    return json_response(_weight_classes_list(db=db))
+
+@cache_rankings(ttl=3600)
+def _weight_classes_list(db: Session) -> List[Dict]:
+    """Весовые категории в форме WeightClassResponse"""
     try:
-        weight_classes = db.query(WeightClass).all()
+        weight_classes = db.query(
+            WeightClass.id, WeightClass.name_ru, WeightClass.name_en, WeightClass.weight_min,
+            WeightClass.weight_max, WeightClass.gender, WeightClass.is_p4p
+        ).all()
         
         # Простое преобразование данных
         result = []
@@ -331,80 +514,130 @@ async def get_weight_classes(db: Session = Depends(get_db)):
             elif wc.weight_min is not None:
                 weight_limit = f"от {wc.weight_min} кг"
             
-            result.append(WeightClassResponse(
-                id=wc.id,
-                name=wc.name_ru or wc.name_en or "Неизвестная категория",
-                name_ru=wc.name_ru or "",
-                name_en=wc.name_en or "",
-                weight_min=wc.weight_min,
-                weight_max=wc.weight_max,
-                weight_limit=weight_limit,
-                gender=wc.gender or "male",
-                is_p4p=wc.is_p4p or False
-            ))
+            result.append({
+                "id": wc.id,
+                "name": wc.name_ru or wc.name_en or "Неизвестная категория",
+                "name_ru": wc.name_ru or "",
+                "name_en": wc.name_en or "",
+                "weight_min": wc.weight_min,
+                "weight_max": wc.weight_max,
+                "weight_limit": weight_limit,
+                "gender": wc.gender or "male",
+                "is_p4p": wc.is_p4p or False
+            })
         
         return result
     except Exception as e:
+        # Исключение, а не пустой список: иначе @cached сохранит ошибку на час
         print(f"Ошибка в get_weight_classes: {e}")
-        return []
+        raise HTTPException(status_code=500, detail="Не удалось получить весовые категории")
+
+# Колонки строки рейтинга для _ranking_json (r - rankings или rankings_history)
+_RANKING_FIGHTER_COLUMNS = """
+               f.name_ru, f.name_en, f.nickname, f.country, f.age, f.height, f.reach, f.weight,
+               f.wins, f.losses, f.draws, f.no_contests, f.ufc_wins, f.ufc_losses, f.ufc_draws, f.ufc_no_contests, f.fighting_out_of
+"""
+
+def _ranking_json(row) -> Dict:
+    """Строка запроса рейтингов -> словарь в форме RankingResponse (поля в том же порядке)"""
+    return {
+        "id": row[0],
+        "fighter": {
+            "id": row[1],
+            "name": row[6] or row[7] or "Боец",
+            "name_ru": row[6] or "",
+            "name_en": row[7] or "",
+            "nickname": row[8] or "",
+            "country": row[9] or "",
+            "country_flag_url": None,
+            "image_url": None,
+            "height": row[11],
+            "weight": row[13],
+            "reach": row[12],
+            "age": row[10],
+            "weight_class": None,
+            "wins": row[14] or 0,
+            "losses": row[15] or 0,
+            "draws": row[16] or 0,
+            "weight_class_id": None,  # Убираем проблемное поле
+            "career": None
+        },
+        "weight_class": row[2],
+        "rank_position": row[3],
+        "is_champion": bool(row[4]),
+        "rank_change": row[5] or 0
+    }
+
+def _build_rankings_payload(db: Session) -> bytes:
+    """Собирает полный ответ /api/rankings в виде JSON-байтов"""
+    # Используем прямой SQL запрос
+    from sqlalchemy import text
+    
+    result = db.execute(text(f"""
+        SELECT r.id, r.fighter_id, r.weight_class, r.rank_position, r.is_champion, r.rank_change,
+               {_RANKING_FIGHTER_COLUMNS}
+        FROM rankings r
+        LEFT JOIN fighters f ON r.fighter_id = f.id
+        ORDER BY r.weight_class, r.rank_position
+    """)).fetchall()
+    
+    rankings = [_ranking_json(row) for row in result]
+    
+    print(f"API: Собран снапшот рейтингов ({len(rankings)} записей)")
+    return dumps(rankings)
+
+# Снапшот рейтингов пересобирается только после коммита парсера, увеличившего версию 'rankings'
+rankings_snapshot = VersionedSnapshot("rankings", _build_rankings_payload)
+
+def _rankings_as_of(db: Session, as_of: date) -> List[Dict]:
+    """Рейтинги на дату: последний снимок каждой категории не позже as_of"""
+    from sqlalchemy import text
+    
+    # Обе выборки идут по первичному ключу истории (weight_class, snapshot_date, fighter_id)
+    result = db.execute(text(f"""
+        SELECT NULL, r.fighter_id, r.weight_class, r.rank_position, r.is_champion, r.rank_change,
+               {_RANKING_FIGHTER_COLUMNS}
+        FROM (
+            SELECT weight_class, MAX(snapshot_date) AS snapshot_date
+            FROM rankings_history
+            WHERE snapshot_date <= :as_of
+            GROUP BY weight_class
+        ) latest
+        JOIN rankings_history r
+          ON r.weight_class = latest.weight_class AND r.snapshot_date = latest.snapshot_date
+        LEFT JOIN fighters f ON r.fighter_id = f.id
+        ORDER BY r.weight_class, r.rank_position
+    """), {"as_of": as_of}).fetchall()
+    
+    return [_ranking_json(row) for row in result]
 
 @app.get("/api/rankings", response_model=List[RankingResponse])
-async def get_rankings(db: Session = Depends(get_db)):
-    """Получить все рейтинги"""
+def get_rankings(request: Request, as_of: Optional[date] = None):
+    """Получить все рейтинги (as_of=YYYY-MM-DD - рейтинги на дату из истории)"""
+    if as_of is not None:
+        db = SessionLocal()
+        try:
+            return json_response(_rankings_as_of(db, as_of))
+        except Exception as e:
+            print(f"Ошибка API рейтингов на дату {as_of}: {e}")
+            return []
+        finally:
+            db.close()
+    
     try:
-        # Используем прямой SQL запрос
-        from sqlalchemy import text
-        
-        result = db.execute(text("""
-            SELECT r.id, r.fighter_id, r.weight_class, r.rank_position, r.is_champion, r.rank_change,
-                   f.name_ru, f.name_en, f.nickname, f.country, f.age, f.height, f.reach, f.weight,
-                   f.wins, f.losses, f.draws, f.no_contests, f.ufc_wins, f.ufc_losses, f.ufc_draws, f.ufc_no_contests, f.fighting_out_of
-            FROM rankings r
-            LEFT JOIN fighters f ON r.fighter_id = f.id
-            ORDER BY r.weight_class, r.rank_position
-        """)).fetchall()
-        
-        rankings = []
-        for row in result:
-            rankings.append(RankingResponse(
-                id=row[0],
-                fighter=FighterResponse(
-                    id=row[1],
-                    name=row[6] or row[7] or "Боец",
-                    name_ru=row[6] or "",
-                    name_en=row[7] or "",
-                    nickname=row[8] or "",
-                    country=row[9] or "",
-                    age=row[10],
-                    height=row[11],
-                    reach=row[12],
-                    weight=row[13],
-                    weight_class_id=None,  # Убираем проблемное поле
-                    wins=row[14] or 0,
-                    losses=row[15] or 0,
-                    draws=row[16] or 0,
-                    no_contests=row[17] or 0,
-                    ufc_wins=row[18] or 0,
-                    ufc_losses=row[19] or 0,
-                    ufc_draws=row[20] or 0,
-                    ufc_no_contests=row[21] or 0,
-                    fighting_out_of=row[22] or "",
-                    career=None
-                ),
-                weight_class=row[2],
-                rank_position=row[3],
-                is_champion=row[4],
-                rank_change=row[5]
-            ))
-        
-        print(f"API: Загружено {len(rankings)} рейтингов")
-        return rankings
+        snapshot = rankings_snapshot.get()
     except Exception as e:
         print(f"Ошибка API рейтингов: {e}")
         return []
+    
+    headers = {"ETag": snapshot.etag}
+    if snapshot.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 @app.get("/api/rankings/{class_id}", response_model=List[RankingResponse])
-async def get_rankings(class_id: int, db: Session = Depends(get_db)):
+def get_rankings(class_id: int, db: Session = Depends(get_db)):
     """Получить рейтинг весовой категории"""
     rankings = db.query(Ranking).filter(
         Ranking.weight_class_id == class_id
@@ -413,7 +646,7 @@ async def get_rankings(class_id: int, db: Session = Depends(get_db)):
     return rankings
 
 @app.get("/api/rankings/{class_id}/champion", response_model=Optional[RankingResponse])
-async def get_champion(class_id: int, db: Session = Depends(get_db)):
+def get_champion(class_id: int, db: Session = Depends(get_db)):
     """Получить чемпиона весовой категории"""
     champion = db.query(Ranking).filter(
         Ranking.weight_class_id == class_id,
@@ -423,7 +656,7 @@ async def get_champion(class_id: int, db: Session = Depends(get_db)):
     return champion
 
 @app.get("/api/compare/{fighter1_id}/{fighter2_id}")
-async def compare_fighters(fighter1_id: int, fighter2_id: int, db: Session = Depends(get_db)):
+def compare_fighters(fighter1_id: int, fighter2_id: int, db: Session = Depends(get_db)):
     """Сравнить двух бойцов"""
     fighter1 = db.query(Fighter).filter(Fighter.id == fighter1_id).first()
     fighter2 = db.query(Fighter).filter(Fighter.id == fighter2_id).first()
@@ -459,7 +692,7 @@ async def compare_fighters(fighter1_id: int, fighter2_id: int, db: Session = Dep
     }
 
 @app.get("/api/upcoming-fights", response_model=List[UpcomingFightResponse])
-async def get_upcoming_fights(
+def get_upcoming_fights(
     limit: int = 20,
     main_event_only: bool = False,
     db: Session = Depends(get_db)
@@ -474,38 +707,16 @@ async def get_upcoming_fights(
     return fights
 
 @app.get("/api/stats")
-async def get_stats(db: Session = Depends(get_db)):
-    """Получить общую статистику"""
+async def get_stats():
+    """Получить общую статистику (из кэшируемых фрагментов главной страницы)"""
     try:
-        total_fighters = db.query(Fighter).count()
-        total_weight_classes = db.query(WeightClass).count()
-        total_upcoming_fights = db.query(UpcomingFight).count()
-        total_fights = db.query(Fight).count()
-        total_fight_stats = db.query(FightStats).count()
-        
-        # Топ стран по количеству бойцов
-        from sqlalchemy import func
-        country_stats = db.query(
-            Fighter.country,
-            func.count(Fighter.id).label('count')
-        ).filter(
-            Fighter.country.isnot(None)
-        ).group_by(Fighter.country).order_by(
-            func.count(Fighter.id).desc()
-        ).limit(10).all()
-        
-        return {
-            "total_fighters": total_fighters,
-            "total_weight_classes": total_weight_classes,
-            "total_upcoming_fights": total_upcoming_fights,
-            "total_fights": total_fights,
-            "total_fight_stats": total_fight_stats,
-            "top_countries": [{"country": country, "count": count} for country, count in country_stats]
-        }
+        fragments = await home_page.get_fragments('counts', 'top_countries')
+        return {**fragments['counts'], "top_countries": fragments['top_countries']}
     except Exception as e:
         return {
             "total_fighters": 0,
             "total_weight_classes": 0,
+            "total_events": 0,
             "total_upcoming_fights": 0,
             "total_fights": 0,
             "total_fight_stats": 0,
@@ -513,29 +724,123 @@ async def get_stats(db: Session = Depends(get_db)):
             "error": str(e)
         }
 
+@app.get("/api/home")
+async def get_home():
+    """
+    Данные главной страницы одним запросом: счетчики, топ стран, чемпионы,
+    ближайшее и последние события. Каждый фрагмент кэшируется отдельно
+    (backend/home.py), фрагменты собираются параллельно.
+    """
+    try:
+        return json_response(await home_page.get_home())
+    except Exception as e:
+        print(f"❌ Ошибка сборки главной страницы: {e}")
+        raise HTTPException(status_code=500, detail="Не удалось собрать данные главной страницы")
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Статистика кэша API (попадания по префиксам)"""
+    return cache_manager.get_stats()
+
+@app.get("/api/scheduler/status")
+def get_scheduler_status(db: Session = Depends(get_db)):
+    """Состояние задач планировщика обновлений (parsers/scheduler.py)"""
+    now = datetime.utcnow()
+    jobs = db.query(ScheduledJob).order_by(ScheduledJob.next_run_at).all()
+    
+    return {
+        "jobs": [
+            {
+                "name": job.name,
+                "running": bool(job.running_until and job.running_until > now),
+                "next_run_at": job.next_run_at.isoformat() if job.next_run_at else None,
+                "overdue_seconds": max(0, int((now - job.next_run_at).total_seconds())) if job.next_run_at else 0,
+                "last_started_at": job.last_started_at.isoformat() if job.last_started_at else None,
+                "last_finished_at": job.last_finished_at.isoformat() if job.last_finished_at else None,
+                "last_status": job.last_status,
+                "last_duration": job.last_duration,
+                "last_error": job.last_error.strip().splitlines()[-1] if job.last_error else None,
+                "runs": job.runs,
+                "failures": job.failures
+            }
+            for job in jobs
+        ],
+        "timestamp": now.isoformat()
+    }
+
+@app.get("/api/analytics/status")
+def get_analytics_status():
+    """Состояние колоночного хранилища статистики боев"""
+    return fight_stats_store.get_status()
+
+@app.get("/api/analytics/fighters/{fighter_id}")
+def get_fighter_analytics(fighter_id: int):
+    """Суммы, точность и перцентили бойца внутри дивизиона"""
+    summary = fight_stats_store.fighter_summary(fighter_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Статистика бойца не найдена")
+    return summary
+
+@app.get("/api/analytics/leaderboard")
+def get_analytics_leaderboard(
+    metric: str = 'significant_strikes_accuracy',
+    weight_class: Optional[str] = None,
+    min_rounds: int = 5,
+    limit: int = 10
+):
+    """Лидеры по метрике статистики боев"""
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Неизвестная метрика. Доступны: {', '.join(METRICS)}")
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit должен быть от 1 до 100")
+    
+    return fight_stats_store.leaderboard(metric, weight_class, min_rounds, limit)
+
 # Новые эндпоинты для статистики боев
 
 @app.get("/api/events", response_model=List[EventResponse])
-async def get_events(
+def get_events(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     upcoming_only: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Получить список событий UFC"""
+    """Получить список событий UFC (cursor - из X-Next-Cursor предыдущей страницы, вместо skip)"""
+    page = _events_page(skip=skip, limit=limit, cursor=cursor, upcoming_only=upcoming_only, db=db)
+    return _page_items(response, page)
+
+@cache_events(ttl=600)
+def _events_page(skip: int, limit: int, cursor: Optional[str], upcoming_only: bool, db: Session) -> Dict:
+    """Страница списка событий: {"items": [...], "next_cursor": ...}"""
     try:
         query = db.query(Event)
         
         if upcoming_only:
             query = query.filter(Event.is_upcoming == True)
         
-        events = query.order_by(Event.date.desc()).offset(skip).limit(limit).all()
-        return [EventResponse.from_orm(event) for event in events]
+        events, next_cursor = _paginate(query, EVENT_KEYS, limit, cursor, skip)
+        return {"items": [home_page.event_json(event) for event in events], "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
-        return []
+        # Исключение, а не пустая страница: иначе @cached сохранит ошибку
+        print(f"Ошибка в get_events: {e}")
+        raise HTTPException(status_code=500, detail="Не удалось получить события")
+
+@app.get("/api/events/by-slug/{slug}", response_model=EventResponse)
+def get_event_by_slug(slug: str, db: Session = Depends(get_db)):
+    """Событие по адресу его страницы (/events/<название>)"""
+    event = _event_by_slug(db, slug)
+    
+    if not event:
+        raise HTTPException(status_code=404, detail="Событие не найдено")
+    
+    return event
 
 @app.get("/api/events/{event_id}", response_model=EventResponse)
-async def get_event(event_id: int, db: Session = Depends(get_db)):
+def get_event(event_id: int, db: Session = Depends(get_db)):
     """Получить детальную информацию о событии"""
     event = db.query(Event).filter(Event.id == event_id).first()
     
@@ -544,17 +849,66 @@ async def get_event(event_id: int, db: Session = Depends(get_db)):
     
     return event
 
+def _resolve_fighters_by_name(db: Session, names: List[Optional[str]]) -> Dict[str, Fighter]:
+    """Сопоставляет имена бойцов (name_en или name_ru) с записями одним IN-запросом"""
+    unique_names = {name for name in names if name}
+    if not unique_names:
+        return {}
+    
+    fighters = db.query(Fighter).filter(
+        Fighter.name_en.in_(unique_names) | Fighter.name_ru.in_(unique_names)
+    ).order_by(Fighter.id).all()
+    
+    # Как и раньше с .first(): при совпадении имени у нескольких бойцов берем бойца с меньшим id
+    fighters_by_name = {}
+    for fighter in fighters:
+        for name in (fighter.name_en, fighter.name_ru):
+            if name in unique_names:
+                fighters_by_name.setdefault(name, fighter)
+    
+    return fighters_by_name
+
 @app.get("/api/fights", response_model=List[FightResponse])
-async def get_fights(
+def get_fights(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     fighter_id: Optional[int] = None,
     weight_class_id: Optional[int] = None,
     event_id: Optional[int] = None,
     event_name: Optional[str] = None,
+    fighter_slug: Optional[str] = None,
+    event_slug: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Получить список боев с дополнительной информацией о бойцах"""
+    """
+    Получить список боев с дополнительной информацией о бойцах (cursor - из X-Next-Cursor, вместо skip).
+    
+    fighter_slug / event_slug - боец или событие по адресу страницы: страница получает
+    запись и ее бои одним пакетным запросом, не зная id заранее.
+    """
+    if fighter_slug:
+        fighter = _fighter_by_slug(db, fighter_slug)
+        if not fighter:
+            return []
+        fighter_id = fighter.id
+    
+    if event_slug:
+        event = _event_by_slug(db, event_slug)
+        if not event:
+            return []
+        event_id = event.id
+    
+    page = _fights_page(skip=skip, limit=limit, cursor=cursor, fighter_id=fighter_id,
+                        weight_class_id=weight_class_id, event_id=event_id, event_name=event_name, db=db)
+    return _page_items(response, page)
+
+@cache_fights(ttl=600)
+def _fights_page(skip: int, limit: int, cursor: Optional[str], fighter_id: Optional[int],
+                 weight_class_id: Optional[int], event_id: Optional[int], event_name: Optional[str],
+                 db: Session) -> Dict:
+    """Страница списка боев: {"items": [...], "next_cursor": ...}"""
     import logging
     logger = logging.getLogger("uvicorn.error")
     logger.error(f"!!! FIGHTS API CALLED: event_id={event_id}, event_name={event_name}")
@@ -564,13 +918,12 @@ async def get_fights(
         logger.error(f"!!! Query created")
         
         if fighter_id:
-            # Получаем имя бойца по ID
-            fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
-            if fighter:
-                fighter_name = fighter.name_en or fighter.name_ru
-                query = query.filter(
-                    (Fight.fighter1_name == fighter_name) | (Fight.fighter2_name == fighter_name)
-                )
+            # Вместо OR — выборка id по индексам fighter1/fighter2: иначе курсорные
+            # сегменты сканируют idx_fights_listing и фильтруют бойца построчно
+            query = query.filter(Fight.id.in_(union_all(
+                select(Fight.id).where(Fight.fighter1_id == fighter_id),
+                select(Fight.id).where(Fight.fighter2_id == fighter_id),
+            )))
         
         if weight_class_id:
             # Получаем название весовой категории по ID
@@ -579,45 +932,28 @@ async def get_fights(
                 query = query.filter(Fight.weight_class == weight_class.name_en)
         
         if event_id:
-            # Получаем название события по ID
-            event = db.query(Event).filter(Event.id == event_id).first()
-            logger.error(f"!!! event_id = {event_id}, event = {event}")
-            if event:
-                logger.error(f"!!! Ищем бои для события '{event.name}' (ID: {event_id})")
-                query = query.filter(Fight.event_name == event.name)
-            else:
-                logger.error(f"!!! Событие с ID {event_id} не найдено")
+            query = query.filter(Fight.event_id == event_id)
         
         if event_name:
             query = query.filter(Fight.event_name == event_name)
         
         # Сортируем бои: сначала по типу карты, затем по порядку в карте, затем по главному событию и титульному бою
-        fights = query.order_by(
-            Fight.card_type.desc(),  # Main card -> Preliminary card -> Early preliminary card
-            Fight.fight_order.asc(),  # Порядок внутри карты
-            Fight.is_main_event.desc(),
-            Fight.is_title_fight.desc(),
-            Fight.fight_date.desc()
-        ).offset(skip).limit(limit).all()
+        fights, next_cursor = _paginate(query, FIGHT_KEYS, limit, cursor, skip)
         
         logger.error(f"!!! Итоговое количество боев после фильтрации: {len(fights)}")
         
+        # Одним запросом получаем всех бойцов, упомянутых на странице
+        fighters_by_name = _resolve_fighters_by_name(
+            db,
+            [name for fight in fights for name in (fight.fighter1_name, fight.fighter2_name)]
+        )
+        
         result = []
         for fight in fights:
             try:
                 # Получаем дополнительную информацию о бойцах
-                fighter1_data = None
-                fighter2_data = None
-                
-                if fight.fighter1_name:
-                    fighter1_data = db.query(Fighter).filter(
-                        (Fighter.name_en == fight.fighter1_name) | (Fighter.name_ru == fight.fighter1_name)
-                    ).first()
-                
-                if fight.fighter2_name:
-                    fighter2_data = db.query(Fighter).filter(
-                        (Fighter.name_en == fight.fighter2_name) | (Fighter.name_ru == fight.fighter2_name)
-                    ).first()
+                fighter1_data = fighters_by_name.get(fight.fighter1_name) if fight.fighter1_name else None
+                fighter2_data = fighters_by_name.get(fight.fighter2_name) if fight.fighter2_name else None
                 
                 # Создаем расширенный ответ с информацией о бойцах
                 fight_data = fight.__dict__.copy()
@@ -642,23 +978,26 @@ async def get_fights(
                 if 'fight_date' in fight_data and fight_data['fight_date']:
                     fight_data['fight_date'] = str(fight_data['fight_date'])
                 
-                fight_response = FightResponse(**fight_data)
-                result.append(fight_response)
+                # Словарь, как и при попадании в кэш
+                result.append(jsonable_encoder(FightResponse(**fight_data)))
                 
             except Exception as e:
                 logger.error(f"!!! Ошибка при сериализации боя {fight.id}: {e}")
                 continue
         
         logger.error(f"!!! Возвращаем {len(result)} боев")
-        return result
+        return {"items": result, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"!!! Ошибка в get_fights: {e}")
         import traceback
         traceback.print_exc()
-        return []
+        # Исключение, а не пустая страница: иначе @cached сохранит ошибку
+        raise HTTPException(status_code=500, detail="Не удалось получить бои")
 
 @app.get("/api/fights/{fight_id}", response_model=FightResponse)
-async def get_fight(fight_id: int, db: Session = Depends(get_db)):
+def get_fight(fight_id: int, db: Session = Depends(get_db)):
     """Получить детальную информацию о бое"""
     fight = db.query(Fight).filter(Fight.id == fight_id).first()
     
@@ -668,7 +1007,7 @@ async def get_fight(fight_id: int, db: Session = Depends(get_db)):
     return fight
 
 @app.get("/api/fights/{fight_id}/stats", response_model=List[FightStatsResponse])
-async def get_fight_stats(fight_id: int, db: Session = Depends(get_db)):
+def get_fight_stats(fight_id: int, db: Session = Depends(get_db)):
     """Получить статистику боя по раундам"""
     stats = db.query(FightStats).filter(
         FightStats.fight_id == fight_id
@@ -677,58 +1016,39 @@ async def get_fight_stats(fight_id: int, db: Session = Depends(get_db)):
     return stats
 
 @app.get("/api/fighters/{fighter_id}/stats", response_model=FighterStatsSummary)
-async def get_fighter_stats(fighter_id: int, db: Session = Depends(get_db)):
+def get_fighter_stats(fighter_id: int, db: Session = Depends(get_db)):
     """Получить статистику бойца"""
     fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
     
     if not fighter:
         raise HTTPException(status_code=404, detail="Боец не найден")
     
-    # Получаем статистику бойца
-    stats_query = db.query(FightStats).filter(FightStats.fighter_id == fighter_id)
-    
-    total_rounds = stats_query.count()
     total_fights = db.query(Fight).filter(
         (Fight.fighter1_id == fighter_id) | (Fight.fighter2_id == fighter_id)
     ).count()
     
-    # Агрегированная статистика
-    stats = stats_query.with_entities(
-        db.func.sum(FightStats.significant_strikes_landed).label('total_sig_strikes_landed'),
-        db.func.sum(FightStats.significant_strikes_attempted).label('total_sig_strikes_attempted'),
-        db.func.sum(FightStats.takedown_successful).label('total_takedowns_successful'),
-        db.func.sum(FightStats.takedown_attempted).label('total_takedowns_attempted'),
-        db.func.sum(FightStats.knockdowns).label('total_knockdowns'),
-        db.func.sum(FightStats.submission_attempt).label('total_submission_attempts'),
-        db.func.sum(FightStats.reversals).label('total_reversals')
-    ).first()
-    
-    # Вычисляем средние показатели
-    avg_sig_strikes_rate = 0.0
-    if stats.total_sig_strikes_attempted and stats.total_sig_strikes_attempted > 0:
-        avg_sig_strikes_rate = round((stats.total_sig_strikes_landed / stats.total_sig_strikes_attempted) * 100, 2)
-    
-    avg_takedown_rate = 0.0
-    if stats.total_takedowns_attempted and stats.total_takedowns_attempted > 0:
-        avg_takedown_rate = round((stats.total_takedowns_successful / stats.total_takedowns_attempted) * 100, 2)
+    # Агрегированная статистика из колоночного хранилища (без SUM по fight_stats)
+    summary = fight_stats_store.fighter_summary(fighter_id)
+    totals = summary['totals'] if summary else {}
+    metrics = summary['metrics'] if summary else {}
     
     return FighterStatsSummary(
         fighter=fighter,
         total_fights=total_fights,
-        total_rounds=total_rounds,
-        total_significant_strikes_landed=stats.total_sig_strikes_landed or 0,
-        total_significant_strikes_attempted=stats.total_sig_strikes_attempted or 0,
-        average_significant_strikes_rate=avg_sig_strikes_rate,
-        total_takedowns_successful=stats.total_takedowns_successful or 0,
-        total_takedowns_attempted=stats.total_takedowns_attempted or 0,
-        average_takedown_rate=avg_takedown_rate,
-        total_knockdowns=stats.total_knockdowns or 0,
-        total_submission_attempts=stats.total_submission_attempts or 0,
-        total_reversals=stats.total_reversals or 0
+        total_rounds=summary['total_rounds'] if summary else 0,
+        total_significant_strikes_landed=totals.get('significant_strikes_landed', 0),
+        total_significant_strikes_attempted=totals.get('significant_strikes_attempted', 0),
+        average_significant_strikes_rate=metrics.get('significant_strikes_accuracy', 0.0),
+        total_takedowns_successful=totals.get('takedown_successful', 0),
+        total_takedowns_attempted=totals.get('takedown_attempted', 0),
+        average_takedown_rate=metrics.get('takedown_accuracy', 0.0),
+        total_knockdowns=totals.get('knockdowns', 0),
+        total_submission_attempts=totals.get('submission_attempt', 0),
+        total_reversals=totals.get('reversals', 0)
     )
 
 @app.get("/api/fighters/{fighter_id}/fights", response_model=List[FightResponse])
-async def get_fighter_fights(
+def get_fighter_fights(
     fighter_id: int,
     limit: int = 20,
     db: Session = Depends(get_db)
@@ -738,23 +1058,152 @@ async def get_fighter_fights(
         (Fight.fighter1_id == fighter_id) | (Fight.fighter2_id == fighter_id)
     ).order_by(Fight.fight_date.desc()).limit(limit).all()
     
-    return fights
+    return [FightResponse.from_orm(fight) for fight in fights]
 
-@app.post("/api/refresh-ufc-stats")
-async def refresh_ufc_stats():
-    """Обновить данные ufc.stats (аналог refresh_data())"""
+@app.post("/api/refresh-ufc-stats", status_code=202)
+def refresh_ufc_stats():
+    """Запустить обновление данных ufc.stats в фоновом процессе (аналог refresh_data())"""
     try:
-        from parsers.ufc_stats_importer import UFCStatsImporter
-        
-        importer = UFCStatsImporter()
-        importer.refresh_data()
-        
-        return {
-            "message": "Данные ufc.stats успешно обновлены",
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        job, created = background_jobs.enqueue('ufc_stats')
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ошибка при обновлении данных: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Ошибка при запуске обновления: {str(e)}")
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "deduplicated": not created,
+        "status_url": f"/api/jobs/{job.id}",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/api/jobs/{job_id}")
+def get_background_job(job_id: str):
+    """Состояние фоновой задачи: этап, прогресс и число обработанных строк"""
+    job = background_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "rows_processed": job.rows_processed,
+        "error": job.error.strip().splitlines()[-1] if job.error else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None
+    }
+
+# Пакетные запросы: несколько чтений за один HTTP-запрос и одну сессию БД
+
+# Ресурс пакетного запроса -> путь GET-эндпоинта, который его отдает
+BATCH_RESOURCES = {
+    'fighter': '/api/fighters/{fighter_id}',
+    'fighter_by_slug': '/api/fighters/by-slug/{slug}',
+    'fighters': '/api/fighters',
+    'fighter_stats': '/api/fighters/{fighter_id}/stats',
+    'fighter_fights': '/api/fighters/{fighter_id}/fights',
+    'weight_classes': '/api/weight-classes',
+    'rankings': '/api/rankings',
+    'compare': '/api/compare/{fighter1_id}/{fighter2_id}',
+    'upcoming_fights': '/api/upcoming-fights',
+    'events': '/api/events',
+    'event': '/api/events/{event_id}',
+    'event_by_slug': '/api/events/by-slug/{slug}',
+    'fights': '/api/fights',
+    'fight': '/api/fights/{fight_id}',
+    'fight_stats': '/api/fights/{fight_id}/stats',
+}
+
+MAX_BATCH_REQUESTS = 20
+
+class BatchItem(BaseModel):
+    resource: str
+    params: Dict[str, Any] = {}
+
+class BatchRequest(BaseModel):
+    requests: Dict[str, BatchItem]
+
+@lru_cache(maxsize=None)
+def _batch_route(resource: str) -> Optional[APIRoute]:
+    """GET-маршрут ресурса пакетного запроса"""
+    path = BATCH_RESOURCES.get(resource)
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and 'GET' in route.methods:
+            return route
+    return None
+
+@lru_cache(maxsize=None)
+def _adapter(annotation) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+def _batch_call(route: APIRoute, params: Dict[str, Any], db: Session):
+    """Вызывает обработчик маршрута с параметрами из пакетного запроса и общей сессией БД"""
+    kwargs = {}
+    signature = inspect.signature(route.endpoint)
+    unknown = set(params) - set(signature.parameters) - {'db', 'request', 'response'}
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Неизвестные параметры: {', '.join(sorted(unknown))}")
+    
+    for name, parameter in signature.parameters.items():
+        if parameter.annotation is Session:
+            kwargs[name] = db
+        elif parameter.annotation is Request:
+            # Пустой запрос: заголовки пакета (If-None-Match и т.п.) к частям не относятся
+            kwargs[name] = Request({'type': 'http', 'method': 'GET', 'headers': [], 'query_string': b''})
+        elif parameter.annotation is Response:
+            kwargs[name] = Response()
+        elif name in params:
+            try:
+                kwargs[name] = _adapter(parameter.annotation).validate_python(params[name])
+            except ValidationError as e:
+                raise HTTPException(status_code=422, detail=f"{name}: {e.errors()[0]['msg']}")
+        elif parameter.default is inspect.Parameter.empty:
+            raise HTTPException(status_code=422, detail=f"Не указан параметр {name}")
+    
+    return route.endpoint(**kwargs)
+
+def _batch_result(route: APIRoute, result) -> bytes:
+    """JSON-тело результата так, как его отдал бы сам эндпоинт"""
+    if isinstance(result, Response):
+        return result.body
+    if route.response_model is not None:
+        adapter = _adapter(route.response_model)
+        return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+    return dumps(jsonable_encoder(result))
+
+@app.post("/api/batch")
+def batch(payload: BatchRequest, db: Session = Depends(get_db)):
+    """
+    Несколько чтений за один запрос: {"requests": {"ключ": {"resource": ..., "params": {...}}}}.
+    
+    Все части выполняются по очереди в одной сессии БД. Ответ -
+    {"ключ": {"status": 200, "data": ...}} или {"ключ": {"status": 404, "error": ...}};
+    ошибка одной части не мешает остальным.
+    """
+    if len(payload.requests) > MAX_BATCH_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_BATCH_REQUESTS} запросов в пакете")
+    
+    parts = []
+    for key, item in payload.requests.items():
+        route = _batch_route(item.resource)
+        try:
+            if route is None:
+                raise HTTPException(status_code=404, detail=f"Неизвестный ресурс: {item.resource}")
+            body = _batch_result(route, _batch_call(route, item.params, db))
+            part = b'{"status":200,"data":' + body + b'}'
+        except HTTPException as e:
+            part = dumps({"status": e.status_code, "error": e.detail})
+        except Exception as e:
+            print(f"❌ Ошибка пакетного запроса {key} ({item.resource}): {e}")
+            db.rollback()
+            part = dumps({"status": 500, "error": str(e)})
+        parts.append(dumps(key) + b':' + part)
+    
+    return Response(content=b'{' + b','.join(parts) + b'}', media_type="application/json")
 
 # Обслуживание статических файлов фронтенда (для Railway)
 from fastapi.staticfiles import StaticFiles
@@ -1,29 +1,136 @@
 #!/usr/bin/env python3
 """
 Менеджер кэширования для UFC Ranker
+
+Двухуровневый кэш: ограниченный LRU в памяти процесса перед Redis.
+Если Redis недоступен (или не установлен), вторым уровнем служит
+локальный файловый кэш (LocalCacheManager).
+
+Сброс набора данных идет через поколения: парсеры вызывают
+database.versions.invalidate, который увеличивает версию 'cache:<набор>'
+в data_versions. Каждый процесс, у которого есть записи в LRU, раз в
+CACHE_SYNC_INTERVAL секунд сверяет версии в фоновом потоке и сбрасывает
+изменившиеся наборы из своего LRU. Redis и файловый кэш общие, поэтому
+учтенные в них поколения хранятся там же (ключ ufc:meta:generations):
+наборы сбрасывает первый процесс, заметивший новое поколение, в том
+числе если сброс произошел, пока API не был запущен.
 """
 
-import redis
+import asyncio
+import hashlib
 import json
-import pickle
-from typing import Any, Optional, Union
-from datetime import timedelta
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Tuple
 import os
 from functools import wraps
 
+from fastapi.encoders import jsonable_encoder
+
+from database.config import SessionLocal
+from database.versions import get_generations
+from .local_cache_manager import LocalCacheManager
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    print("⚠️ redis не установлен, используется локальный файловый кэш. Установите: pip install redis")
+
+
+class LRUCache:
+    """Ограниченный по размеру LRU-кэш в памяти процесса с TTL"""
+    
+    def __init__(self, maxsize: int = 1024, max_ttl: int = 60):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl  # Записи в памяти живут не дольше max_ttl, чтобы процессы не расходились надолго
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Возвращает (найдено, значение)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            
+            expires_at, value = item
+            if time.monotonic() > expires_at:
+                del self._data[key]
+                return False, None
+            
+            self._data.move_to_end(key)
+            return True, value
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Сохраняет значение, вытесняя самые давно использованные записи"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + min(ttl, self.max_ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: str) -> bool:
+        """Удаляет значение"""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+    
+    def delete_pattern(self, pattern: str) -> int:
+        """Удаляет все ключи по glob-паттерну"""
+        with self._lock:
+            keys = [key for key in self._data if fnmatchcase(key, pattern)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def clear(self) -> None:
+        """Очищает кэш"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
 
 class CacheManager:
-    """Менеджер кэширования с Redis"""
+    """Менеджер кэширования: LRU в памяти + Redis (или локальный файловый кэш)"""
     
     def __init__(self):
-        self.redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'localhost'),
-            port=int(os.getenv('REDIS_PORT', '6379')),
-            db=int(os.getenv('REDIS_DB', '0')),
-            password=os.getenv('REDIS_PASSWORD', ''),
-            decode_responses=True
+        self.redis_client = None
+        if REDIS_AVAILABLE:
+            redis_url = os.getenv('REDIS_URL')
+            redis_options = {
+                'decode_responses': True,
+                'socket_connect_timeout': 1,
+                'socket_timeout': 1
+            }
+            if redis_url:
+                self.redis_client = redis.Redis.from_url(redis_url, **redis_options)
+            else:
+                self.redis_client = redis.Redis(
+                    host=os.getenv('REDIS_HOST', 'localhost'),
+                    port=int(os.getenv('REDIS_PORT', '6379')),
+                    db=int(os.getenv('REDIS_DB', '0')),
+                    password=os.getenv('REDIS_PASSWORD', ''),
+                    **redis_options
+                )
+        
+        # Второй уровень на случай недоступного Redis
+        self.local_cache = LocalCacheManager(os.getenv('CACHE_DIR', '.cache/api'))
+        
+        # Первый уровень - LRU в памяти процесса
+        self.lru = LRUCache(
+            maxsize=int(os.getenv('CACHE_LRU_SIZE', '1024')),
+            max_ttl=int(os.getenv('CACHE_LRU_TTL', '60'))
         )
         
+        # После ошибки Redis не дергаем его retry_interval секунд
+        self.redis_retry_interval = int(os.getenv('REDIS_RETRY_INTERVAL', '30'))
+        self._redis_down_until = 0.0
+        
         # Префиксы для разных типов данных
         self.prefixes = {
             'fighters': 'ufc:fighters:',
@@ -31,66 +138,241 @@ class CacheManager:
             'events': 'ufc:events:',
             'fights': 'ufc:fights:',
             'stats': 'ufc:stats:',
-            'analytics': 'ufc:analytics:'
+            'analytics': 'ufc:analytics:',
+            'home': 'ufc:home:',
+            'meta': 'ufc:meta:'
         }
+        
+        # Счетчики попаданий по префиксам
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+        
+        # Поколения наборов данных: сбросы, сделанные другими процессами
+        self.sync_interval = float(os.getenv('CACHE_SYNC_INTERVAL', '5'))
+        self._generations: Optional[Dict[str, int]] = None
+        self._sync_thread = None
+        self._sync_lock = threading.Lock()
     
-    def get(self, key: str, prefix: str = '') -> Optional[Any]:
-        """Получает значение из кэша"""
-        try:
-            full_key = f"{prefix}{key}"
-            value = self.redis_client.get(full_key)
-            
-            if value:
-                # Пробуем десериализовать как JSON
-                try:
-                    return json.loads(value)
-                except json.JSONDecodeError:
-                    # Если не JSON, возвращаем как есть
-                    return value
-            
+    def _redis(self):
+        """Возвращает клиент Redis, если он доступен"""
+        if self.redis_client is None or time.monotonic() < self._redis_down_until:
             return None
-            
+        return self.redis_client
+    
+    def _mark_redis_down(self, e: Exception) -> None:
+        """Переключается на локальный кэш до следующей попытки"""
+        if time.monotonic() >= self._redis_down_until:
+            print(f"⚠️ Redis недоступен, используется локальный кэш: {e}")
+        self._redis_down_until = time.monotonic() + self.redis_retry_interval
+    
+    @property
+    def backend_name(self) -> str:
+        """Название активного второго уровня кэша"""
+        return 'redis' if self._redis() is not None else 'local'
+    
+    def _record(self, prefix: str, event: str) -> None:
+        """Учитывает попадание/промах для префикса"""
+        with self._metrics_lock:
+            counters = self._metrics.setdefault(prefix, {'lru_hits': 0, 'hits': 0, 'misses': 0})
+            counters[event] += 1
+    
+    def _lru_set(self, full_key: str, value: Any, ttl: int) -> None:
+        """Сохраняет значение в LRU; первая запись запускает сверку поколений"""
+        self.lru.set(full_key, value, ttl)
+        if self._sync_thread is None:
+            self._start_sync()
+    
+    def _start_sync(self) -> None:
+        """Запускает фоновую сверку поколений (один поток на процесс)"""
+        with self._sync_lock:
+            if self._sync_thread is not None:
+                return
+            self._sync_thread = threading.Thread(target=self._sync_loop, name="cache-generations", daemon=True)
+            self._sync_thread.start()
+    
+    def _sync_loop(self) -> None:
+        while True:
+            self.sync_generations()
+            time.sleep(self.sync_interval)
+    
+    def _load_generations(self) -> Dict[str, int]:
+        """Версии поколений всех наборов одним запросом"""
+        db = SessionLocal()
+        try:
+            return get_generations(db)
+        finally:
+            db.close()
+    
+    def sync_generations(self) -> List[str]:
+        """
+        Сбрасывает наборы, поколение которых сменилось.
+        
+        LRU сравнивается с прошлой сверкой этого процесса (первая сверка
+        только запоминает версии), Redis и файловый кэш - с поколениями,
+        уже учтенными в них. Возвращает имена сброшенных наборов.
+        """
+        try:
+            generations = self._load_generations()
         except Exception as e:
-            print(f"❌ Ошибка при получении из кэша: {e}")
+            # Нет таблицы или БД недоступна - LRU сбросится по max_ttl
+            print(f"⚠️ Не удалось сверить поколения кэша: {e}")
+            return []
+        
+        with self._sync_lock:
+            previous, self._generations = self._generations, generations
+        
+        changed = set()
+        if previous is not None:
+            changed.update(name for name, version in generations.items() if previous.get(name) != version)
+            self._clear_lru(changed)
+        changed.update(self._clear_shared(generations))
+        return sorted(changed)
+    
+    def _clear_lru(self, names) -> None:
+        """Сбрасывает из LRU наборы данных и собранные из них фрагменты главной страницы"""
+        for name in names:
+            prefix = self.prefixes.get(name)
+            if prefix:
+                self.lru.delete_pattern(f"{prefix}*")
+        for fragment in _home_fragments(names):
+            self.lru.delete(f"{self.prefixes['home']}{fragment}")
+    
+    def _clear_shared(self, generations: Dict[str, int]) -> List[str]:
+        """Сбрасывает из Redis и файлового кэша наборы, новое поколение которых там еще не учтено"""
+        seen = self._shared_get('generations', self.prefixes['meta']) or {}
+        changed = [name for name, version in generations.items() if seen.get(name) != version]
+        if not changed:
+            return []
+        
+        for name in changed:
+            prefix = self.prefixes.get(name)
+            if prefix:
+                self.delete_pattern('*', prefix)
+        for fragment in _home_fragments(changed):
+            self.delete(fragment, self.prefixes['home'])
+        self._shared_set('generations', self.prefixes['meta'], generations)
+        return changed
+    
+    def _shared_get(self, key: str, prefix: str) -> Optional[Any]:
+        """Значение из Redis или файлового кэша, минуя LRU"""
+        client = self._redis()
+        if client is not None:
+            try:
+                raw_value = client.get(f"{prefix}{key}")
+                return json.loads(raw_value) if raw_value else None
+            except Exception as e:
+                self._mark_redis_down(e)
+        return self.local_cache.get(key, prefix)
+    
+    def _shared_set(self, key: str, prefix: str, value: Any, ttl: int = 30 * 24 * 3600) -> None:
+        """Сохраняет значение в Redis или файловый кэш, минуя LRU"""
+        client = self._redis()
+        if client is not None:
+            try:
+                client.setex(f"{prefix}{key}", ttl, json.dumps(value))
+                return
+            except Exception as e:
+                self._mark_redis_down(e)
+        self.local_cache.set(key, value, prefix, ttl)
+    
+    def _lru_get(self, key: str, prefix: str = '') -> Tuple[bool, Any]:
+        """Ищет значение только в LRU"""
+        found, value = self.lru.get(f"{prefix}{key}")
+        if found:
+            self._record(prefix, 'lru_hits')
+        return found, value
+    
+    def _backend_get(self, key: str, prefix: str = '') -> Optional[Any]:
+        """Ищет значение во втором уровне (Redis или локальный кэш) и прогревает LRU"""
+        full_key = f"{prefix}{key}"
+        value = None
+        ttl = self.lru.max_ttl
+        
+        client = self._redis()
+        if client is not None:
+            try:
+                raw_value = client.get(full_key)
+                if raw_value:
+                    # Пробуем десериализовать как JSON
+                    try:
+                        value = json.loads(raw_value)
+                    except json.JSONDecodeError:
+                        # Если не JSON, возвращаем как есть
+                        value = raw_value
+                    remaining_ttl = client.ttl(full_key)
+                    if remaining_ttl and remaining_ttl > 0:
+                        ttl = remaining_ttl
+            except Exception as e:
+                self._mark_redis_down(e)
+                value = self.local_cache.get(key, prefix)
+        else:
+            value = self.local_cache.get(key, prefix)
+        
+        if value is None:
+            self._record(prefix, 'misses')
             return None
+        
+        self._record(prefix, 'hits')
+        self._lru_set(full_key, value, ttl)
+        return value
+    
+    def get(self, key: str, prefix: str = '') -> Optional[Any]:
+        """Получает значение из кэша"""
+        found, value = self._lru_get(key, prefix)
+        if found:
+            return value
+        return self._backend_get(key, prefix)
     
     def set(self, key: str, value: Any, prefix: str = '', ttl: int = 3600) -> bool:
         """Сохраняет значение в кэш"""
-        try:
-            full_key = f"{prefix}{key}"
-            
-            # Сериализуем в JSON
-            if isinstance(value, (dict, list)):
-                serialized_value = json.dumps(value, ensure_ascii=False)
-            else:
-                serialized_value = str(value)
-            
-            return self.redis_client.setex(full_key, ttl, serialized_value)
-            
-        except Exception as e:
-            print(f"❌ Ошибка при сохранении в кэш: {e}")
-            return False
+        full_key = f"{prefix}{key}"
+        self._lru_set(full_key, value, ttl)
+        
+        client = self._redis()
+        if client is not None:
+            try:
+                # Сериализуем в JSON
+                if isinstance(value, (dict, list)):
+                    serialized_value = json.dumps(value, ensure_ascii=False)
+                else:
+                    serialized_value = str(value)
+                
+                return bool(client.setex(full_key, ttl, serialized_value))
+            except Exception as e:
+                self._mark_redis_down(e)
+        
+        return self.local_cache.set(key, value, prefix, ttl)
     
     def delete(self, key: str, prefix: str = '') -> bool:
         """Удаляет значение из кэша"""
-        try:
-            full_key = f"{prefix}{key}"
-            return bool(self.redis_client.delete(full_key))
-        except Exception as e:
-            print(f"❌ Ошибка при удалении из кэша: {e}")
-            return False
+        deleted = self.lru.delete(f"{prefix}{key}")
+        
+        client = self._redis()
+        if client is not None:
+            try:
+                deleted = bool(client.delete(f"{prefix}{key}")) or deleted
+            except Exception as e:
+                self._mark_redis_down(e)
+        
+        # Локальный кэш тоже чистим: в нем могли остаться записи, пока Redis был недоступен
+        return self.local_cache.delete(key, prefix) or deleted
     
     def delete_pattern(self, pattern: str, prefix: str = '') -> int:
         """Удаляет все ключи по паттерну"""
-        try:
-            full_pattern = f"{prefix}{pattern}"
-            keys = self.redis_client.keys(full_pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
-            return 0
-        except Exception as e:
-            print(f"❌ Ошибка при удалении по паттерну: {e}")
-            return 0
+        full_pattern = f"{prefix}{pattern}"
+        deleted = self.lru.delete_pattern(full_pattern)
+        
+        client = self._redis()
+        if client is not None:
+            try:
+                # SCAN вместо KEYS, чтобы не блокировать Redis на больших базах
+                keys = list(client.scan_iter(match=full_pattern, count=500))
+                if keys:
+                    deleted += client.delete(*keys)
+            except Exception as e:
+                self._mark_redis_down(e)
+        
+        return deleted + self.local_cache.delete_pattern(pattern, prefix)
     
     def get_fighters(self, key: str = 'all') -> Optional[list]:
         """Получает бойцов из кэша"""
@@ -134,11 +416,16 @@ class CacheManager:
     
     def clear_all(self) -> bool:
         """Очищает весь кэш"""
-        try:
-            return self.redis_client.flushdb()
-        except Exception as e:
-            print(f"❌ Ошибка при очистке кэша: {e}")
-            return False
+        self.lru.clear()
+        
+        client = self._redis()
+        if client is not None:
+            try:
+                client.flushdb()
+            except Exception as e:
+                self._mark_redis_down(e)
+        
+        return self.local_cache.clear_all()
     
     def clear_fighters(self) -> int:
         """Очищает кэш бойцов"""
@@ -152,21 +439,71 @@ class CacheManager:
         """Очищает кэш событий"""
         return self.delete_pattern('*', self.prefixes['events'])
     
+    def clear_fights(self) -> int:
+        """Очищает кэш боев"""
+        return self.delete_pattern('*', self.prefixes['fights'])
+    
+    def clear_fight_stats(self) -> int:
+        """Очищает кэш статистики боев"""
+        return self.delete_pattern('*', self.prefixes['stats'])
+    
+    def clear_analytics(self) -> int:
+        """Очищает кэш аналитики"""
+        return self.delete_pattern('*', self.prefixes['analytics'])
+    
     def get_stats(self) -> dict:
         """Получает статистику кэша"""
+        stats = {
+            'backend': self.backend_name,
+            'lru_size': len(self.lru),
+            'lru_maxsize': self.lru.maxsize,
+            'prefixes': self._get_prefix_stats()
+        }
+        
+        client = self._redis()
+        if client is None:
+            stats['local'] = self.local_cache.get_stats()
+            return stats
+        
         try:
-            info = self.redis_client.info()
-            return {
+            info = client.info()
+            stats.update({
                 'used_memory': info.get('used_memory_human', '0B'),
                 'connected_clients': info.get('connected_clients', 0),
                 'total_commands_processed': info.get('total_commands_processed', 0),
                 'keyspace_hits': info.get('keyspace_hits', 0),
                 'keyspace_misses': info.get('keyspace_misses', 0),
                 'hit_rate': self._calculate_hit_rate(info)
-            }
+            })
         except Exception as e:
+            self._mark_redis_down(e)
             print(f"❌ Ошибка при получении статистики кэша: {e}")
-            return {}
+        
+        return stats
+    
+    def _get_prefix_stats(self) -> dict:
+        """Возвращает попадания и промахи по каждому префиксу"""
+        names = {prefix: name for name, prefix in self.prefixes.items()}
+        
+        with self._metrics_lock:
+            metrics = {prefix: dict(counters) for prefix, counters in self._metrics.items()}
+        
+        result = {}
+        for prefix, counters in metrics.items():
+            hits = counters['lru_hits'] + counters['hits']
+            result[names.get(prefix, prefix)] = {
+                **counters,
+                'hit_rate': self._calculate_hit_rate({
+                    'keyspace_hits': hits,
+                    'keyspace_misses': counters['misses']
+                }),
+                'lru_hit_rate': self._calculate_hit_rate({
+                    'keyspace_hits': counters['lru_hits'],
+                    'keyspace_misses': counters['hits'] + counters['misses']
+                })
+            }
+        
+        return result
     
     def _calculate_hit_rate(self, info: dict) -> float:
         """Вычисляет процент попаданий в кэш"""
@@ -184,16 +521,66 @@ class CacheManager:
 cache_manager = CacheManager()
 
 
+# Фрагменты главной страницы (backend/home.py) и наборы данных, из которых они собраны
+HOME_FRAGMENT_SOURCES = {
+    'counts': ('fighters', 'rankings', 'events', 'fights', 'stats'),
+    'top_countries': ('fighters',),
+    'champions': ('rankings', 'fighters'),
+    'next_event': ('events',),
+    'latest_events': ('events',),
+}
+
+
+def _home_fragments(names) -> List[str]:
+    """Фрагменты главной страницы, собранные из наборов данных names"""
+    return [fragment for fragment, sources in HOME_FRAGMENT_SOURCES.items() if set(names) & set(sources)]
+
+
+def _make_cache_key(func, args, kwargs) -> str:
+    """Стабильный ключ кэша по простым аргументам (сессии БД и т.п. пропускаются)"""
+    simple_types = (str, int, float, bool, type(None))
+    parts = [repr(arg) for arg in args if isinstance(arg, simple_types)]
+    parts += [f"{name}={value!r}" for name, value in sorted(kwargs.items()) if isinstance(value, simple_types)]
+    digest = hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:16]
+    return f"{func.__name__}:{digest}"
+
+
 def cached(prefix: str, ttl: int = 3600, key_func=None):
-    """Декоратор для кэширования результатов функций"""
+    """Декоратор для кэширования результатов функций (синхронных и async)"""
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        def make_key(args, kwargs):
             # Генерируем ключ кэша
             if key_func:
-                cache_key = key_func(*args, **kwargs)
-            else:
-                cache_key = f"{func.__name__}:{hash(str(args) + str(kwargs))}"
+                return key_func(*args, **kwargs)
+            return _make_cache_key(func, args, kwargs)
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = make_key(args, kwargs)
+                
+                # LRU в памяти проверяем прямо в event loop - это дешево
+                found, cached_result = cache_manager._lru_get(cache_key, prefix)
+                if found:
+                    return cached_result
+                
+                # Redis/файловый кэш - блокирующий ввод-вывод, уводим в поток
+                cached_result = await asyncio.to_thread(cache_manager._backend_get, cache_key, prefix)
+                if cached_result is not None:
+                    return cached_result
+                
+                # Выполняем функцию
+                result = await func(*args, **kwargs)
+                
+                # Сохраняем в кэш
+                await asyncio.to_thread(cache_manager.set, cache_key, jsonable_encoder(result), prefix, ttl)
+                
+                return result
+            return async_wrapper
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = make_key(args, kwargs)
             
             # Пробуем получить из кэша
             cached_result = cache_manager.get(cache_key, prefix)
@@ -204,7 +591,7 @@ def cached(prefix: str, ttl: int = 3600, key_func=None):
             result = func(*args, **kwargs)
             
             # Сохраняем в кэш
-            cache_manager.set(cache_key, result, prefix, ttl)
+            cache_manager.set(cache_key, jsonable_encoder(result), prefix, ttl)
             
             return result
         return wrapper
@@ -226,6 +613,11 @@ def cache_events(ttl: int = 3600):
     return cached(cache_manager.prefixes['events'], ttl)
 
 
+def cache_fights(ttl: int = 1800):
+    """Декоратор для кэширования боев"""
+    return cached(cache_manager.prefixes['fights'], ttl)
+
+
 def cache_analytics(ttl: int = 7200):
     """Декоратор для кэширования аналитики"""
     return cached(cache_manager.prefixes['analytics'], ttl)
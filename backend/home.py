@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Данные главной страницы, собранные из независимо кэшируемых фрагментов
+
+Каждый фрагмент (счетчики, топ стран, чемпионы, ближайшее и последние
+события) кэшируется отдельно под префиксом home со своим TTL и
+сбрасывается вместе с наборами данных, из которых собран
+(cache_manager.HOME_FRAGMENT_SOURCES; парсеры сбрасывают наборы через
+database.versions.invalidate). Фрагменты запрашиваются параллельно: попадания в LRU
+отдаются прямо в event loop, а промахи считаются через run_db: на
+асинхронном движке, если он включен (DB_ASYNC=1), иначе в пуле потоков,
+каждый в своей сессии БД.
+"""
+
+import asyncio
+from datetime import date
+from typing import Callable, Dict, List
+
+from sqlalchemy import func
+
+from backend.cache_manager import cache_manager, cached
+from database.config import run_db
+from database.models import Event, Fight, Fighter, FightStats, Ranking, UpcomingFight, WeightClass
+
+# Сколько строк отдают списочные фрагменты
+TOP_COUNTRIES_LIMIT = 10
+LATEST_EVENTS_LIMIT = 5
+
+
+def event_json(event: Event) -> Dict:
+    """Словарь в форме EventResponse"""
+    return {
+        "id": event.id,
+        "name": event.name,
+        "event_date": str(event.date) if event.date else None,
+        "location": event.location,
+        "venue": event.venue,
+        "attendance": event.attendance,
+        "image_url": event.image_url,
+        "description": event.description,
+        "is_upcoming": event.is_upcoming
+    }
+
+
+def _counts(db) -> Dict:
+    return {
+        "total_fighters": db.query(func.count(Fighter.id)).scalar(),
+        "total_weight_classes": db.query(func.count(WeightClass.id)).scalar(),
+        "total_events": db.query(func.count(Event.id)).scalar(),
+        "total_upcoming_fights": db.query(func.count(UpcomingFight.id)).scalar(),
+        "total_fights": db.query(func.count(Fight.id)).scalar(),
+        "total_fight_stats": db.query(func.count(FightStats.id)).scalar()
+    }
+
+
+def _top_countries(db) -> List[Dict]:
+    """Топ стран по количеству бойцов"""
+    rows = db.query(
+        Fighter.country,
+        func.count(Fighter.id).label('count')
+    ).filter(
+        Fighter.country.isnot(None)
+    ).group_by(Fighter.country).order_by(
+        func.count(Fighter.id).desc()
+    ).limit(TOP_COUNTRIES_LIMIT).all()
+    return [{"country": country, "count": count} for country, count in rows]
+
+
+def _champions(db) -> List[Dict]:
+    """Действующие чемпионы категорий"""
+    rows = db.query(
+        Ranking.weight_class, Fighter.id, Fighter.name_ru, Fighter.name_en, Fighter.country,
+        Fighter.image_url, Fighter.wins, Fighter.losses, Fighter.draws
+    ).join(Fighter, Fighter.id == Ranking.fighter_id).filter(
+        Ranking.is_champion == True
+    ).order_by(Ranking.weight_class).all()
+
+    return [{
+        "weight_class": row.weight_class,
+        "fighter": {
+            "id": row.id,
+            "name": row.name_ru or row.name_en or "Unknown Fighter",
+            "name_en": row.name_en,
+            "country": row.country,
+            "image_url": row.image_url,
+            "wins": row.wins or 0,
+            "losses": row.losses or 0,
+            "draws": row.draws or 0
+        }
+    } for row in rows]
+
+
+def _next_event(db) -> Dict:
+    """Ближайшее событие в обертке {"event": ...}: значение None кэш не сохраняет"""
+    event = db.query(Event).filter(Event.date >= date.today()).order_by(Event.date, Event.id).first()
+    return {"event": event_json(event) if event else None}
+
+
+def _latest_events(db) -> List[Dict]:
+    """Последние прошедшие события"""
+    events = db.query(Event).filter(Event.date < date.today()).order_by(
+        Event.date.desc(), Event.id.desc()
+    ).limit(LATEST_EVENTS_LIMIT).all()
+    return [event_json(event) for event in events]
+
+
+def _fragment(name: str, builder: Callable, ttl: int):
+    """Кэшируемый фрагмент: ключ - имя фрагмента, сброс - по HOME_FRAGMENT_SOURCES"""
+    @cached(cache_manager.prefixes['home'], ttl, key_func=lambda: name)
+    async def fragment():
+        return await run_db(builder)
+
+    fragment.__name__ = name
+    return fragment
+
+
+# Имя фрагмента -> корутина, возвращающая его данные. TTL ограничивает
+# устаревание, если набор данных изменился без вызова invalidate
+FRAGMENTS = {
+    'counts': _fragment('counts', _counts, ttl=600),
+    'top_countries': _fragment('top_countries', _top_countries, ttl=3600),
+    'champions': _fragment('champions', _champions, ttl=1800),
+    # Ближайшее событие меняется и со временем, поэтому TTL короче
+    'next_event': _fragment('next_event', _next_event, ttl=300),
+    'latest_events': _fragment('latest_events', _latest_events, ttl=1800),
+}
+
+
+async def get_fragments(*names: str) -> Dict:
+    """Данные фрагментов (все, если имена не заданы), запрошенные параллельно"""
+    names = names or tuple(FRAGMENTS)
+    results = await asyncio.gather(*(FRAGMENTS[name]() for name in names))
+    return dict(zip(names, results))
+
+
+async def get_home() -> Dict:
+    """Данные главной страницы"""
+    fragments = await get_fragments()
+    fragments['next_event'] = fragments['next_event']['event']
+    return fragments
+
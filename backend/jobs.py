@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Фоновые задачи API: выполняются в отдельном процессе, состояние - в БД
+
+POST-обработчик ставит задачу (enqueue) и сразу возвращает ее id, работа
+идет в процессе-воркере, а прогресс и число обработанных строк пишутся
+в таблицу background_jobs, откуда их отдает GET /api/jobs/{id}.
+
+Незавершенная задача каждого типа может быть только одна (частичный
+уникальный индекс), поэтому повторный запрос возвращает уже идущую задачу.
+Процесс-воркер периодически обновляет heartbeat_at; задача, от которой
+давно нет отметок (процесс убит вместе с сервером), считается упавшей
+и не мешает запустить новую.
+
+Планировщик (parsers/scheduler.py) запускает ufc_stats через тот же
+enqueue и ждет задачу в wait_job, поэтому плановый и ручной запуски
+не выполняются одновременно.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from database.config import SessionLocal
+from database.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Как часто воркер отмечается в БД и через сколько без отметок задача считается упавшей, с
+HEARTBEAT_INTERVAL = 15
+STALE_AFTER = 10 * 60
+
+# Прогресс пишется в БД не чаще раза в столько секунд
+PROGRESS_INTERVAL = 1.0
+
+# Как часто wait_job перечитывает состояние задачи, с
+WAIT_POLL_INTERVAL = 5.0
+
+
+def run_ufc_stats(progress: Callable[[str, float, int], None]) -> None:
+    from parsers.ufc_stats_importer import UFCStatsImporter
+    if not UFCStatsImporter().refresh_data(progress=progress):
+        raise RuntimeError("Не удалось обновить данные ufc.stats")
+
+
+# Тип задачи -> функция, принимающая обработчик прогресса (этап, доля 0..1, строк)
+JOB_KINDS: Dict[str, Callable] = {
+    'ufc_stats': run_ufc_stats,
+}
+
+
+def _update(job_id: str, **values) -> None:
+    db = SessionLocal()
+    try:
+        db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _fail_stale_jobs(db, kind: str) -> None:
+    """Помечает упавшими незавершенные задачи без отметок дольше STALE_AFTER"""
+    deadline = datetime.utcnow() - timedelta(seconds=STALE_AFTER)
+    stale = db.query(BackgroundJob).filter(
+        BackgroundJob.kind == kind,
+        BackgroundJob.status.in_(ACTIVE_STATUSES),
+        BackgroundJob.heartbeat_at < deadline
+    ).update(
+        {
+            BackgroundJob.status: 'error',
+            BackgroundJob.error: "Процесс задачи перестал отвечать",
+            BackgroundJob.finished_at: datetime.utcnow()
+        },
+        synchronize_session=False
+    )
+    if stale:
+        db.commit()
+        logger.warning(f"⚠️ {kind}: {stale} зависших задач помечены упавшими")
+
+
+def enqueue(kind: str) -> Tuple[BackgroundJob, bool]:
+    """
+    Ставит задачу и запускает процесс-воркер.
+
+    Возвращает (задача, создана ли новая). Если задача этого типа уже
+    выполняется, возвращается она и новый процесс не запускается.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Неизвестный тип задачи: {kind}")
+
+    # Забираем статус завершившихся воркеров, чтобы они не оставались зомби
+    multiprocessing.active_children()
+
+    db = SessionLocal()
+    try:
+        _fail_stale_jobs(db, kind)
+
+        now = datetime.utcnow()
+        job = BackgroundJob(id=uuid.uuid4().hex, kind=kind, status='queued', progress=0.0,
+                            rows_processed=0, created_at=now, heartbeat_at=now)
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Незавершенная задача этого типа уже есть
+            db.rollback()
+            existing = db.query(BackgroundJob).filter(
+                BackgroundJob.kind == kind,
+                BackgroundJob.status.in_(ACTIVE_STATUSES)
+            ).first()
+            if existing is not None:
+                db.expunge(existing)
+                return existing, False
+            raise
+
+        db.refresh(job)
+        db.expunge(job)
+    finally:
+        db.close()
+
+    try:
+        # spawn: воркер не наследует потоки, соединения и пул сервера
+        process = multiprocessing.get_context('spawn').Process(
+            target=run_job, args=(job.id,), name=f"job-{kind}", daemon=False
+        )
+        process.start()
+    except Exception as e:
+        _update(job.id, status='error', error=f"Не удалось запустить процесс: {e}",
+                finished_at=datetime.utcnow())
+        raise
+
+    logger.info(f"🚀 {kind}: задача {job.id} запущена (pid {process.pid})")
+    return job, True
+
+
+def get_job(job_id: str):
+    """Задача по id или None"""
+    db = SessionLocal()
+    try:
+        job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+        if job is not None:
+            db.expunge(job)
+        return job
+    finally:
+        db.close()
+
+
+def wait_job(job_id: str, poll: float = WAIT_POLL_INTERVAL):
+    """
+    Ждет завершения задачи и возвращает ее (None, если задачи нет).
+
+    Задача, от которой давно нет отметок, помечается упавшей, чтобы
+    ожидание не длилось вечно после гибели процесса-воркера.
+    """
+    while True:
+        job = get_job(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job
+        if job.heartbeat_at is not None and datetime.utcnow() - job.heartbeat_at > timedelta(seconds=STALE_AFTER):
+            db = SessionLocal()
+            try:
+                _fail_stale_jobs(db, job.kind)
+            finally:
+                db.close()
+            continue
+        time.sleep(poll)
+
+
+def run_job(job_id: str) -> None:
+    """Выполняет задачу (точка входа процесса-воркера)"""
+    # spawn-процесс не наследует настройки логирования сервера
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    job = get_job(job_id)
+    if job is None:
+        logger.error(f"❌ Задача {job_id} не найдена")
+        return
+
+    now = datetime.utcnow()
+    _update(job_id, status='running', stage='start', started_at=now, heartbeat_at=now)
+
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            _update(job_id, heartbeat_at=datetime.utcnow())
+
+    threading.Thread(target=heartbeat, name=f"heartbeat-{job_id}", daemon=True).start()
+
+    last_write = 0.0
+
+    def progress(stage: str, fraction: float, rows: int = 0) -> None:
+        nonlocal last_write
+        # Частые отчеты (по чанкам) прореживаем, смену этапа пишем всегда
+        if stage == progress.stage and time.monotonic() - last_write < PROGRESS_INTERVAL:
+            return
+        progress.stage = stage
+        last_write = time.monotonic()
+        _update(job_id, stage=stage, progress=round(fraction, 3), rows_processed=rows,
+                heartbeat_at=datetime.utcnow())
+
+    progress.stage = None
+
+    try:
+        JOB_KINDS[job.kind](progress)
+    except Exception:
+        error = traceback.format_exc()
+        logger.error(f"❌ {job.kind}: задача {job_id} завершилась ошибкой\n{error}")
+        _update(job_id, status='error', error=error, finished_at=datetime.utcnow())
+    else:
+        _update(job_id, status='done', stage='done', progress=1.0, finished_at=datetime.utcnow())
+        logger.info(f"✅ {job.kind}: задача {job_id} выполнена")
+    finally:
+        stop.set()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный бенчмарк API: задержки p50/p95/p99 при конкурентном смешанном трафике
+
+Запросы из MIX (списки боев и бойцов, профиль бойца, рейтинги, события,
+/api/stats, /api/home) отправляются с заданной конкурентностью. По
+умолчанию приложение работает в текущем процессе (через ASGI, с тем же
+ограничением пула потоков, что и на сервере) на синтетической БД во
+временной папке; с --url замеряется уже запущенный сервер.
+
+Сравнение до и после: сохранить результаты одной ревизии (--save) и
+передать их при замере другой (--baseline). В процессе можно сравнить
+и способы выполнения запросов async-обработчиков (--engine): пул потоков
+и асинхронный движок (DB_ASYNC=1 и установлен aiosqlite или asyncpg).
+
+Запуск:
+    python -m backend.load_benchmark
+    DB_ASYNC=1 python -m backend.load_benchmark --engine both --requests 5000 --concurrency 100
+    python -m backend.load_benchmark --url http://localhost:8000 --save before.json
+    python -m backend.load_benchmark --url http://localhost:8000 --baseline before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Доли запросов каждого вида в трафике
+MIX = {
+    'fights_by_fighter': 4,
+    'fights_page': 2,
+    'fighters_page': 2,
+    'fighter': 2,
+    'rankings': 2,
+    'events_page': 1,
+    'stats': 1,
+    'home': 1,
+}
+
+
+def _paths(fighter_ids: List[int], rng: random.Random) -> Dict[str, Callable[[], str]]:
+    """Вид запроса -> функция, возвращающая путь со случайными параметрами"""
+    return {
+        'fights_by_fighter': lambda: f"/api/fights?limit=50&fighter_id={rng.choice(fighter_ids)}",
+        'fights_page': lambda: f"/api/fights?limit=50&skip={rng.randrange(0, 2000)}",
+        'fighters_page': lambda: f"/api/fighters?limit=100&skip={rng.randrange(0, 2000)}",
+        'fighter': lambda: f"/api/fighters/{rng.choice(fighter_ids)}",
+        'rankings': lambda: "/api/rankings",
+        'events_page': lambda: f"/api/events?limit=20&skip={rng.randrange(0, 200)}",
+        'stats': lambda: "/api/stats",
+        'home': lambda: "/api/home",
+    }
+
+
+def _seed(rows: int) -> None:
+    """Заполняет пустую БД синтетической выгрузкой ufc.stats и рейтингами"""
+    from database.config import SessionLocal
+    from database.models import Fighter, Ranking
+    from parsers.ufc_stats_importer import UFCStatsImporter, _synthetic_stats
+
+    importer = UFCStatsImporter(cache_dir=os.path.join(os.environ['CACHE_DIR'], 'import'))
+    if not importer.import_to_database(_synthetic_stats(rows)):
+        raise SystemExit(1)
+
+    db = SessionLocal()
+    try:
+        fighter_ids = [fighter_id for (fighter_id,) in db.query(Fighter.id).order_by(Fighter.id).limit(12 * 16)]
+        db.add_all([
+            Ranking(fighter_id=fighter_id, weight_class=f"Категория {i // 16}", rank_position=i % 16,
+                    is_champion=i % 16 == 0)
+            for i, fighter_id in enumerate(fighter_ids)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _fighter_ids() -> List[int]:
+    from database.config import SessionLocal
+    from database.models import Fighter
+
+    db = SessionLocal()
+    try:
+        return [fighter_id for (fighter_id,) in db.query(Fighter.id)] or [1]
+    finally:
+        db.close()
+
+
+async def _run_load(client, paths: Dict[str, Callable[[], str]], requests: int, concurrency: int,
+                    rng: random.Random) -> Dict[str, List[float]]:
+    """Отправляет requests запросов в concurrency потоков. Возвращает задержки по видам запросов, мс"""
+    import httpx
+
+    kinds = rng.choices(list(MIX), weights=list(MIX.values()), k=requests)
+    queue = asyncio.Queue()
+    for kind in kinds:
+        queue.put_nowait(kind)
+
+    latencies = {kind: [] for kind in MIX}
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                kind = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.get(paths[kind]())
+                failed = response.status_code >= 500
+            except httpx.HTTPError:
+                failed = True
+            latencies[kind].append((time.perf_counter() - started) * 1000)
+            errors += failed
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    if errors:
+        print(f"⚠️ Запросов с ошибкой (5xx или сбой соединения): {errors}")
+    return latencies
+
+
+def _summary(name: str, latencies: Dict[str, List[float]], elapsed: float) -> Dict:
+    """p50/p95/p99 по всему трафику и по видам запросов"""
+    def percentiles(values: List[float]) -> Dict:
+        if not values:
+            return {'requests': 0}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {'requests': len(values), 'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2),
+                'p99_ms': round(float(p99), 2)}
+
+    total = [value for values in latencies.values() for value in values]
+    return {
+        'name': name,
+        'rps': round(len(total) / elapsed, 1),
+        **percentiles(total),
+        'kinds': {kind: percentiles(values) for kind, values in latencies.items()},
+    }
+
+
+def print_summary(result: Dict, baseline: Optional[Dict] = None) -> None:
+    """Печатает таблицу задержек (с изменением p99 относительно базовой линии)"""
+    print(f"\n📊 {result['name']}: {result['requests']} запросов, {result['rps']} запр/с")
+    print(f"{'Запрос':<20}{'Кол-во':>8}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'Δ p99':>9}")
+    rows = [('Все', result)] + sorted(result['kinds'].items())
+    previous_rows = dict([('Все', baseline)] + list(baseline['kinds'].items())) if baseline else {}
+    for kind, values in rows:
+        if not values.get('requests'):
+            continue
+        delta = ''
+        previous = previous_rows.get(kind)
+        if previous and previous.get('p99_ms'):
+            delta = f"{values['p99_ms'] / previous['p99_ms'] - 1:+.0%}"
+        print(f"{kind:<20}{values['requests']:>8}{values['p50_ms']:>10}{values['p95_ms']:>10}"
+              f"{values['p99_ms']:>10}{delta:>9}")
+
+
+async def _bench_app(engines: List[str], args) -> List[Dict]:
+    """Замер приложения в текущем процессе для каждого способа выполнения запросов"""
+    import httpx
+    from anyio import to_thread
+
+    from backend.app import app
+    from backend.cache_manager import cache_manager
+    from database import config
+
+    # Отладочные сообщения /api/fights на каждый запрос не нужны в отчете
+    logging.getLogger("uvicorn.error").setLevel(logging.CRITICAL)
+    # Как при запуске сервера (startup_event): поток на каждое соединение пула БД
+    to_thread.current_default_thread_limiter().total_tokens = config.DB_MAX_CONNECTIONS
+    async_session = config.AsyncSessionLocal
+    fighter_ids = _fighter_ids()
+
+    results = []
+    for engine in engines:
+        config.AsyncSessionLocal = async_session if engine == 'async' else None
+        cache_manager.clear_all()
+        rng = random.Random(args.seed)
+        # Исключения приложения становятся ответами 500, как на сервере
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            # Прогрев: импорт, первые соединения пула, кэши справочников
+            await _run_load(client, _paths(fighter_ids, rng), min(200, args.requests), args.concurrency, rng)
+            started = time.perf_counter()
+            latencies = await _run_load(client, _paths(fighter_ids, rng), args.requests, args.concurrency, rng)
+            results.append(_summary(engine, latencies, time.perf_counter() - started))
+    config.AsyncSessionLocal = async_session
+    return results
+
+
+async def _bench_url(args) -> List[Dict]:
+    """Замер запущенного сервера"""
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        response = await client.get("/api/fighters", params={"limit": 1000})
+        fighter_ids = [fighter['id'] for fighter in response.json()] or [1]
+        rng = random.Random(args.seed)
+        await _run_load(client, _paths(fighter_ids, rng), min(200, args.requests), args.concurrency, rng)
+        started = time.perf_counter()
+        latencies = await _run_load(client, _paths(fighter_ids, rng), args.requests, args.concurrency, rng)
+    return [_summary(args.url, latencies, time.perf_counter() - started)]
+
+
+def _use_temporary_database() -> str:
+    """Временная БД и кэш для замера в процессе (до импорта модулей проекта). Возвращает папку"""
+    workdir = tempfile.mkdtemp(prefix='ufc-load-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['CACHE_DIR'] = os.path.join(workdir, 'cache')
+    return workdir
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк API (задержки при смешанном трафике)")
+    arg_parser.add_argument('--requests', type=int, default=2000, help="сколько запросов отправить")
+    arg_parser.add_argument('--concurrency', type=int, default=50, help="сколько запросов одновременно")
+    arg_parser.add_argument('--url', help="адрес запущенного сервера (по умолчанию - приложение в процессе)")
+    arg_parser.add_argument('--database', action='store_true',
+                            help="использовать БД из DATABASE_URL вместо синтетической")
+    arg_parser.add_argument('--rows', type=int, default=120_000, help="строк статистики в синтетической БД")
+    arg_parser.add_argument('--engine', choices=['auto', 'threadpool', 'async', 'both'], default='auto',
+                            help="как async-обработчики выполняют запросы к БД")
+    arg_parser.add_argument('--seed', type=int, default=0, help="зерно случайных параметров запросов")
+    arg_parser.add_argument('--save', help="сохранить результаты в JSON")
+    arg_parser.add_argument('--baseline', help="JSON с результатами для сравнения")
+    args = arg_parser.parse_args()
+
+    if args.url:
+        results = asyncio.run(_bench_url(args))
+    else:
+        workdir = None if args.database else _use_temporary_database()
+
+        from backend.cache_manager import cache_manager
+        from database import config
+
+        config.init_database()
+        if workdir:
+            print(f"📄 Временная БД и кэш: {workdir}")
+            # Синтетические данные не попадают в общий Redis: кэш - файловый во временной папке
+            cache_manager.redis_client = None
+            _seed(args.rows)
+
+        engines = {
+            'auto': ['async' if config.AsyncSessionLocal is not None else 'threadpool'],
+            'both': ['threadpool', 'async'],
+        }.get(args.engine, [args.engine])
+        if 'async' in engines and config.AsyncSessionLocal is None:
+            print("⚠️ Асинхронный движок выключен (нужны DB_ASYNC=1 и aiosqlite/asyncpg с greenlet), замеряем пул потоков")
+            engines = ['threadpool']
+        results = asyncio.run(_bench_app(engines, args))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = {result['name']: result for result in json.load(f)}
+
+    for result in results:
+        # С одним результатом в базовой линии сравниваем с ним, иначе - по имени
+        previous = baseline.get(result['name']) or (next(iter(baseline.values())) if len(baseline) == 1 else None)
+        print_summary(result, previous)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результаты сохранены: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import json
 import time
 from typing import Any, Optional, Dict
 from functools import wraps
+from fnmatch import fnmatchcase
 import os
 
 
@@ -86,6 +87,20 @@ class LocalCacheManager:
             print(f"❌ Ошибка при удалении из кэша: {e}")
             return False
     
+    def delete_pattern(self, pattern: str, prefix: str = '') -> int:
+        """Удаляет все ключи по паттерну"""
+        try:
+            file_pattern = os.path.basename(self._get_cache_file(pattern, prefix))
+            deleted = 0
+            for filename in os.listdir(self.cache_dir):
+                if fnmatchcase(filename, file_pattern):
+                    os.remove(os.path.join(self.cache_dir, filename))
+                    deleted += 1
+            return deleted
+        except Exception as e:
+            print(f"❌ Ошибка при удалении по паттерну: {e}")
+            return 0
+    
     def clear_all(self) -> bool:
         """Очищает весь кэш"""
         try:
@@ -129,6 +144,18 @@ class LocalCacheManager:
         """Сохраняет аналитику в кэш"""
         return self.set(key, value, self.prefixes['analytics'], ttl)
     
+    def clear_fighters(self) -> int:
+        """Очищает кэш бойцов"""
+        return self.delete_pattern('*', self.prefixes['fighters'])
+    
+    def clear_rankings(self) -> int:
+        """Очищает кэш рейтингов"""
+        return self.delete_pattern('*', self.prefixes['rankings'])
+    
+    def clear_events(self) -> int:
+        """Очищает кэш событий"""
+        return self.delete_pattern('*', self.prefixes['events'])
+    
     def get_stats(self) -> dict:
         """Получает статистику кэша"""
         try:
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Курсорная (keyset) пагинация списков API
+
+Страница выбирается условием "строки после последней строки предыдущей
+страницы" по колонкам сортировки, а не OFFSET, поэтому БД начинает
+чтение индекса сразу с нужного места и тысячная страница стоит столько
+же, сколько первая. Курсор - непрозрачная строка (base64 от значений
+колонок сортировки последней строки), его отдает заголовок X-Next-Cursor.
+Последняя колонка сортировки всегда id, чтобы порядок был однозначным.
+
+NULL сортируются так, как принято в БД (SQLite - в начале по возрастанию,
+PostgreSQL - в конце), и условие строится с учетом этого, чтобы
+подходили обычные индексы без NULLS FIRST/LAST. Условие разбито на части,
+каждая из которых - поиск по индексу (см. cursor_segments).
+
+Замер первой и тысячной страницы (OFFSET и курсор):
+    python -m backend.pagination --events 100000
+"""
+
+import argparse
+import base64
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, literal
+
+# Колонка сортировки и направление: (Model.column, по убыванию)
+SortKey = Tuple[object, bool]
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Курсор из значений колонок сортировки"""
+    payload = json.dumps(jsonable_encoder(list(values)), separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, keys: Sequence[SortKey]) -> list:
+    """Значения колонок сортировки из курсора. ValueError, если курсор поврежден"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Некорректный курсор: {e}")
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Курсор не подходит к этому списку")
+
+    # Даты в курсоре хранятся строками ISO
+    for i, (column, _) in enumerate(keys):
+        python_type = column.type.python_type
+        if values[i] is not None and python_type in (date, datetime):
+            values[i] = python_type.fromisoformat(values[i])
+    return values
+
+
+def _nulls_at_end(descending: bool, nulls_smallest: bool) -> bool:
+    return descending == nulls_smallest
+
+
+def cursor_segments(keys: Sequence[SortKey], values: Sequence, nulls_smallest: bool = True) -> list:
+    """
+    Условие "строка после курсора", разбитое на части в порядке сортировки.
+
+    Одно условие вида (a > x) OR (a = x AND id > y) БД не может использовать
+    для поиска по индексу и читает индекс с начала. Каждая часть здесь -
+    равенство по префиксу ключа и диапазон по следующей колонке (или IS NULL),
+    то есть поиск по индексу, а части идут в порядке сортировки: сначала
+    строки с тем же префиксом, затем дальше по первой колонке.
+    """
+    segments = []
+    for i in reversed(range(len(keys))):
+        prefix = [column.is_(None) if value is None else column == literal(value, column.type)
+                  for (column, _), value in zip(keys[:i], values[:i])]
+        column, descending = keys[i]
+        value = values[i]
+        nulls_at_end = _nulls_at_end(descending, nulls_smallest)
+
+        if value is None:
+            # После NULL в конце ничего нет, после NULL в начале - все значения
+            if not nulls_at_end:
+                segments.append(and_(*prefix, column.isnot(None)))
+            continue
+
+        # literal: значение может быть True/False, с ними SQLAlchemy не строит < и >
+        value = literal(value, column.type)
+        segments.append(and_(*prefix, column < value if descending else column > value))
+        if nulls_at_end:
+            segments.append(and_(*prefix, column.is_(None)))
+    return segments
+
+
+def order_by(keys: Sequence[SortKey]) -> list:
+    return [column.desc() if descending else column.asc() for column, descending in keys]
+
+
+def keyset_page(query, keys: Sequence[SortKey], limit: int, cursor: Optional[str] = None,
+                skip: int = 0) -> Tuple[list, Optional[str]]:
+    """
+    Страница запроса: (строки, курсор следующей страницы или None).
+
+    С курсором skip не используется. Без курсора страница выбирается
+    через OFFSET (для совместимости), но курсор следующей страницы
+    возвращается и в этом случае.
+    """
+    query = query.order_by(*order_by(keys))
+
+    # Лишняя строка показывает, есть ли следующая страница
+    if cursor:
+        dialect = query.session.get_bind().dialect.name
+        nulls_smallest = dialect not in ('postgresql', 'oracle')
+        rows = []
+        for condition in cursor_segments(keys, decode_cursor(cursor, keys), nulls_smallest):
+            rows += query.filter(condition).limit(limit + 1 - len(rows)).all()
+            if len(rows) > limit:
+                break
+    else:
+        rows = query.offset(skip).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column, _ in keys])
+
+
+def main():
+    """Замер первой и тысячной страницы событий: OFFSET и курсор"""
+    arg_parser = argparse.ArgumentParser(description="Замер курсорной пагинации")
+    arg_parser.add_argument('--events', type=int, default=100000, help="сколько событий создать")
+    arg_parser.add_argument('--limit', type=int, default=50, help="размер страницы")
+    arg_parser.add_argument('--repeat', type=int, default=20, help="сколько раз повторить запрос")
+    args = arg_parser.parse_args()
+
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+    from database.models import Base, Event
+    from database.migrations import upgrade_schema
+
+    path = os.path.join(tempfile.mkdtemp(prefix='ufc-pagination-'), 'bench.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    start = date(1993, 11, 12)
+    with engine.begin() as conn:
+        conn.execute(insert(Event), [
+            {'name': f"Event {i}", 'date': start + timedelta(days=i // 3)}
+            for i in range(args.events)
+        ])
+
+    db = sessionmaker(bind=engine)()
+    keys = [(Event.date, True), (Event.id, True)]
+    last_page = args.events // args.limit - 1
+
+    # Курсор последней страницы, полученный честным проходом по страницам
+    cursor = None
+    page_cursor = {0: None}
+    for page in range(1, last_page + 1):
+        _, cursor = keyset_page(db.query(Event), keys, args.limit, cursor)
+        page_cursor[page] = cursor
+
+    def measure(fn) -> float:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            fn()
+        return (time.perf_counter() - started) * 1000 / args.repeat
+
+    print(f"📄 {args.events} событий, страница {args.limit} строк")
+    for page in (0, 1, last_page // 2, last_page):
+        offset_ms = measure(lambda: keyset_page(db.query(Event), keys, args.limit, skip=page * args.limit))
+        cursor_ms = measure(lambda: keyset_page(db.query(Event), keys, args.limit, page_cursor[page]))
+        print(f"  страница {page + 1:>5}: OFFSET {offset_ms:7.2f} мс, курсор {cursor_ms:7.2f} мс")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
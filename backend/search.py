@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Индекс поиска бойцов для подсказок при вводе (typeahead)
+
+Имена на русском и английском и прозвища нормализуются (регистр, ё -> е,
+диакритика) и разбиваются на слова. Слова всех бойцов лежат в одном
+отсортированном массиве, поэтому слова с заданным префиксом занимают
+непрерывный диапазон, который находится двоичным поиском, а полные
+совпадения стоят в его начале. Оценки кандидатов считаются в NumPy
+без запросов к БД.
+
+Порядок результатов: полное совпадение слова, затем совпадение с началом
+имени или фамилии, затем с началом остальных слов; при равенстве выше
+бойцы из рейтингов и с большим числом побед. Каждое слово запроса должно
+совпасть с началом какого-то слова бойца.
+
+Индекс пересобирается, когда меняется таблица fighters (число строк,
+максимальный id или время последнего изменения).
+
+Замер на синтетическом ростере:
+    python -m backend.search --fighters 50000
+"""
+
+import argparse
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from database.config import SessionLocal
+from database.models import Fighter, Ranking
+
+# Поля бойца, отдаваемые в результатах поиска
+RESULT_FIELDS = ('id', 'name_ru', 'name_en', 'nickname', 'country', 'image_url', 'weight_class')
+
+# Классы совпадения слова запроса (меньше - лучше)
+EXACT, NAME_PREFIX, WORD_PREFIX = 0, 1, 2
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text: Optional[str]) -> str:
+    """Нижний регистр, ё -> е, без диакритики (José -> jose)"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text.lower().replace('ё', 'е'))
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+class FighterSearchIndex:
+    """Неизменяемый префиксный индекс слов имен бойцов (fighters - по убыванию заметности)"""
+
+    def __init__(self, version: tuple, fighters: List[Dict], cache_size: int = 4096):
+        self.version = version
+        self.built_at = time.time()
+        self.fighters = fighters
+
+        entries = []
+        for position, fighter in enumerate(fighters):
+            for field in ('name_ru', 'name_en', 'nickname'):
+                for index, word in enumerate(tokenize(fighter.get(field))):
+                    # Первые два слова имени - имя и фамилия, остальные и прозвище - слабее
+                    word_class = NAME_PREFIX if index < 2 and field != 'nickname' else WORD_PREFIX
+                    entries.append((word, word_class, position))
+        entries.sort()
+
+        self.words = [word for word, _, _ in entries]
+        self.word_class = np.array([word_class for _, word_class, _ in entries], dtype=np.int64)
+        self.fighter = np.array([position for _, _, position in entries], dtype=np.int64)
+
+        self.search = lru_cache(maxsize=cache_size)(self._search)
+
+    def __len__(self) -> int:
+        return len(self.fighters)
+
+    def _word_scores(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Бойцы, у которых есть слово с префиксом word, и лучший класс совпадения каждого"""
+        start = bisect.bisect_left(self.words, word)
+        stop = bisect.bisect_left(self.words, word + '\uffff', start)
+        if start == stop:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        exact_stop = bisect.bisect_right(self.words, word, start, stop)
+        classes = self.word_class[start:stop].copy()
+        classes[:exact_stop - start] = EXACT
+        fighters = self.fighter[start:stop]
+
+        # Лучший класс на бойца: сортируем по (боец, класс) и берем первое вхождение
+        order = np.lexsort((classes, fighters))
+        fighters = fighters[order]
+        first = np.ones(len(fighters), dtype=bool)
+        first[1:] = fighters[1:] != fighters[:-1]
+        return fighters[first], classes[order][first]
+
+    def _search(self, query: str, limit: int) -> Tuple[int, ...]:
+        """Позиции найденных бойцов по убыванию релевантности"""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return ()
+
+        fighters, score = self._word_scores(words[0])
+        for word in words[1:]:
+            if not len(fighters):
+                return ()
+            word_fighters, word_classes = self._word_scores(word)
+            fighters, own, other = np.intersect1d(fighters, word_fighters, assume_unique=True, return_indices=True)
+            score = score[own] + word_classes[other]
+
+        if not len(fighters):
+            return ()
+
+        # Бойцы упорядочены по заметности (см. FighterSearchStore.refresh): позиция решает при равной оценке
+        rank = score * len(self.fighters) + fighters
+        if limit < len(rank):
+            top = np.argpartition(rank, limit - 1)[:limit]
+        else:
+            top = np.arange(len(rank))
+        top = top[np.argsort(rank[top])]
+        return tuple(int(position) for position in fighters[top])
+
+    def query(self, text: str, limit: int = 10) -> List[Dict]:
+        """Найденные бойцы (словари с полями RESULT_FIELDS)"""
+        return [self.fighters[position] for position in self.search(' '.join(tokenize(text)), limit)]
+
+
+class FighterSearchStore:
+    """Индекс поиска с проверкой изменений fighters не чаще check_interval секунд"""
+
+    def __init__(self, check_interval: float = 30.0):
+        self.check_interval = check_interval
+        self._index: Optional[FighterSearchIndex] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> FighterSearchIndex:
+        """Пересобирает индекс, если таблица fighters изменилась"""
+        with self._lock:
+            db = SessionLocal()
+            try:
+                version = tuple(db.query(
+                    func.count(Fighter.id), func.max(Fighter.id), func.max(Fighter.updated_at)
+                ).one())
+                index = self._index
+                if force or index is None or index.version != version:
+                    ranked = {fighter_id for (fighter_id,) in db.query(Ranking.fighter_id).distinct()}
+                    rows = db.query(
+                        *[getattr(Fighter, field) for field in RESULT_FIELDS], Fighter.wins, Fighter.ufc_wins
+                    ).all()
+                    # Бойцы из рейтингов и с большим числом побед - выше при равных совпадениях
+                    rows.sort(key=lambda row: (row.id not in ranked, -(row.ufc_wins or 0), -(row.wins or 0), row.id))
+                    fighters = [{field: getattr(row, field) for field in RESULT_FIELDS} for row in rows]
+
+                    index = FighterSearchIndex(version, fighters)
+                    # Атомарная замена индекса
+                    self._index = index
+                    print(f"🔎 Поиск: проиндексировано {len(index)} бойцов ({len(index.words)} слов)")
+            finally:
+                db.close()
+
+            self._checked_at = time.monotonic()
+            return index
+
+    def get(self) -> FighterSearchIndex:
+        """Возвращает актуальный индекс"""
+        index = self._index
+        if index is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return index
+        return self.refresh()
+
+    def search(self, text: str, limit: int = 10) -> List[Dict]:
+        return self.get().query(text, limit)
+
+    def get_status(self) -> dict:
+        """Состояние индекса"""
+        index = self._index
+        if index is None:
+            return {'loaded': False}
+
+        return {
+            'loaded': True,
+            'fighters': len(index),
+            'words': len(index.words),
+            'built_at': index.built_at,
+            'cache': index.search.cache_info()._asdict()
+        }
+
+
+# Глобальный экземпляр индекса
+fighter_search = FighterSearchStore()
+
+
+def _synthetic_roster(size: int, seed: int = 0) -> List[Dict]:
+    """Синтетические бойцы: случайные сочетания имен и фамилий"""
+    rng = np.random.default_rng(seed)
+    syllables_ru = ['ма', 'ка', 'ха', 'би', 'гре', 'нур', 'ко', 'нор', 'ёв', 'ан', 'дер', 'сон', 'ли', 'ра', 'тов', 'шев']
+    syllables_en = ['ma', 'ka', 'ha', 'bi', 'gre', 'nur', 'co', 'nor', 'yov', 'an', 'der', 'son', 'li', 'ra', 'tov', 'shev']
+
+    def word(syllables, lengths):
+        return ''.join(syllables[i] for i in lengths).capitalize()
+
+    fighters = []
+    for fighter_id in range(1, size + 1):
+        parts = [rng.integers(0, len(syllables_ru), rng.integers(2, 5)) for _ in range(2)]
+        fighters.append({
+            'id': fighter_id,
+            'name_ru': ' '.join(word(syllables_ru, part) for part in parts),
+            'name_en': ' '.join(word(syllables_en, part) for part in parts),
+            'nickname': word(syllables_en, rng.integers(0, len(syllables_en), 3)) if fighter_id % 3 == 0 else None,
+            'country': None,
+            'image_url': None,
+            'weight_class': None
+        })
+    return fighters
+
+
+def main():
+    """Замер скорости поиска на синтетическом ростере"""
+    arg_parser = argparse.ArgumentParser(description="Замер поиска бойцов")
+    arg_parser.add_argument('--fighters', type=int, default=50000, help="размер синтетического ростера")
+    arg_parser.add_argument('--queries', type=int, default=5000, help="число запросов")
+    args = arg_parser.parse_args()
+
+    fighters = _synthetic_roster(args.fighters)
+    started = time.perf_counter()
+    index = FighterSearchIndex(('synthetic',), fighters, cache_size=0)
+    print(f"🔎 Индекс: {len(index)} бойцов, {len(index.words)} слов за {time.perf_counter() - started:.2f} с")
+
+    # Запросы - префиксы имен длиной 2-8 символов, иногда с началом второго слова
+    rng = np.random.default_rng(1)
+    queries = []
+    for _ in range(args.queries):
+        fighter = fighters[rng.integers(0, len(fighters))]
+        name = fighter['name_ru'] if rng.random() < 0.5 else fighter['name_en']
+        first, last = name.split(' ')
+        query = first[:rng.integers(2, 9)]
+        if rng.random() < 0.3:
+            query += ' ' + last[:rng.integers(1, 4)]
+        queries.append(query)
+
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.query(query)
+        timings.append(time.perf_counter() - started)
+
+    timings = np.array(timings) * 1000
+    print(f"⏱️ {len(queries)} запросов без кэша: p50 {np.percentile(timings, 50):.3f} мс, "
+          f"p90 {np.percentile(timings, 90):.3f} мс, p99 {np.percentile(timings, 99):.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Быстрая сериализация ответов API в JSON
+
+Списки собираются из строк SQLAlchemy прямо в словари и сериализуются
+в байты одним вызовом, без создания pydantic-модели на каждую строку
+и повторной проверки через response_model. Обработчик возвращает готовый
+Response; response_model остается в декораторе для схемы OpenAPI,
+а совпадение ответа со схемой проверяет `python -m backend.serialization`.
+
+orjson используется, если установлен (pip install orjson), иначе -
+стандартный json.
+
+Замер на синтетических рейтингах:
+    python -m backend.serialization --rows 5000
+"""
+
+import argparse
+import json
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    """Типы, которые стандартный json не сериализует (как их пишет orjson)"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(value: Any) -> bytes:
+    """JSON в байтах (UTF-8, без пробелов)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def json_response(value: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Готовый JSON-ответ без проверки через response_model"""
+    return Response(content=dumps(value), media_type="application/json", headers=headers)
+
+
+def main():
+    """Замер сборки ответа /api/rankings: pydantic и быстрый путь, с проверкой схемы"""
+    arg_parser = argparse.ArgumentParser(description="Замер сериализации рейтингов")
+    arg_parser.add_argument('--rows', type=int, default=5000, help="сколько строк рейтинга")
+    arg_parser.add_argument('--repeat', type=int, default=5, help="сколько раз повторить сборку")
+    args = arg_parser.parse_args()
+
+    from typing import List
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from backend.app import RankingResponse, FighterResponse, _ranking_json
+
+    # Строки в том виде, в каком их возвращает запрос рейтингов
+    rows = [
+        (i, 10_000 + i, f"Категория {i % 12}", i % 16, i % 16 == 0, (i % 5) - 2,
+         f"Боец {i}", f"Fighter {i}", None if i % 3 else "Nick", "Россия", 30, 180, 185, 77,
+         20, 3, 0, 0, 10, 2, 0, 0, None)
+        for i in range(args.rows)
+    ]
+
+    def slow() -> bytes:
+        rankings = [RankingResponse(
+            id=row[0],
+            fighter=FighterResponse(
+                id=row[1], name=row[6] or row[7] or "Боец", name_ru=row[6] or "", name_en=row[7] or "",
+                nickname=row[8] or "", country=row[9] or "", age=row[10], height=row[11], reach=row[12],
+                weight=row[13], weight_class_id=None, wins=row[14] or 0, losses=row[15] or 0,
+                draws=row[16] or 0, career=None
+            ),
+            weight_class=row[2], rank_position=row[3], is_champion=row[4], rank_change=row[5] or 0
+        ) for row in rows]
+        return json.dumps(jsonable_encoder(rankings), ensure_ascii=False).encode("utf-8")
+
+    def fast() -> bytes:
+        return dumps([_ranking_json(row) for row in rows])
+
+    # Схема: быстрый ответ проходит проверку моделью и совпадает с ответом через pydantic
+    adapter = TypeAdapter(List[RankingResponse])
+    validated = adapter.validate_json(fast())
+    assert jsonable_encoder(validated) == json.loads(slow()), "быстрый ответ отличается от ответа через pydantic"
+    print(f"✅ Схема: {len(validated)} строк соответствуют RankingResponse, ответ совпадает")
+
+    timings = {}
+    for name, build in (('pydantic', slow), ('быстрый путь', fast)):
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            build()
+        timings[name] = (time.perf_counter() - started) / (args.repeat * len(rows)) * 1e6
+        print(f"⏱️ {name:<14} {timings[name]:6.2f} мкс на строку")
+
+    print(f"🚀 Ускорение: {timings['pydantic'] / timings['быстрый путь']:.1f}x "
+          f"({'orjson' if ORJSON_AVAILABLE else 'json'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Версионированные снапшоты ответов API, хранящиеся в памяти
+"""
+
+import hashlib
+import threading
+import time
+from typing import Callable, Optional
+
+from database.config import SessionLocal
+from database.versions import get_data_version
+
+
+class Snapshot:
+    """Готовый к отдаче ответ: сериализованное тело и его ETag"""
+    
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = f'"{version}-{hashlib.sha1(body).hexdigest()[:16]}"'
+        self.built_at = time.time()
+    
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Проверяет заголовок If-None-Match на совпадение с ETag снапшота"""
+        if not if_none_match:
+            return False
+        
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == '*' or tag == self.etag:
+                return True
+        
+        return False
+
+
+class VersionedSnapshot:
+    """
+    Снапшот набора данных, который пересобирается только при смене его версии.
+    
+    Версию увеличивают парсеры (database.versions.bump_data_version) в той же
+    транзакции, что и сами данные. Проверка версии в БД выполняется не чаще
+    одного раза в check_interval секунд, поэтому в остальное время ответ
+    (в том числе 304 по ETag) отдается без обращения к БД.
+    """
+    
+    def __init__(self, name: str, builder: Callable, check_interval: float = 5.0):
+        self.name = name
+        self.builder = builder  # builder(db) -> bytes
+        self.check_interval = check_interval
+        self._snapshot: Optional[Snapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self) -> Snapshot:
+        """Возвращает актуальный снапшот, при необходимости пересобирая его"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+        
+        with self._lock:
+            # Другой поток мог уже обновить снапшот, пока мы ждали блокировку
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return snapshot
+            
+            db = SessionLocal()
+            try:
+                version = get_data_version(db, self.name)
+                if snapshot is None or snapshot.version != version:
+                    snapshot = Snapshot(version, self.builder(db))
+                    # Атомарная замена: читатели видят либо старый, либо новый снапшот целиком
+                    self._snapshot = snapshot
+            finally:
+                db.close()
+            
+            self._checked_at = time.monotonic()
+            return snapshot
+    
+    def invalidate(self) -> None:
+        """Заставляет проверить версию и пересобрать снапшот при следующем запросе"""
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
@@ -3,40 +3,143 @@
 Конфигурация базы данных
 """
 
+import asyncio
 import os
+import weakref
+from typing import Callable, Optional
+
+from anyio import CapacityLimiter, to_thread
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from .models import Base
+from .migrations import upgrade_schema
 
 # Настройки БД
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ufc_ranker_v2.db")
 
+# Размер пула соединений. API выполняет запросы в пуле потоков того же размера
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_MAX_CONNECTIONS = DB_POOL_SIZE + DB_MAX_OVERFLOW
+
 # Создаем движок БД
 engine = create_engine(
     DATABASE_URL,
     echo=False,  # Установите True для отладки SQL запросов
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,  # Проверка соединений перед использованием
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный драйвер для схемы DATABASE_URL (необязательно: aiosqlite, asyncpg)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# '1' - асинхронный движок, если установлен драйвер; по умолчанию - пул потоков
+DB_ASYNC = os.getenv("DB_ASYNC", "0")
+
+
+def async_database_url(url: str) -> Optional[str]:
+    """URL для асинхронного драйвера или None, если для схемы его нет"""
+    scheme, _, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    return f"{driver}://{rest}" if driver and rest else None
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC == "1" and async_database_url(DATABASE_URL):
+    try:
+        # greenlet нужен SQLAlchemy для AsyncSession.run_sync
+        import greenlet  # noqa: F401
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        # Пул aiosqlite SQLAlchemy выбирает сам (в старых версиях - без размера)
+        pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+        }
+        async_engine = create_async_engine(async_database_url(DATABASE_URL), pool_pre_ping=True, **pool_options)
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    except ImportError:
+        # Драйвер не установлен - запросы выполняются в пуле потоков
+        async_engine = None
+        AsyncSessionLocal = None
+
 
 def create_tables():
     """Создает все таблицы в БД"""
     Base.metadata.create_all(bind=engine)
 
 
-def get_db():
-    """Получает сессию БД"""
+# Сессий API, одновременно держащих соединение, не больше, чем соединений в пуле.
+# Сессия запроса занимает соединение с первого запроса к БД до закрытия после
+# отправки ответа, а сериализация ответа ждет поток того же пула потоков, что
+# и обработчики. Без ограничения под нагрузкой все соединения оказываются у
+# запросов, ожидающих потока, а все потоки - у обработчиков, ожидающих
+# соединения. Слот ожидается в event loop и потока не занимает.
+# Семафор привязывается к event loop, поэтому создается для каждого цикла
+# (перезапуск uvicorn --reload, новый цикл TestClient)
+_loop_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+# Закрытие сессии не ждет потоков, занятых обработчиками
+_close_limiter = CapacityLimiter(DB_MAX_CONNECTIONS)
+
+
+def _session_slots() -> asyncio.Semaphore:
+    """Семафор слотов сессий для текущего event loop"""
+    loop = asyncio.get_running_loop()
+    slots = _loop_slots.get(loop)
+    if slots is None:
+        slots = _loop_slots[loop] = asyncio.Semaphore(DB_MAX_CONNECTIONS)
+    return slots
+
+
+async def get_db():
+    """Получает сессию БД (зависимость FastAPI)"""
+    async with _session_slots():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await to_thread.run_sync(db.close, limiter=_close_limiter)
+
+
+def _run_in_session(builder: Callable):
+    """Выполняет builder(db) в отдельной синхронной сессии"""
     db = SessionLocal()
     try:
-        yield db
+        return builder(db)
     finally:
         db.close()
 
 
+async def run_db(builder: Callable):
+    """
+    Выполняет builder(db) из async-обработчика, не блокируя event loop.
+
+    С асинхронным движком builder получает синхронную Session поверх
+    асинхронного соединения (AsyncSession.run_sync) и поток не занимает;
+    без него builder выполняется в пуле потоков в своей сессии.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(builder)
+    async with _session_slots():
+        return await to_thread.run_sync(_run_in_session, builder)
+
+
 def init_database():
     """Инициализирует базу данных"""
     create_tables()
+    upgrade_schema(engine)
     print("База данных инициализирована")
@@ -7,6 +7,7 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from database.models import Base
+from database.migrations import upgrade_schema
 
 # Настройки для локальной разработки
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./ufc_ranker.db')
@@ -30,6 +31,7 @@ def init_database():
     try:
         # Создаем все таблицы
         Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
         print("✅ База данных инициализирована")
         
         # Создаем индексы для оптимизации
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Миграции схемы БД и фоновые задачи заполнения данных
+
+upgrade_schema вызывается при инициализации БД (init_database) и меняет
+только схему. Связи боев старых строк заполняются разово (импортер
+записывает их сам):
+    python -m database.migrations
+"""
+
+import sys
+import os
+from sqlalchemy import inspect, text
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Колонки, добавленные в существующие таблицы после их создания
+ADDED_COLUMNS = {
+    'fights': {
+        'event_id': 'INTEGER REFERENCES events(id)',
+        'fighter1_id': 'INTEGER REFERENCES fighters(id)',
+        'fighter2_id': 'INTEGER REFERENCES fighters(id)',
+    }
+}
+
+# Индексы для целочисленных связей боев и для сопоставления имен при backfill
+INDEXES = {
+    'idx_fights_fighter1_date': 'fights(fighter1_id, fight_date)',
+    'idx_fights_fighter2_date': 'fights(fighter2_id, fight_date)',
+    'idx_fighters_name_en': 'fighters(name_en)',
+    'idx_fighters_name_ru': 'fighters(name_ru)',
+    'idx_events_name': 'events(name)',
+    # Порядок курсорной пагинации списков (backend/pagination.py)
+    'idx_events_date_id': 'events(date, id)',
+    'idx_fights_listing': 'fights(card_type DESC, fight_order, is_main_event DESC, is_title_fight DESC, fight_date DESC, id)',
+    # Тот же порядок внутри события (карта события: фильтр по event_id)
+    'idx_fights_event_listing': 'fights(event_id, card_type DESC, fight_order, is_main_event DESC, is_title_fight DESC, fight_date DESC, id)',
+}
+
+# Индексы, которые перекрыты более полными: без статистики (ANALYZE) SQLite
+# выбирает самый короткий подходящий индекс и сортирует результат в памяти
+DROPPED_INDEXES = [
+    'idx_fights_event_id',  # Перекрыт idx_fights_event_listing
+]
+
+
+def upgrade_schema(engine) -> None:
+    """Добавляет недостающие колонки и индексы (идемпотентно)"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    with engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in existing_tables:
+                continue
+            
+            existing_columns = {column['name'] for column in inspector.get_columns(table)}
+            for column, ddl in columns.items():
+                if column not in existing_columns:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    print(f"✅ Добавлена колонка {table}.{column}")
+        
+        for index_name, target in INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {target}"))
+        
+        for index_name in DROPPED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+
+def backfill_fight_references(db) -> dict:
+    """
+    Заполняет fights.fighter1_id/fighter2_id/event_id по именам.
+    
+    Каждое поле заполняется одним UPDATE с коррелированным подзапросом по
+    индексированным колонкам имен. Как и раньше при поиске по имени, при
+    совпадении у нескольких бойцов берется боец с меньшим id.
+    Обрабатываются только еще не заполненные строки, для которых нашлось
+    совпадение, поэтому повторный запуск безопасен. db - сессия или
+    соединение; коммит остается за вызывающим.
+    """
+    updated = {}
+    
+    for side in ('fighter1', 'fighter2'):
+        result = db.execute(text(f"""
+            UPDATE fights
+            SET {side}_id = (
+                SELECT MIN(f.id) FROM fighters f
+                WHERE f.name_en = fights.{side}_name OR f.name_ru = fights.{side}_name
+            )
+            WHERE {side}_id IS NULL AND EXISTS (
+                SELECT 1 FROM fighters f
+                WHERE f.name_en = fights.{side}_name OR f.name_ru = fights.{side}_name
+            )
+        """))
+        updated[f'{side}_id'] = result.rowcount
+    
+    result = db.execute(text("""
+        UPDATE fights
+        SET event_id = (
+            SELECT MIN(e.id) FROM events e
+            WHERE e.name = fights.event_name
+        )
+        WHERE event_id IS NULL AND EXISTS (
+            SELECT 1 FROM events e WHERE e.name = fights.event_name
+        )
+    """))
+    updated['event_id'] = result.rowcount
+    
+    return updated
+
+
+def main():
+    """Обновляет схему и выполняет backfill связей боев"""
+    from database.config import engine, SessionLocal
+    
+    upgrade_schema(engine)
+    
+    db = SessionLocal()
+    try:
+        updated = backfill_fight_references(db)
+        db.commit()
+        print(f"✅ Связи боев заполнены: {updated}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Ошибка при заполнении связей боев: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 SQLAlchemy модели для UFC базы данных
 """
 
-from sqlalchemy import Column, Integer, String, Date, Boolean, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Date, Boolean, Float, ForeignKey, DateTime, Text, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -74,6 +74,11 @@ class Fighter(Base):
     upcoming_fights_fighter1 = relationship("UpcomingFight", foreign_keys="UpcomingFight.fighter1_id", back_populates="fighter1")
     upcoming_fights_fighter2 = relationship("UpcomingFight", foreign_keys="UpcomingFight.fighter2_id", back_populates="fighter2")
 
+    @property
+    def name(self):
+        """Основное имя для отображения (поле name в ответах API)"""
+        return self.name_ru or self.name_en or "Unknown Fighter"
+
 
 class Ranking(Base):
     """Рейтинги бойцов по весовым категориям"""
@@ -92,6 +97,31 @@ class Ranking(Base):
     fighter = relationship("Fighter")  # Убрано back_populates из-за проблем с БД
 
 
+class RankingStaging(Base):
+    """Промежуточная таблица обновления рейтингов (строки живут только внутри транзакции)"""
+    __tablename__ = "rankings_staging"
+    
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String(32), nullable=False, index=True)  # Обновление, загрузившее строку
+    weight_class = Column(String(50), nullable=False)
+    fighter_id = Column(Integer, nullable=False)
+    rank_position = Column(Integer)
+    is_champion = Column(Boolean, default=False)
+
+
+class RankingHistory(Base):
+    """История рейтингов: снимок позиций на каждую дату обновления (только добавление)"""
+    __tablename__ = "rankings_history"
+    
+    # Первичный ключ (weight_class, snapshot_date, ...) служит индексом для запросов на дату
+    weight_class = Column(String(50), primary_key=True)
+    snapshot_date = Column(Date, primary_key=True)
+    fighter_id = Column(Integer, ForeignKey('fighters.id'), primary_key=True)
+    rank_position = Column(Integer)
+    is_champion = Column(Boolean, default=False)
+    rank_change = Column(Integer, default=0)  # изменение относительно предыдущего снимка категории
+
+
 class FightRecord(Base):
     """Боевые рекорды бойцов"""
     __tablename__ = "fight_records"
@@ -166,6 +196,9 @@ class Fight(Base):
     __tablename__ = "fights"
     
     id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey('events.id'))  # Событие (заполняется по event_name)
+    fighter1_id = Column(Integer, ForeignKey('fighters.id'))  # Первый боец (заполняется по fighter1_name)
+    fighter2_id = Column(Integer, ForeignKey('fighters.id'))  # Второй боец (заполняется по fighter2_name)
     event_name = Column(String(200))  # Название события
     fighter1_name = Column(String(100))  # Имя первого бойца
     fighter2_name = Column(String(100))  # Имя второго бойца
@@ -197,6 +230,16 @@ class Fight(Base):
     
     # Связи
     fight_stats = relationship("FightStats", back_populates="fight")
+    
+    __table_args__ = (
+        # Карта события в порядке списка боев (backend/app.py FIGHT_KEYS): поиск по
+        # event_id и курсору без сортировки; заменяет индекс по одному event_id
+        Index('idx_fights_event_listing', event_id, card_type.desc(), fight_order, is_main_event.desc(),
+              is_title_fight.desc(), fight_date.desc(), id),
+        # История боев бойца - диапазонный скан по (fighterN_id, fight_date)
+        Index('idx_fights_fighter1_date', 'fighter1_id', 'fight_date'),
+        Index('idx_fights_fighter2_date', 'fighter2_id', 'fight_date'),
+    )
 
 
 class FightStats(Base):
@@ -269,3 +312,52 @@ class FightStats(Base):
         if self.takedown_attempted == 0:
             return 0.0
         return round((self.takedown_successful / self.takedown_attempted) * 100, 2)
+
+
+class DataVersion(Base):
+    """Версии наборов данных (увеличиваются парсерами при каждом коммите)"""
+    __tablename__ = "data_versions"
+    
+    name = Column(String(50), primary_key=True)  # Название набора данных ('rankings', ...)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ScheduledJob(Base):
+    """Состояние задач планировщика обновлений (parsers/scheduler.py)"""
+    __tablename__ = "scheduled_jobs"
+    
+    name = Column(String(50), primary_key=True)  # Название задачи ('rankings', 'upcoming_cards', ...)
+    next_run_at = Column(DateTime)               # Когда задача должна запуститься
+    running_until = Column(DateTime)             # Аренда выполняющейся задачи (защита от наложения)
+    last_started_at = Column(DateTime)
+    last_finished_at = Column(DateTime)
+    last_status = Column(String(20))             # 'ok' или 'error'
+    last_error = Column(Text)
+    last_duration = Column(Float)                # Длительность последнего запуска, с
+    runs = Column(Integer, default=0)
+    failures = Column(Integer, default=0)
+
+
+class BackgroundJob(Base):
+    """Фоновые задачи, запущенные через API (backend/jobs.py)"""
+    __tablename__ = "background_jobs"
+    
+    id = Column(String(32), primary_key=True)      # uuid4().hex
+    kind = Column(String(50), nullable=False)      # Тип задачи ('ufc_stats', ...)
+    status = Column(String(20), nullable=False)    # 'queued', 'running', 'done' или 'error'
+    stage = Column(String(50))                     # Текущий этап выполнения
+    progress = Column(Float, default=0.0)          # Доля выполненной работы, 0..1
+    rows_processed = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)                # Обновляется работающим процессом
+    
+    __table_args__ = (
+        # Не больше одной незавершенной задачи каждого типа (защита от двойного запуска)
+        Index('idx_background_jobs_active_kind', 'kind', unique=True,
+              sqlite_where=text("status IN ('queued', 'running')"),
+              postgresql_where=text("status IN ('queued', 'running')")),
+    )
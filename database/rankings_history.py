@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+История рейтингов: снимки позиций по датам и вычисление rank_change
+
+Каждое сохранение рейтингов копирует рейтинги категорий в снимок на дату
+обновления (повторное сохранение в тот же день заменяет снимок этого
+дня). Изменение позиции считается двумя UPDATE на стороне БД: сначала
+в снимке - по предыдущему снимку той же категории, затем копируется
+в таблицу rankings.
+Положительное значение - подъем (позиция 5 -> 3 дает +2), для новичков 0.
+"""
+
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import Date, and_, delete, func, insert, literal, select, update
+
+from .models import Ranking, RankingHistory
+
+history = RankingHistory.__table__
+
+
+def save_rankings_snapshot(db, snapshot_date: date, weight_classes: Iterable[str]) -> None:
+    """
+    Записывает текущие рейтинги категорий как снимок на дату и пересчитывает rank_change.
+
+    Снимок копируется из таблицы rankings одним INSERT ... SELECT.
+    Коммит делает вызывающий код.
+    """
+    weight_classes = list(weight_classes)
+    if not weight_classes:
+        return
+
+    rankings = Ranking.__table__
+    db.execute(delete(history).where(
+        history.c.snapshot_date == snapshot_date,
+        history.c.weight_class.in_(weight_classes)
+    ))
+    db.execute(insert(history).from_select(
+        ['weight_class', 'snapshot_date', 'fighter_id', 'rank_position', 'is_champion', 'rank_change'],
+        select(
+            rankings.c.weight_class,
+            literal(snapshot_date, Date),
+            rankings.c.fighter_id,
+            rankings.c.rank_position,
+            rankings.c.is_champion,
+            literal(0)
+        ).where(rankings.c.weight_class.in_(weight_classes))
+    ))
+
+    compute_rank_changes(db, snapshot_date, weight_classes)
+
+
+def compute_rank_changes(db, snapshot_date: date, weight_classes: Iterable[str]) -> None:
+    """Считает rank_change снимка на дату относительно предыдущего снимка категорий"""
+    weight_classes = list(weight_classes)
+    previous = history.alias('previous')
+    dates = history.alias('dates')
+
+    previous_date = select(func.max(dates.c.snapshot_date)).where(
+        dates.c.weight_class == history.c.weight_class,
+        dates.c.snapshot_date < snapshot_date
+    ).scalar_subquery()
+    previous_position = select(previous.c.rank_position).where(
+        previous.c.weight_class == history.c.weight_class,
+        previous.c.fighter_id == history.c.fighter_id,
+        previous.c.snapshot_date == previous_date
+    ).scalar_subquery()
+
+    db.execute(
+        update(history).where(
+            history.c.snapshot_date == snapshot_date,
+            history.c.weight_class.in_(weight_classes)
+        ).values(rank_change=func.coalesce(previous_position - history.c.rank_position, 0))
+    )
+
+    rankings = Ranking.__table__
+    current_change = select(history.c.rank_change).where(and_(
+        history.c.snapshot_date == snapshot_date,
+        history.c.weight_class == rankings.c.weight_class,
+        history.c.fighter_id == rankings.c.fighter_id
+    )).scalar_subquery()
+
+    db.execute(
+        update(rankings).where(
+            rankings.c.weight_class.in_(weight_classes)
+        ).values(rank_change=func.coalesce(current_change, 0))
+    )
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Идемпотентная загрузка строк по естественному ключу
+"""
+
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Сколько значений первой колонки ключа передается в один IN (...)
+KEY_CHUNK_SIZE = 500
+
+
+def clean_value(value):
+    """Приводит значение из DataFrame к типу Python (NaN -> None, numpy -> int/float/bool)"""
+    if value is None:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _load_existing(db, selected: list, model, key_columns: Sequence[str], first_values) -> Dict[tuple, tuple]:
+    """Существующие строки с теми же значениями первой колонки ключа (ключ -> строка)"""
+    existing = {}
+    first_values = list(first_values)
+    key_size = len(key_columns)
+    for start in range(0, len(first_values), KEY_CHUNK_SIZE):
+        chunk = first_values[start:start + KEY_CHUNK_SIZE]
+        # При дублях ключа последней записывается строка с меньшим id
+        records = db.query(*selected).filter(getattr(model, key_columns[0]).in_(chunk)).order_by(model.id.desc())
+        for record in records:
+            existing[tuple(record[1:1 + key_size])] = record
+    return existing
+
+
+def lookup_ids(db, model, keys: List[tuple], key_columns: Sequence[str]) -> Dict[tuple, int]:
+    """Находит id уже загруженных строк по естественному ключу"""
+    if not keys:
+        return {}
+
+    selected = [model.id] + [getattr(model, column) for column in key_columns]
+    existing = _load_existing(db, selected, model, key_columns, {key[0] for key in keys})
+    return {key: existing[key][0] for key in keys if key in existing}
+
+
+def upsert_rows(db, model, rows: List[dict], key_columns: Sequence[str],
+                insert_only: Sequence[str] = (),
+                insert: Optional[Callable[[List[dict]], None]] = None) -> Tuple[Dict[str, int], Dict[tuple, int]]:
+    """
+    Вставляет новые строки и обновляет измененные, не трогая совпадающие.
+
+    Существующие строки читаются по естественному ключу (key_columns) и
+    сравниваются со входными по значениям. Колонки из insert_only
+    заполняются только при вставке. При дублях ключа в таблице
+    используется строка с меньшим id, дубли во входных данных пропускаются.
+    insert - своя вставка новых строк (например, COPY); id таких строк
+    в словарь не попадают.
+
+    Возвращает счетчики inserted/updated/unchanged и словарь ключ -> id.
+    """
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    ids: Dict[tuple, int] = {}
+    if not rows:
+        return counts, ids
+
+    value_columns = sorted({column for row in rows for column in row} - set(key_columns) - set(insert_only))
+    selected = [model.id] + [getattr(model, column) for column in list(key_columns) + value_columns]
+    key_size = len(key_columns)
+
+    existing = _load_existing(db, selected, model, key_columns, {row[key_columns[0]] for row in rows})
+
+    inserts, insert_keys, updates = [], [], []
+    seen = set()
+    for row in rows:
+        key = tuple(row[column] for column in key_columns)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        record = existing.get(key)
+        if record is None:
+            inserts.append(dict(row))
+            insert_keys.append(key)
+            continue
+
+        ids[key] = record[0]
+        stored = dict(zip(value_columns, record[1 + key_size:]))
+        changed = {column: row[column] for column in value_columns
+                   if column in row and row[column] != stored[column]}
+        if changed:
+            changed['id'] = record[0]
+            updates.append(changed)
+        else:
+            counts['unchanged'] += 1
+
+    if inserts and insert is not None:
+        insert(inserts)
+    elif inserts:
+        # return_defaults заполняет id новых строк
+        db.bulk_insert_mappings(model, inserts, return_defaults=True)
+        ids.update((key, mapping['id']) for key, mapping in zip(insert_keys, inserts))
+    if updates:
+        db.bulk_update_mappings(model, updates)
+
+    counts['inserted'] = len(inserts)
+    counts['updated'] = len(updates)
+    return counts, ids
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Версионирование наборов данных для инвалидации снапшотов и кэшей
+
+Парсеры после коммита вызывают invalidate: он увеличивает поколения
+'cache:<набор>', а процессы API при сверке поколений сбрасывают эти
+наборы из своего LRU, Redis и файлового кэша (backend/cache_manager.py).
+Слою парсеров для этого не нужен ни FastAPI, ни клиент Redis.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .config import SessionLocal
+from .models import DataVersion
+
+# Префикс версий поколений кэша в data_versions ('cache:fighters', ...)
+GENERATION_PREFIX = 'cache:'
+
+# INSERT ... ON CONFLICT по диалектам БД
+UPSERT_INSERTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert,
+}
+
+
+def get_data_version(db, name: str) -> int:
+    """Возвращает текущую версию набора данных (0, если версия еще не создавалась)"""
+    version = db.query(DataVersion.version).filter(DataVersion.name == name).scalar()
+    return version or 0
+
+
+def bump_data_version(db, name: str) -> None:
+    """
+    Увеличивает версию набора данных в рамках текущей транзакции.
+    
+    Одна команда INSERT ... ON CONFLICT DO UPDATE: два параллельных первых
+    увеличения (планировщик и воркер задач) не вставляют строку дважды.
+    """
+    now = datetime.utcnow()
+    insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(DataVersion).values(name=name, version=1, updated_at=now)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[DataVersion.name],
+            set_={'version': DataVersion.version + 1, 'updated_at': now}
+        ))
+        return
+    
+    updated = db.query(DataVersion).filter(DataVersion.name == name).update(
+        {
+            DataVersion.version: DataVersion.version + 1,
+            DataVersion.updated_at: now
+        },
+        synchronize_session=False
+    )
+    
+    if not updated:
+        db.add(DataVersion(name=name, version=1))
+
+
+def get_generations(db) -> dict:
+    """Поколения кэша всех наборов данных одним запросом (набор -> версия)"""
+    rows = db.query(DataVersion.name, DataVersion.version).filter(
+        DataVersion.name.like(f"{GENERATION_PREFIX}%")
+    ).all()
+    return {name[len(GENERATION_PREFIX):]: version for name, version in rows}
+
+
+def invalidate(*names: str) -> None:
+    """Сбрасывает кэш наборов данных (вызывается парсерами после коммита)"""
+    db = SessionLocal()
+    try:
+        for name in sorted(set(names)):
+            bump_data_version(db, f"{GENERATION_PREFIX}{name}")
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Не удалось обновить поколения кэша {', '.join(names)}: {e}")
+    finally:
+        db.close()
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react'
 import { useParams, Link } from 'react-router-dom'
 import Layout from '../components/Layout'
-import { api } from '../services/api'
+import { api, BatchError, BatchItem } from '../services/api'
 import { Event, Fight } from '../types'
 
 const EventPage: React.FC = () => {
@@ -22,32 +22,25 @@ const EventPage: React.FC = () => {
       setLoading(true)
       setError(null)
 
-      // Сначала пытаемся найти событие по ID (если это число)
-      let eventData: Event | null = null
-      
-      if (!isNaN(Number(eventIdentifier))) {
-        // Если это число, ищем по ID
-        eventData = await api.getEvent(Number(eventIdentifier))
-      } else {
-        // Если это строка, ищем по названию
-        const events = await api.getEvents({ limit: 100 })
-        eventData = events.find(e => 
-          e.name.toLowerCase().replace(/\s+/g, '_').replace(/[^\w\-_]/g, '') === eventIdentifier.toLowerCase()
-        ) || null
-      }
+      // Событие (по id или по адресу страницы) и его бои одним запросом
+      const requests: Record<string, BatchItem> = !isNaN(Number(eventIdentifier))
+        ? {
+            event: { resource: 'event', params: { event_id: Number(eventIdentifier) } },
+            fights: { resource: 'fights', params: { event_id: Number(eventIdentifier) } }
+          }
+        : {
+            event: { resource: 'event_by_slug', params: { slug: eventIdentifier } },
+            fights: { resource: 'fights', params: { event_slug: eventIdentifier } }
+          }
+      const data = await api.batch(requests)
+      setEvent(data.event)
+      setFights(data.fights)
 
-      if (!eventData) {
+    } catch (error) {
+      if (error instanceof BatchError && error.status === 404) {
         setError('Событие не найдено')
         return
       }
-
-      setEvent(eventData)
-
-      // Загружаем бои для этого события
-      const fightsData = await api.getFights({ event_id: eventData.id })
-      setFights(fightsData)
-
-    } catch (error) {
       console.error('Ошибка загрузки события:', error)
       setError('Ошибка загрузки данных события')
     } finally {
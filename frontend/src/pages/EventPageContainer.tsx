@@ -23,14 +23,14 @@ const EventPageContainer: React.FC = () => {
       setLoading(true)
       setError(null)
       
-      // Загружаем данные события и боев параллельно
-      const [eventData, fightsData] = await Promise.all([
-        api.getEvent(eventId),
-        api.getFights({ event_id: eventId })
-      ])
+      // Загружаем данные события и боев одним запросом
+      const data = await api.batch({
+        event: { resource: 'event', params: { event_id: eventId } },
+        fights: { resource: 'fights', params: { event_id: eventId } }
+      })
       
-      setEvent(eventData)
-      setFights(fightsData)
+      setEvent(data.event)
+      setFights(data.fights)
       
     } catch (err) {
       console.error('Ошибка загрузки события:', err)
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react'
 import { useParams, Link } from 'react-router-dom'
 import Layout from '../components/Layout'
-import { api } from '../services/api'
+import { api, BatchError } from '../services/api'
 import { Fighter, Fight, WeightClass } from '../types'
 
 const FighterPage: React.FC = () => {
@@ -23,31 +23,27 @@ const FighterPage: React.FC = () => {
       setLoading(true)
       setError(null)
 
-      // Загружаем всех бойцов и ищем нужного
-      const fighters = await api.getFighters({ limit: 1000 })
-      const foundFighter = fighters.find(f => 
-        f.name.toLowerCase().replace(/\s+/g, '_') === fighterIdentifier.toLowerCase()
-      )
-
-      if (!foundFighter) {
-        setError('Боец не найден')
-        return
-      }
-
+      // Боец по адресу страницы, его бои и весовые категории одним запросом
+      const data = await api.batch({
+        fighter: { resource: 'fighter_by_slug', params: { slug: fighterIdentifier } },
+        fights: { resource: 'fights', params: { fighter_slug: fighterIdentifier } },
+        weightClasses: { resource: 'weight_classes' }
+      })
+      const foundFighter: Fighter = data.fighter
       setFighter(foundFighter)
+      setFights(data.fights)
 
-      // Загружаем бои бойца
-      const fighterFights = await api.getFights({ fighter_id: foundFighter.id })
-      setFights(fighterFights)
-
-      // Загружаем весовую категорию
       if (foundFighter.weight_class_id) {
-        const weightClasses = await api.getWeightClasses()
+        const weightClasses: WeightClass[] = data.weightClasses
         const foundWeightClass = weightClasses.find(wc => wc.id === foundFighter.weight_class_id)
         setWeightClass(foundWeightClass || null)
       }
 
     } catch (error) {
+      if (error instanceof BatchError && error.status === 404) {
+        setError('Боец не найден')
+        return
+      }
       console.error('Ошибка загрузки бойца:', error)
       setError('Ошибка загрузки данных бойца')
     } finally {
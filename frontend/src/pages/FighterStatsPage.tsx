@@ -22,13 +22,14 @@ const FighterStatsPage: React.FC = () => {
       setLoading(true)
       setError(null)
 
-      const [statsData, fightsData] = await Promise.all([
-        api.getFighterStats(id),
-        api.getFighterFights(id, 10)
-      ])
+      // Статистика и бои бойца одним запросом
+      const data = await api.batch({
+        stats: { resource: 'fighter_stats', params: { fighter_id: id } },
+        fights: { resource: 'fighter_fights', params: { fighter_id: id, limit: 10 } }
+      })
 
-      setStats(statsData)
-      setFights(fightsData)
+      setStats(data.stats)
+      setFights(data.fights)
     } catch (err) {
       setError('Ошибка при загрузке данных бойца')
       console.error('Error loading fighter data:', err)
@@ -18,12 +18,12 @@ const FightersPage: React.FC = () => {
 
   const loadData = async () => {
     try {
-      const [fightersData, weightClassesData] = await Promise.all([
-        api.getFighters({ limit: 20 }), // Ограничиваем 20 бойцами
-        api.getWeightClasses()
-      ])
-      setFighters(fightersData)
-      setWeightClasses(weightClassesData)
+      const data = await api.batch({
+        fighters: { resource: 'fighters', params: { limit: 20 } }, // Ограничиваем 20 бойцами
+        weightClasses: { resource: 'weight_classes' }
+      })
+      setFighters(data.fighters)
+      setWeightClasses(data.weightClasses)
     } catch (error) {
       console.error('Ошибка загрузки данных:', error)
     } finally {
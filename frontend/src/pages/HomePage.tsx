@@ -13,8 +13,8 @@ const HomePage: React.FC = () => {
 
   const loadStats = async () => {
     try {
-      const statsData = await api.getStats()
-      setStats(statsData)
+      const home = await api.getHome()
+      setStats(home.counts)
     } catch (error) {
       console.error('Ошибка загрузки статистики:', error)
     } finally {
@@ -22,11 +22,13 @@ const WeightClassPage: React.FC = () => {
       setLoading(true)
       setError(null)
 
-      // Загружаем весовые категории и рейтинги
-      const [weightClassesData, rankingsData] = await Promise.all([
-        api.getWeightClasses(),
-        api.getRankings()
-      ])
+      // Загружаем весовые категории и рейтинги одним запросом
+      const data = await api.batch({
+        weightClasses: { resource: 'weight_classes' },
+        rankings: { resource: 'rankings' }
+      })
+      const weightClassesData: WeightClass[] = data.weightClasses
+      const rankingsData: Ranking[] = data.rankings
 
       // Находим нужную весовую категорию
       const foundWeightClass = weightClassesData.find(wc => 
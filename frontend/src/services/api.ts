@@ -3,6 +3,19 @@ import { Fighter, WeightClass, Ranking, FighterDetail, UpcomingFight, Comparison
 
 const API_BASE_URL = '/api'
 
+// Часть пакетного запроса /api/batch: ресурс и его параметры
+export interface BatchItem {
+  resource: string
+  params?: Record<string, unknown>
+}
+
+// Ошибка части пакетного запроса: status - код ответа этой части (404 - запись не найдена)
+export class BatchError extends Error {
+  constructor(public key: string, public status: number, detail: string) {
+    super(`${key}: ${status} ${detail}`)
+  }
+}
+
 const apiClient = axios.create({
   baseURL: API_BASE_URL,
   headers: {
@@ -22,6 +35,11 @@ export const api = {
     return response.data
   },
 
+  getFightersByIds: async (ids: number[]): Promise<Fighter[]> => {
+    const response = await apiClient.get('/fighters', { params: { ids: ids.join(',') } })
+    return response.data
+  },
+
   getFighter: async (id: number): Promise<FighterDetail> => {
     const response = await apiClient.get(`/fighters/${id}`)
     return response.data
@@ -66,6 +84,12 @@ export const api = {
     return response.data
   },
 
+  // Главная страница: счетчики, топ стран, чемпионы, ближайшее и последние события
+  getHome: async () => {
+    const response = await apiClient.get('/home')
+    return response.data
+  },
+
   // События
   getEvents: async (params?: {
     skip?: number
@@ -117,6 +141,19 @@ export const api = {
     return response.data
   },
 
+  // Несколько чтений одним запросом: ключ -> данные (ошибка любой части - исключение)
+  batch: async (requests: Record<string, BatchItem>): Promise<Record<string, any>> => {
+    const response = await apiClient.post('/batch', { requests })
+    const data: Record<string, any> = {}
+    for (const [key, result] of Object.entries<any>(response.data)) {
+      if (result.status !== 200) {
+        throw new BatchError(key, result.status, result.error)
+      }
+      data[key] = result.data
+    }
+    return data
+  },
+
   // Обновление данных ufc.stats
   refreshUFCStats: async () => {
     const response = await apiClient.post('/refresh-ufc-stats')
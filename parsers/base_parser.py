@@ -5,40 +5,84 @@
 
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from bs4 import BeautifulSoup
+from .cassette import Cassette
+from .http_cache import HttpCache
+from .transport import Transport, get_transport
 
 
 class BaseParser:
     """Базовый класс для всех парсеров"""
     
-    def __init__(self, cache_dir: str = ".cache"):
+    # Политика HTTP-кэша страниц
+    cache_ttl = 24 * 3600               # Сколько секунд страница считается свежей
+    cache_max_bytes = 200 * 1024 * 1024  # Предельный размер кэша на диске
+    cache_compress = False              # Хранить тела страниц в gzip
+    
+    def __init__(self, cache_dir: str = ".cache", transport: Optional[Transport] = None):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Общий для всех парсеров транспорт: пулы соединений и лимиты по хостам
+        self.transport = transport or get_transport()
+        self.session = self.transport.session
+        self.http_cache = HttpCache(self.cache_dir, self.cache_max_bytes, self.cache_compress)
+        # Запись/воспроизведение ответов (PARSER_CASSETTE_MODE=record|replay)
+        self.cassette = Cassette.from_env()
+    
+    def use_cassette(self, cassette: Optional[Cassette]) -> None:
+        """Включает запись или воспроизведение ответов (None - обычная работа с сетью)"""
+        self.cassette = cassette
+    
+    def _get(self, url: str, timeout: int = 30, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET через общий транспорт (лимиты хоста и повторы) или кассету"""
+        if self.cassette is not None and not self.cassette.recording:
+            return self.cassette.response(url)
+        
+        response = self.transport.get(url, timeout=timeout, headers=headers)
+        if self.cassette is not None:
+            self.cassette.record(url, response, parser=type(self).__name__)
+        return response
     
-    def fetch(self, url: str, use_cache: bool = True) -> Optional[str]:
-        """Загружает HTML страницу с кэшированием"""
+    def fetch(self, url: str, use_cache: bool = True, ttl: Optional[float] = None) -> Optional[str]:
+        """
+        Загружает HTML страницу с кэшированием.
+        
+        Свежая страница отдается из кэша без запроса, устаревшая
+        перепроверяется условным запросом (ETag/Last-Modified).
+        ttl переопределяет cache_ttl парсера для этого URL.
+        С кассетой кэш не используется: записываются полные ответы
+        сервера, а воспроизводятся они без обращения к диску кэша.
+        """
+        ttl = self.cache_ttl if ttl is None else ttl
+        if self.cassette is not None:
+            use_cache = False
         try:
             # Проверяем кэш
-            if use_cache:
-                cache_file = self.cache_dir / f"{hash(url)}.html"
-                if cache_file.exists():
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        return f.read()
+            cached = self.http_cache.get(url) if use_cache else None
+            if cached is not None and cached.is_fresh(ttl):
+                self.http_cache.record_hit(cached)
+                return cached.text
             
             # Загружаем страницу
-            response = self.session.get(url, timeout=30)
+            response = self._get(url, headers=cached.validators() if cached else None)
+            if cached is not None and response.status_code == 304:
+                self.http_cache.record_hit(cached, revalidated=True)
+                return cached.text
             response.raise_for_status()
             
             # Сохраняем в кэш
             if use_cache:
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
+                self.http_cache.record_miss()
+                self.http_cache.put(
+                    url,
+                    response.text.encode('utf-8'),
+                    ttl=ttl,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
             
             return response.text
             
@@ -46,6 +90,22 @@ class BaseParser:
             print(f"❌ Ошибка при загрузке {url}: {e}")
             return None
     
+    def fetch_many(self, urls: List[str], max_workers: int = 8, use_cache: bool = True) -> Dict[str, Optional[str]]:
+        """
+        Загружает страницы параллельно в пуле потоков.
+        
+        Частоту и число одновременных запросов к каждому хосту
+        ограничивает транспорт, поэтому потоков может быть больше.
+        Возвращает словарь URL -> HTML (None, если страницу загрузить не удалось).
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pages = executor.map(lambda url: self.fetch(url, use_cache=use_cache), urls)
+            return dict(zip(urls, pages))
+    
     def parse_html(self, html: str) -> BeautifulSoup:
         """Парсит HTML с помощью BeautifulSoup"""
         return BeautifulSoup(html, 'lxml')
@@ -64,23 +124,19 @@ class BaseParser:
         return text
     
     def wait(self, seconds: float = 1.0):
-        """Пауза между запросами"""
+        """
+        Пауза между запросами.
+        
+        Частоту запросов ограничивает транспорт (token bucket на хост),
+        поэтому вызывать wait перед запросами не требуется.
+        """
         time.sleep(seconds)
     
     def get_cache_stats(self) -> dict:
-        """Получает статистику кэша"""
-        cache_files = list(self.cache_dir.glob("*.html"))
-        total_size = sum(f.stat().st_size for f in cache_files)
-        
-        return {
-            'total_files': len(cache_files),
-            'total_size_bytes': total_size,
-            'total_size_mb': round(total_size / (1024 * 1024), 2),
-            'cache_dir': str(self.cache_dir)
-        }
+        """Получает статистику кэша (размер, доля попаданий, сэкономленные байты)"""
+        return self.http_cache.stats()
     
     def clear_cache(self):
         """Очищает кэш"""
-        for cache_file in self.cache_dir.glob("*.html"):
-            cache_file.unlink()
+        self.http_cache.clear()
         print(f"✅ Кэш очищен: {self.cache_dir}")
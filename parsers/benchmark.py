@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора страниц парсерами на записанном корпусе (кассете)
+
+Запись корпуса (нужна сеть):
+    python parsers/benchmark.py record fixtures/cassettes/2026-10 --profiles 50
+
+Замер без сети:
+    python parsers/benchmark.py run fixtures/cassettes/2026-10 --repeat 5 --save bench.json
+    python parsers/benchmark.py run fixtures/cassettes/2026-10 --baseline bench.json
+    python parsers/benchmark.py run fixtures/cassettes/2026-10 --engine soup
+
+Сверка быстрого разбора (lxml) с BeautifulSoup на всех страницах корпуса:
+    python parsers/benchmark.py parity fixtures/cassettes/2026-10
+
+Для каждого парсера выводятся страниц в секунду, мс на страницу и пиковая
+RSS процесса. Каждый парсер замеряется в отдельном процессе, чтобы пиковая
+память одного не влияла на другой. С --baseline скрипт завершается
+с кодом 1, если какой-то парсер стал медленнее больше чем на --max-slowdown.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+# Добавляем корневую папку в путь для импорта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.cassette import Cassette
+from parsers.ufc_rankings import UFCRankingsParser
+from parsers.fighter_profiles import FighterProfilesParser
+from parsers.upcoming_cards import UpcomingCardsParser
+
+# Парсер -> метод, разбирающий одну страницу
+BENCHMARKS = {
+    'rankings': (UFCRankingsParser, 'parse_rankings'),
+    'profiles': (FighterProfilesParser, 'extract_profile_data'),
+    'upcoming_cards': (UpcomingCardsParser, 'parse_upcoming_events'),
+}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Пиковая RSS текущего процесса (None, если недоступно, например в Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS - байты
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def record_corpus(path: str, profiles_limit: int = 50) -> None:
+    """Записывает корпус: страницы рейтингов, профилей и кардов"""
+    cassette = Cassette(path, mode='record')
+    cache_dir = tempfile.mkdtemp(prefix='ufc-bench-')
+
+    rankings_parser = UFCRankingsParser(cache_dir=os.path.join(cache_dir, 'rankings'))
+    rankings_parser.use_cassette(cassette)
+    html = rankings_parser.fetch(rankings_parser.base_url)
+    categories = rankings_parser.parse_rankings(html) if html else {}
+    print(f"🏆 Рейтинги: {len(categories)} категорий")
+
+    profile_urls = [fighter['profile_url'] for fighters in categories.values()
+                    for fighter in fighters if fighter.get('profile_url')]
+    profile_urls = list(dict.fromkeys(profile_urls))[:profiles_limit]
+    profiles_parser = FighterProfilesParser(cache_dir=os.path.join(cache_dir, 'fighters'))
+    profiles_parser.use_cassette(cassette)
+    pages = profiles_parser.fetch_many(profile_urls, max_workers=profiles_parser.fetch_workers)
+    print(f"👤 Профили: {sum(1 for page in pages.values() if page)}/{len(profile_urls)}")
+
+    cards_parser = UpcomingCardsParser(cache_dir=os.path.join(cache_dir, 'cards'))
+    cards_parser.use_cassette(cassette)
+    cards_parser.fetch(cards_parser.base_url)
+    print("📅 Карды: записаны")
+
+    print(f"✅ Корпус записан: {cassette.path} ({len(cassette.entries)} ответов)")
+
+
+def _corpus_pages(cassette: Cassette, parser_class) -> List[str]:
+    """HTML страниц корпуса, загруженных парсером (декодирование делает fetch, в замер не входит)"""
+    return [cassette.response(url).text for url in cassette.urls(parser_class.__name__)
+            if cassette.entries[url]['status'] == 200]
+
+
+def _run_benchmark(name: str, path: str, repeat: int, engine: Optional[str] = None) -> Dict:
+    """Замер одного парсера (выполняется в отдельном процессе)"""
+    parser_class, method_name = BENCHMARKS[name]
+    cassette = Cassette(path, mode='replay')
+    parser = parser_class(cache_dir=tempfile.mkdtemp(prefix='ufc-bench-'))
+    parser.use_cassette(cassette)
+    if engine and hasattr(parser, 'extraction_engine'):
+        parser.extraction_engine = engine
+    parse_page = getattr(parser, method_name)
+
+    pages = _corpus_pages(cassette, parser_class)
+    if not pages:
+        return {'parser': name, 'pages': 0}
+
+    # Прогрев: первые вызовы платят за импорт и инициализацию lxml
+    items = sum(len(parse_page(html) or ()) for html in pages)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            parse_page(html)
+    elapsed = time.perf_counter() - started
+
+    parsed = len(pages) * repeat
+    return {
+        'parser': name,
+        'engine': getattr(parser, 'extraction_engine', 'soup'),
+        'pages': len(pages),
+        'items': items,
+        'pages_per_sec': round(parsed / elapsed, 1),
+        'ms_per_page': round(elapsed * 1000 / parsed, 3),
+        'peak_rss_mb': _peak_rss_mb()
+    }
+
+
+def run_benchmarks(path: str, names: List[str], repeat: int = 3, engine: Optional[str] = None) -> List[Dict]:
+    """Замеряет парсеры на корпусе, каждый в новом процессе"""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(_run_benchmark, name, path, repeat, engine).result())
+    return results
+
+
+def parse_with_engines(parser, method_name: str, html: str) -> Dict[str, object]:
+    """Результаты разбора страницы через BeautifulSoup и lxml: {'soup': ..., 'lxml': ...}"""
+    results = {}
+    for engine in ('soup', 'lxml'):
+        parser.extraction_engine = engine
+        results[engine] = getattr(parser, method_name)(html)
+    return results
+
+
+def check_parity(path: str) -> int:
+    """Сравнивает результаты разбора lxml и BeautifulSoup. Возвращает число расхождений"""
+    cassette = Cassette(path, mode='replay')
+    cache_dir = tempfile.mkdtemp(prefix='ufc-bench-')
+    mismatches = 0
+
+    for name, (parser_class, method_name) in BENCHMARKS.items():
+        parser = parser_class(cache_dir=os.path.join(cache_dir, name))
+        if not hasattr(parser, 'extraction_engine'):
+            continue
+
+        urls = [url for url in cassette.urls(parser_class.__name__) if cassette.entries[url]['status'] == 200]
+        parser_mismatches = 0
+        for url in urls:
+            results = parse_with_engines(parser, method_name, cassette.response(url).text)
+            if results['soup'] != results['lxml']:
+                parser_mismatches += 1
+                print(f"❌ {name}: расхождение на {url}")
+
+        mismatches += parser_mismatches
+        print(f"{'✅' if not parser_mismatches else '⚠️'} {name}: проверено страниц {len(urls)}, расхождений {parser_mismatches}")
+
+    return mismatches
+
+
+def print_results(results: List[Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    """Печатает таблицу результатов (с изменением относительно базовой линии)"""
+    print(f"{'Парсер':<24}{'Страниц':>9}{'Стр/с':>10}{'мс/стр':>10}{'RSS, МБ':>10}{'Δ мс/стр':>11}")
+    for result in results:
+        if not result['pages']:
+            print(f"{result['parser']:<24}{'нет страниц в корпусе':>30}")
+            continue
+        delta = ''
+        previous = (baseline or {}).get(result['parser'])
+        if previous and previous.get('ms_per_page'):
+            delta = f"{result['ms_per_page'] / previous['ms_per_page'] - 1:+.1%}"
+        rss = result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'
+        print(f"{result['parser'] + ' (' + result['engine'] + ')':<24}{result['pages']:>9}{result['pages_per_sec']:>10}"
+              f"{result['ms_per_page']:>10}{rss:>10}{delta:>11}")
+
+
+def find_regressions(results: List[Dict], baseline: Dict[str, Dict], max_slowdown: float) -> List[str]:
+    """Парсеры, которые стали медленнее базовой линии больше чем на max_slowdown"""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['parser'])
+        if not result['pages'] or not previous or not previous.get('ms_per_page'):
+            continue
+        if result['ms_per_page'] > previous['ms_per_page'] * (1 + max_slowdown):
+            regressions.append(result['parser'])
+        elif result['items'] != previous.get('items'):
+            # Разбор стал находить другое число записей - тоже регрессия
+            regressions.append(result['parser'])
+    return regressions
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк парсеров UFC на записанном корпусе")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="записать корпус из сети")
+    record.add_argument('corpus', help="папка корпуса")
+    record.add_argument('--profiles', type=int, default=50, help="сколько профилей записать")
+
+    run = commands.add_parser('run', help="замерить парсеры на корпусе без сети")
+    run.add_argument('corpus', help="папка корпуса")
+    run.add_argument('--parser', action='append', choices=list(BENCHMARKS), help="только указанные парсеры")
+    run.add_argument('--repeat', type=int, default=3, help="сколько раз разбирать каждую страницу")
+    run.add_argument('--engine', choices=['lxml', 'soup'], help="способ разбора (по умолчанию - как в парсере)")
+    run.add_argument('--save', help="сохранить результаты в JSON")
+    run.add_argument('--baseline', help="JSON с результатами для сравнения")
+    run.add_argument('--max-slowdown', type=float, default=0.2, help="допустимое замедление (0.2 = 20%%)")
+
+    parity = commands.add_parser('parity', help="сверить разбор lxml и BeautifulSoup на корпусе")
+    parity.add_argument('corpus', help="папка корпуса")
+
+    args = arg_parser.parse_args()
+
+    if args.command == 'record':
+        record_corpus(args.corpus, args.profiles)
+        return
+
+    if args.command == 'parity':
+        if check_parity(args.corpus):
+            sys.exit(1)
+        return
+
+    results = run_benchmarks(args.corpus, args.parser or list(BENCHMARKS), args.repeat, args.engine)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = {result['parser']: result for result in json.load(f)}
+
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результаты сохранены: {args.save}")
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.max_slowdown)
+        if regressions:
+            print(f"❌ Регрессия разбора: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
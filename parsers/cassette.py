@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Запись и воспроизведение HTTP-ответов парсеров (кассеты)
+
+В режиме record каждый ответ, полученный парсером из сети, сохраняется
+в корпус фикстур: тело - в bodies/<sha256(url)>.body, статус, заголовки
+и время записи - в manifest.json. В режиме replay ответы отдаются
+из корпуса без обращения к сети; URL, которого нет в корпусе, - ошибка.
+
+Корпус версионируется: в манифесте хранится версия формата (FORMAT_VERSION),
+а сами корпуса лежат в отдельных папках (например, fixtures/cassettes/2026-10),
+так что новый корпус можно записать, не трогая старый.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from .http_cache import url_key
+
+FORMAT_VERSION = 1
+MODES = ('record', 'replay')
+
+# Заголовки, которые имеет смысл воспроизводить
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class CassetteMiss(LookupError):
+    """В корпусе нет ответа для запрошенного URL"""
+
+
+class Cassette:
+    """Корпус записанных ответов в папке path"""
+
+    def __init__(self, path, mode: str = 'replay'):
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим кассеты: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.bodies_dir = self.path / "bodies"
+        self.manifest_file = self.path / "manifest.json"
+        self._lock = threading.Lock()
+
+        self.entries: Dict[str, Dict] = {}
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format_version') != FORMAT_VERSION:
+                raise ValueError(
+                    f"Версия корпуса {manifest.get('format_version')} не поддерживается "
+                    f"(ожидается {FORMAT_VERSION}): {self.path}"
+                )
+            self.entries = manifest.get('entries', {})
+        elif mode == 'replay':
+            raise FileNotFoundError(f"Корпус не найден: {self.manifest_file}")
+
+    @classmethod
+    def from_env(cls) -> Optional['Cassette']:
+        """Кассета из PARSER_CASSETTE_MODE и PARSER_CASSETTE_DIR (None, если режим не задан)"""
+        mode = os.getenv('PARSER_CASSETTE_MODE')
+        if not mode:
+            return None
+        return cls(os.getenv('PARSER_CASSETTE_DIR', 'fixtures/cassettes/default'), mode)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    def urls(self, parser: Optional[str] = None) -> List[str]:
+        """Записанные URL (только загруженные указанным парсером) в порядке записи"""
+        return [url for url, entry in self.entries.items() if parser is None or entry.get('parser') == parser]
+
+    def _body_path(self, url: str) -> Path:
+        return self.bodies_dir / f"{url_key(url)}.body"
+
+    def record(self, url: str, response: requests.Response, parser: Optional[str] = None) -> None:
+        """Сохраняет ответ в корпус (повторная запись URL заменяет прежнюю)"""
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self._body_path(url).write_bytes(response.content)
+
+        with self._lock:
+            self.entries[url] = {
+                'parser': parser,
+                'status': response.status_code,
+                'headers': {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+                'encoding': response.encoding,
+                'size': len(response.content),
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }
+            self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        tmp_file = self.manifest_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'format_version': FORMAT_VERSION, 'entries': self.entries}, f,
+                      ensure_ascii=False, indent=2)
+        tmp_file.replace(self.manifest_file)
+
+    def body(self, url: str) -> bytes:
+        """Тело записанного ответа"""
+        if url not in self.entries:
+            raise CassetteMiss(f"нет ответа в корпусе для {url}")
+        return self._body_path(url).read_bytes()
+
+    def response(self, url: str) -> requests.Response:
+        """Восстанавливает записанный ответ как requests.Response"""
+        entry = self.entries.get(url)
+        if entry is None:
+            raise CassetteMiss(f"нет ответа в корпусе для {url}")
+
+        response = requests.Response()
+        response.url = url
+        response.status_code = entry['status']
+        response.headers.update(entry.get('headers', {}))
+        response.encoding = entry.get('encoding')
+        response._content = self.body(url)
+        return response
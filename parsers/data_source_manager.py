@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 """
 Менеджер источников данных с системой приоритетов
+
+Источники упорядочиваются по ожидаемому времени до получения данных
+(EWMA задержки и успешности, см. source_health), приоритет решает
+при равенстве. Источники с разомкнутым выключателем пропускаются.
 """
 
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from enum import Enum
 from datetime import datetime
 from .ufc_official_api import UFCOfficialAPIParser
@@ -11,6 +18,7 @@ from .ufc_stats_enhanced import UFCStatsEnhanced
 from .ufc_rankings import UFCRankingsParser
 from .fighter_profiles import FighterProfilesParser
 from .upcoming_cards import UpcomingCardsParser
+from .source_health import SourceHealth
 from database.config import SessionLocal
 from database.models import Fighter, WeightClass, Ranking, Event, Fight, FightStats
 
@@ -25,7 +33,12 @@ class DataSourcePriority(Enum):
 class DataSourceManager:
     """Менеджер источников данных с системой приоритетов"""
     
-    def __init__(self):
+    def __init__(self, hedge_delay: float = 2.0, health_file: str = ".cache/source_health.json"):
+        # Через сколько секунд без ответа источника запускать следующий по приоритету
+        self.hedge_delay = hedge_delay
+        self._stats_lock = threading.Lock()
+        # Успешность, задержка и выключатели источников (сохраняются между запусками)
+        self.health = SourceHealth(health_file)
         self.sources = {
             'ufc_official': {
                 'parser': UFCOfficialAPIParser(),
@@ -63,176 +76,178 @@ class DataSourceManager:
                 'success_rate': 0.0
             }
         }
+        for name, config in self.sources.items():
+            config['success_rate'] = self.health.success_rate(name)
     
-    def get_rankings(self, force_refresh: bool = False) -> Dict[str, List[Dict]]:
-        """Получает рейтинги с приоритетных источников"""
-        print("🏆 Получение рейтингов с приоритетных источников...")
+    def _sources_with(self, predicate) -> List[Tuple[str, Dict]]:
+        """Включенные источники, подходящие под условие, по ожидаемому времени до данных"""
+        sources = []
+        for name, config in self.sources.items():
+            if not config['enabled'] or not predicate(name, config):
+                continue
+            if not self.health.available(name):
+                print(f"  ⛔ {name}: выключен до {self.health.status(name)['open_until']} после ошибок подряд")
+                continue
+            sources.append((name, config))
+        
+        sources.sort(key=lambda x: (self.health.expected_time(x[0]), x[1]['priority'].value))
+        return sources
+    
+    def _first_valid(self, sources: List[Tuple[str, Dict]], fetch: Callable[[Dict], Any], unit: str) -> Any:
+        """
+        Опрашивает источники с хеджированием и возвращает первый непустой результат.
         
-        # Сортируем источники по приоритету
-        ranking_sources = [
-            (name, config) for name, config in self.sources.items()
-            if config['enabled'] and hasattr(config['parser'], 'get_rankings')
-        ]
-        ranking_sources.sort(key=lambda x: x[1]['priority'].value)
+        Источники запускаются в порядке sources (см. _sources_with). Если
+        очередной не ответил за hedge_delay секунд, параллельно запускается
+        следующий; если ответил ошибкой или пустыми данными - следующий
+        запускается сразу. Из одновременно завершившихся побеждает стоящий
+        раньше в порядке. Еще не
+        запущенные источники отменяются, ответы проигравших отбрасываются
+        (поток с уже отправленным запросом нельзя прервать, он завершится сам).
+        """
+        queue = list(sources)
+        order = {name: index for index, (name, _) in enumerate(sources)}
+        pending: Dict[Future, str] = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, len(queue)))
         
-        for source_name, config in ranking_sources:
-            try:
+        def launch():
+            while queue:
+                source_name, config = queue.pop(0)
+                # После паузы выключателя пробную попытку делает только один вызывающий
+                if not self.health.acquire(source_name):
+                    print(f"  ⛔ {source_name}: пробная попытка уже идет, пропускаем")
+                    continue
                 print(f"  🔄 Пробуем {source_name}...")
+                started = time.monotonic()
+                future = executor.submit(fetch, config)
+                future.add_done_callback(
+                    lambda f: self._record_outcome(source_name, f, unit, time.monotonic() - started)
+                )
+                pending[future] = source_name
+                return
+        
+        try:
+            if queue:
+                launch()
+            while pending:
+                done, _ = wait(pending, timeout=self.hedge_delay if queue else None,
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    slow = ', '.join(pending.values())
+                    print(f"  ⏱️ {slow}: нет ответа за {self.hedge_delay} с, подключаем следующий источник")
+                    launch()
+                    continue
                 
-                if hasattr(config['parser'], 'get_rankings'):
-                    rankings = config['parser'].get_rankings()
-                else:
-                    rankings = config['parser'].parse()
+                for future in sorted(done, key=lambda f: order[pending[f]]):
+                    pending.pop(future)
+                    if future.exception() is None and self._has_data(future.result()):
+                        return future.result()
                 
-                if rankings and len(rankings) > 0:
-                    print(f"  ✅ {source_name}: получено {len(rankings)} категорий")
-                    self._update_source_stats(source_name, True)
-                    return rankings
-                else:
-                    print(f"  ⚠️ {source_name}: нет данных")
-                    self._update_source_stats(source_name, False)
-                    
-            except Exception as e:
-                print(f"  ❌ {source_name}: ошибка - {e}")
-                self._update_source_stats(source_name, False)
+                # Завершившиеся источники ничего не дали - следующий без ожидания
+                if queue:
+                    launch()
+            return None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def _has_data(data: Any) -> bool:
+        """Непустой результат (len, а не bool: статистика приходит DataFrame)"""
+        return data is not None and len(data) > 0
+    
+    def _record_outcome(self, source_name: str, future: Future, unit: str, latency: float) -> None:
+        """Учитывает результат запроса к источнику (в том числе проигравшего)"""
+        if future.cancelled():
+            self.health.release(source_name)
+            return
+        
+        error = future.exception()
+        if error is not None:
+            print(f"  ❌ {source_name}: ошибка - {error}")
+            self._update_source_stats(source_name, False, latency)
+        elif self._has_data(future.result()):
+            print(f"  ✅ {source_name}: получено {len(future.result())} {unit} за {latency:.1f} с")
+            self._update_source_stats(source_name, True, latency)
+        else:
+            print(f"  ⚠️ {source_name}: нет данных")
+            self._update_source_stats(source_name, False, latency)
+    
+    def get_rankings(self, force_refresh: bool = False) -> Dict[str, List[Dict]]:
+        """Получает рейтинги с приоритетных источников"""
+        print("🏆 Получение рейтингов с приоритетных источников...")
         
-        print("❌ Не удалось получить рейтинги ни с одного источника")
-        return {}
+        sources = self._sources_with(lambda name, config: hasattr(config['parser'], 'get_rankings'))
+        rankings = self._first_valid(sources, lambda config: config['parser'].get_rankings(), "категорий")
+        if rankings is None:
+            print("❌ Не удалось получить рейтинги ни с одного источника")
+            return {}
+        return rankings
     
     def get_fighters(self, force_refresh: bool = False) -> List[Dict]:
         """Получает бойцов с приоритетных источников"""
         print("👥 Получение бойцов с приоритетных источников...")
         
-        # Сортируем источники по приоритету
-        fighter_sources = [
-            (name, config) for name, config in self.sources.items()
-            if config['enabled'] and hasattr(config['parser'], 'get_fighters')
-        ]
-        fighter_sources.sort(key=lambda x: x[1]['priority'].value)
-        
-        for source_name, config in fighter_sources:
-            try:
-                print(f"  🔄 Пробуем {source_name}...")
-                
-                if hasattr(config['parser'], 'get_fighters'):
-                    fighters = config['parser'].get_fighters()
-                else:
-                    # Для парсеров без get_fighters, пробуем parse
-                    data = config['parser'].parse()
-                    fighters = data.get('fighters', []) if isinstance(data, dict) else []
-                
-                if fighters and len(fighters) > 0:
-                    print(f"  ✅ {source_name}: получено {len(fighters)} бойцов")
-                    self._update_source_stats(source_name, True)
-                    return fighters
-                else:
-                    print(f"  ⚠️ {source_name}: нет данных")
-                    self._update_source_stats(source_name, False)
-                    
-            except Exception as e:
-                print(f"  ❌ {source_name}: ошибка - {e}")
-                self._update_source_stats(source_name, False)
-        
-        print("❌ Не удалось получить бойцов ни с одного источника")
-        return []
+        sources = self._sources_with(lambda name, config: hasattr(config['parser'], 'get_fighters'))
+        fighters = self._first_valid(sources, lambda config: config['parser'].get_fighters(), "бойцов")
+        if fighters is None:
+            print("❌ Не удалось получить бойцов ни с одного источника")
+            return []
+        return fighters
     
     def get_events(self, force_refresh: bool = False) -> List[Dict]:
         """Получает события с приоритетных источников"""
         print("🎪 Получение событий с приоритетных источников...")
         
-        # Сортируем источники по приоритету
-        event_sources = [
-            (name, config) for name, config in self.sources.items()
-            if config['enabled'] and hasattr(config['parser'], 'get_events')
-        ]
-        event_sources.sort(key=lambda x: x[1]['priority'].value)
-        
-        for source_name, config in event_sources:
-            try:
-                print(f"  🔄 Пробуем {source_name}...")
-                
-                if hasattr(config['parser'], 'get_events'):
-                    events = config['parser'].get_events()
-                else:
-                    # Для парсеров без get_events, пробуем parse
-                    data = config['parser'].parse()
-                    events = data.get('events', []) if isinstance(data, dict) else []
-                
-                if events and len(events) > 0:
-                    print(f"  ✅ {source_name}: получено {len(events)} событий")
-                    self._update_source_stats(source_name, True)
-                    return events
-                else:
-                    print(f"  ⚠️ {source_name}: нет данных")
-                    self._update_source_stats(source_name, False)
-                    
-            except Exception as e:
-                print(f"  ❌ {source_name}: ошибка - {e}")
-                self._update_source_stats(source_name, False)
-        
-        print("❌ Не удалось получить события ни с одного источника")
-        return []
+        sources = self._sources_with(lambda name, config: hasattr(config['parser'], 'get_events'))
+        events = self._first_valid(sources, lambda config: config['parser'].get_events(), "событий")
+        if events is None:
+            print("❌ Не удалось получить события ни с одного источника")
+            return []
+        return events
     
     def get_fight_stats(self, force_refresh: bool = False) -> List[Dict]:
         """Получает статистику боев с приоритетных источников"""
         print("📊 Получение статистики боев с приоритетных источников...")
         
-        # Сортируем источники по приоритету
-        stats_sources = [
-            (name, config) for name, config in self.sources.items()
-            if config['enabled'] and 'stats' in name.lower()
-        ]
-        stats_sources.sort(key=lambda x: x[1]['priority'].value)
-        
-        for source_name, config in stats_sources:
-            try:
-                print(f"  🔄 Пробуем {source_name}...")
-                
-                data = config['parser'].parse()
-                fight_stats = data.get('fight_stats', []) if isinstance(data, dict) else []
-                
-                if fight_stats and len(fight_stats) > 0:
-                    print(f"  ✅ {source_name}: получено {len(fight_stats)} записей статистики")
-                    self._update_source_stats(source_name, True)
-                    return fight_stats
-                else:
-                    print(f"  ⚠️ {source_name}: нет данных")
-                    self._update_source_stats(source_name, False)
-                    
-            except Exception as e:
-                print(f"  ❌ {source_name}: ошибка - {e}")
-                self._update_source_stats(source_name, False)
+        def fetch(config):
+            data = config['parser'].parse()
+            return data.get('fight_stats', []) if isinstance(data, dict) else []
         
-        print("❌ Не удалось получить статистику боев ни с одного источника")
-        return []
+        sources = self._sources_with(lambda name, config: 'stats' in name.lower())
+        fight_stats = self._first_valid(sources, fetch, "записей статистики")
+        if fight_stats is None:
+            print("❌ Не удалось получить статистику боев ни с одного источника")
+            return []
+        return fight_stats
     
     def update_all_data(self, force_refresh: bool = False) -> Dict[str, Any]:
-        """Обновляет все данные с приоритетных источников"""
+        """Обновляет все данные с приоритетных источников (типы данных - параллельно)"""
         print("🔄 Обновление всех данных...")
+        started = time.monotonic()
         
-        results = {
-            'rankings': self.get_rankings(force_refresh),
-            'fighters': self.get_fighters(force_refresh),
-            'events': self.get_events(force_refresh),
-            'fight_stats': self.get_fight_stats(force_refresh),
-            'sources_status': self.get_sources_status()
+        getters = {
+            'rankings': self.get_rankings,
+            'fighters': self.get_fighters,
+            'events': self.get_events,
+            'fight_stats': self.get_fight_stats,
         }
+        with ThreadPoolExecutor(max_workers=len(getters)) as executor:
+            futures = {data_type: executor.submit(getter, force_refresh) for data_type, getter in getters.items()}
+            results = {data_type: future.result() for data_type, future in futures.items()}
+        
+        results['sources_status'] = self.get_sources_status()
+        print(f"⏱️ Все данные обновлены за {time.monotonic() - started:.1f} с")
         
         return results
     
-    def _update_source_stats(self, source_name: str, success: bool) -> None:
-        """Обновляет статистику источника"""
+    def _update_source_stats(self, source_name: str, success: bool, latency: float = 0.0) -> None:
+        """Обновляет статистику источника (EWMA успешности и задержки, выключатель)"""
         if source_name in self.sources:
-            self.sources[source_name]['last_update'] = datetime.now()
-            
-            # Простое обновление success_rate
-            current_rate = self.sources[source_name]['success_rate']
-            if success:
-                new_rate = min(1.0, current_rate + 0.1)
-            else:
-                new_rate = max(0.0, current_rate - 0.05)
-            
-            self.sources[source_name]['success_rate'] = new_rate
+            self.health.record(source_name, success, latency)
+            # Вызывается из потоков разных источников
+            with self._stats_lock:
+                self.sources[source_name]['last_update'] = datetime.now()
+                self.sources[source_name]['success_rate'] = self.health.success_rate(source_name)
     
     def get_sources_status(self) -> Dict[str, Dict]:
         """Возвращает статус всех источников"""
@@ -242,7 +257,8 @@ class DataSourceManager:
                 'enabled': config['enabled'],
                 'priority': config['priority'].name,
                 'last_update': config['last_update'].isoformat() if config['last_update'] else None,
-                'success_rate': config['success_rate']
+                'success_rate': self.health.success_rate(name),
+                'health': self.health.status(name)
             }
         return status
     
@@ -277,15 +293,12 @@ class DataSourceManager:
             return False
     
     def get_recommended_sources(self) -> List[str]:
-        """Возвращает рекомендуемые источники на основе статистики"""
-        # Сортируем по success_rate и priority
-        sorted_sources = sorted(
-            self.sources.items(),
-            key=lambda x: (x[1]['success_rate'], -x[1]['priority'].value),
-            reverse=True
+        """Возвращает рекомендуемые источники: доступные, по ожидаемому времени до данных"""
+        enabled = [name for name, config in self.sources.items() if config['enabled']]
+        return sorted(
+            self.health.order(enabled),
+            key=lambda name: (self.health.expected_time(name), self.sources[name]['priority'].value)
         )
-        
-        return [name for name, config in sorted_sources if config['enabled']]
     
     def validate_data_quality(self, data: Dict[str, Any]) -> Dict[str, float]:
         """Валидирует качество данных"""
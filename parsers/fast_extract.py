@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Быстрое извлечение данных fight.ru через lxml и скомпилированные XPath
+
+BeautifulSoup строит поверх дерева lxml собственное дерево из Python-объектов
+и обходит его в Python - на странице рейтингов это основная часть времени
+разбора. Здесь тот же HTML разбирается парсером lxml (тем же, что
+использует BeautifulSoup('lxml')), а нужные элементы выбираются заранее
+скомпилированными XPath-выражениями, которые выполняются в libxml2.
+
+Функции повторяют логику UFCRankingsParser.parse_rankings и
+FighterProfilesParser.extract_profile_data и возвращают те же словари.
+Совпадение результатов проверяют tests/test_fast_extract.py (на сохраненных
+страницах из tests/fixtures) и `python parsers/benchmark.py parity` на корпусе.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from lxml import etree, html as lxml_html
+
+
+def _class(name: str) -> str:
+    """Условие XPath: у элемента есть класс name (как class_=name в BeautifulSoup)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Текст элемента как get_text() в BeautifulSoup: без комментариев, script, style и содержимого template
+_TEXT = etree.XPath(".//text()[not(parent::script) and not(parent::style) and not(ancestor::template)]")
+
+# Рейтинги
+_WEIGHT_NAMES = etree.XPath(f"//div[{_class('weight-name')}]")
+_CATEGORY_SECTION = etree.XPath(f"ancestor::div[{_class('org-single')}][1]")
+_FIRST_FIGHTER = etree.XPath(f"(.//div[{_class('first-fighter')}])[1]")
+_NEXT_FIGHTERS = etree.XPath(f".//div[{_class('next-fighter')}]")
+_FIGHTER_NAME = etree.XPath(f"(.//div[{_class('fighter-name')}])[1]")
+_FIGHTER_NUMBER = etree.XPath(f"(.//div[{_class('fighter-number')}])[1]")
+_MOVE = etree.XPath(f"(.//div[{_class('move')}])[1]")
+_LINK = etree.XPath("(.//a)[1]")
+
+# Профили: (выражение, атрибут) в порядке проверки, как в _extract_image_url
+_IMAGE_SELECTORS = [
+    (etree.XPath("(//img[@itemprop='url'])[1]"), 'src'),
+    (etree.XPath("(//meta[@property='og:image'])[1]"), 'content'),
+    (etree.XPath(f"(//img[{_class('fighter-photo')}])[1]"), 'src'),
+    (etree.XPath(f"(//img[{_class('profile-photo')}])[1]"), 'src'),
+    (etree.XPath("(//img)[1]"), 'src'),
+]
+_NAME_RU = etree.XPath(f"(//h1[{_class('fighter-name')}])[1]")
+_NAME_EN = etree.XPath(f"(//div[{_class('fighter-latin-name')}])[1]")
+_FIRST_HEADING = etree.XPath("(//h1 | //h2)[1]")
+_NAME_EN_CANDIDATES = [
+    etree.XPath(f"(//*[{_class('fighter-eng-name')}])[1]"),
+    etree.XPath(f"(//div[{_class('eng-name')}])[1]"),
+    etree.XPath(f"(//span[{_class('eng-name')}])[1]"),
+]
+_COUNTRY_NAME = etree.XPath(f"(//*[{_class('fighter-country-name')}])[1]")
+_COUNTRY_FLAG = etree.XPath(f"(//*[{_class('fighter-country-flag')}])[1]")
+_FIRST_IMG = etree.XPath("(.//img)[1]")
+_FIGHT_SCORE = etree.XPath(f"(//*[{_class('fight-score')}])[1]")
+_LIST_ITEMS = etree.XPath("//li")
+_SPAN_TEXT = etree.XPath(f"(.//span[{_class('text')}])[1]")
+_SPAN_SUB = etree.XPath(f"(.//span[{_class('sub')}])[1]")
+_META_HEIGHT = etree.XPath("(//meta[@itemprop='height'])[1]")
+_META_WEIGHT = etree.XPath("(//meta[@itemprop='weight'])[1]")
+_META_BIRTH_DATE = etree.XPath("(//meta[@itemprop='birthDate'])[1]")
+
+
+def parse_document(page_html: str):
+    """Корень документа lxml или None, если lxml не может разобрать строку"""
+    try:
+        return lxml_html.document_fromstring(page_html)
+    except (etree.ParserError, ValueError):
+        # Пустой документ или строка с объявлением кодировки
+        return None
+
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def _clean(text: str) -> str:
+    """То же, что BaseParser.clean_text"""
+    return ' '.join(text.split()) if text else ''
+
+
+def _text(element) -> str:
+    return _clean(''.join(_TEXT(element)))
+
+
+def extract_rankings(root) -> Dict[str, List[Dict]]:
+    """Рейтинги из корня документа (результат как у parse_rankings)"""
+    categories = {}
+
+    for section in _WEIGHT_NAMES(root):
+        category_name = _text(section)
+
+        # Пропускаем пустые или служебные категории
+        if not category_name or category_name in ['Весовая категория', 'Все']:
+            continue
+
+        category_section = _first(_CATEGORY_SECTION, section)
+        if category_section is None:
+            continue
+
+        fighters = []
+        champion = _first(_FIRST_FIGHTER, category_section)
+        if champion is not None:
+            fighter_data = _extract_ranked_fighter(champion, is_champion=True)
+            if fighter_data:
+                fighters.append(fighter_data)
+
+        for fighter in _NEXT_FIGHTERS(category_section):
+            fighter_data = _extract_ranked_fighter(fighter, is_champion=False)
+            if fighter_data:
+                fighters.append(fighter_data)
+
+        if fighters:
+            categories[category_name] = fighters
+
+    return categories
+
+
+def _extract_ranked_fighter(fighter_element, is_champion: bool) -> Optional[Dict]:
+    """Данные бойца из блока рейтинга (как UFCRankingsParser._extract_fighter_data)"""
+    name_elem = _first(_FIGHTER_NAME, fighter_element)
+    if name_elem is None:
+        return None
+
+    name = _text(name_elem)
+    if not name:
+        return None
+
+    profile_url = None
+    link_elem = _first(_LINK, fighter_element)
+    if link_elem is not None and link_elem.get('href'):
+        profile_url = link_elem.get('href')
+        if not profile_url.startswith('http'):
+            profile_url = f"https://fight.ru{profile_url}"
+
+    if is_champion:
+        rank = 'Ч'
+        rank_position = 0
+    else:
+        number_elem = _first(_FIGHTER_NUMBER, fighter_element)
+        if number_elem is None:
+            return None
+
+        rank = _text(number_elem)
+        try:
+            rank_position = int(rank)
+        except ValueError:
+            rank_position = None
+
+    move_info = ""
+    move_elem = _first(_MOVE, fighter_element)
+    if move_elem is not None:
+        move_text = _text(move_elem)
+        move_classes = (move_elem.get('class') or '').split()
+        if 'up' in move_classes:
+            move_info = f"↑{move_text}"
+        elif 'down' in move_classes:
+            move_info = f"↓{move_text}"
+
+    return {
+        'name': name,
+        'rank': rank,
+        'rank_position': rank_position,
+        'is_champion': is_champion,
+        'profile_url': profile_url,
+        'move_info': move_info
+    }
+
+
+def extract_profile(root) -> Dict[str, str]:
+    """Профиль бойца из корня документа (результат как у extract_profile_data)"""
+    # Изображение: первый селектор, у найденного элемента которого есть значение
+    image_url = ''
+    for xpath, attribute in _IMAGE_SELECTORS:
+        element = _first(xpath, root)
+        if element is not None and element.get(attribute):
+            image_url = element.get(attribute)
+            break
+
+    # Имена
+    element = _first(_NAME_RU, root)
+    name_ru = _text(element) if element is not None else ''
+    element = _first(_NAME_EN, root)
+    name_en = _text(element) if element is not None else ''
+
+    if not name_ru:
+        element = _first(_FIRST_HEADING, root)
+        if element is not None:
+            name_ru = _text(element)
+
+    if not name_en:
+        for xpath in _NAME_EN_CANDIDATES:
+            element = _first(xpath, root)
+            text = _text(element) if element is not None else ''
+            if text and len(text) < 50 and re.search(r'^[A-Za-z\s\.\-\']+$', text):
+                name_en = text
+                break
+
+    # Страна и флаг
+    element = _first(_COUNTRY_NAME, root)
+    country_name = _text(element) if element is not None else ''
+    country_flag = ''
+    element = _first(_COUNTRY_FLAG, root)
+    if element is not None:
+        flag_img = _first(_FIRST_IMG, element)
+        if flag_img is not None and flag_img.get('src'):
+            country_flag = flag_img.get('src')
+
+    # Боевой рекорд
+    element = _first(_FIGHT_SCORE, root)
+    fight_score = _text(element) if element is not None else ''
+
+    # Физические данные из <li><span class="text">Label</span><span class="sub">Value</span></li>
+    height = weight = reach = age = nickname = ''
+    for li in _LIST_ITEMS(root):
+        text_span = _first(_SPAN_TEXT, li)
+        sub_span = _first(_SPAN_SUB, li)
+        if text_span is None or sub_span is None:
+            continue
+
+        label = _text(text_span)
+        value = _text(sub_span)
+        if not label or not value or len(value) > 100:
+            continue
+
+        label_lower = label.lower()
+        if 'рост' in label_lower and 'вес' in label_lower:
+            if ' / ' in value:
+                parts = value.split(' / ')
+                if len(parts) >= 2:
+                    height = parts[0].strip()
+                    weight = parts[1].strip()
+        elif 'рост' in label_lower:
+            height = value
+        elif 'вес' in label_lower:
+            weight = value
+        elif 'размах рук' in label_lower:
+            reach = value
+        elif 'возраст' in label_lower:
+            age = value
+        elif 'ник' in label_lower:
+            nickname = value
+
+    # Дополнительный поиск в meta тегах
+    if not height:
+        element = _first(_META_HEIGHT, root)
+        if element is not None and element.get('content'):
+            height = _clean(element.get('content'))
+
+    if not weight:
+        element = _first(_META_WEIGHT, root)
+        if element is not None and element.get('content'):
+            weight = _clean(element.get('content'))
+
+    if not age:
+        element = _first(_META_BIRTH_DATE, root)
+        if element is not None and element.get('content'):
+            age = element.get('content')
+
+    return {
+        'image_url': image_url,
+        'name_ru': name_ru,
+        'name_en': name_en,
+        'country_name': country_name,
+        'country_flag': country_flag,
+        'fight_score': fight_score,
+        'height': height,
+        'weight': weight,
+        'reach': reach,
+        'age': age,
+        'nickname': nickname,
+    }
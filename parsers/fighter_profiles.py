@@ -3,23 +3,55 @@
 Парсер профилей бойцов UFC
 """
 
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from typing import Dict, List, Optional
 from bs4 import BeautifulSoup
+from sqlalchemy.orm import joinedload
 from .base_parser import BaseParser
+from .fast_extract import extract_profile, parse_document
 from database.models import Fighter, FightRecord
 from database.config import SessionLocal
+from database.versions import bump_data_version, invalidate as invalidate_cache
+
+
+def _extract_profile_in_worker(profile_html: str) -> Optional[Dict[str, str]]:
+    """
+    Разбирает профиль в процессе пула через fast_extract.
+
+    В процесс передается только HTML: парсер с его транспортом и кэшем
+    не создается. None - lxml не разобрал строку, такую страницу
+    разбирает текущий процесс через BeautifulSoup.
+    """
+    root = parse_document(profile_html)
+    return extract_profile(root) if root is not None else None
 
 
 class FighterProfilesParser(BaseParser):
     """Парсер профилей бойцов"""
     
-    def __init__(self, cache_dir: str = ".cache/fighters"):
+    # Профили меняются редко (после боев)
+    cache_ttl = 7 * 24 * 3600
+    
+    # 'lxml' - быстрый разбор скомпилированными XPath, 'soup' - через BeautifulSoup
+    extraction_engine = 'lxml'
+    
+    def __init__(self, cache_dir: str = ".cache/fighters", fetch_workers: int = 8,
+                 parse_workers: Optional[int] = None):
         super().__init__(cache_dir)
         self.base_url = "https://fight.ru"
+        self.fetch_workers = fetch_workers  # Потоков для загрузки страниц
+        self.parse_workers = parse_workers or os.cpu_count() or 1  # Процессов для разбора HTML
     
     def extract_profile_data(self, profile_html: str) -> Dict[str, str]:
         """Извлекает данные профиля из HTML"""
+        if self.extraction_engine == 'lxml':
+            root = parse_document(profile_html)
+            if root is not None:
+                return extract_profile(root)
+        
         soup = self.parse_html(profile_html)
         
         # Изображение
@@ -212,24 +244,68 @@ class FighterProfilesParser(BaseParser):
         
         return self.extract_profile_data(html)
     
-    def update_fighters_from_rankings(self) -> None:
-        """Обновляет профили бойцов из рейтингов"""
+    def parse_fighter_profiles(self, profile_urls: List[str]) -> Dict[str, Dict]:
+        """
+        Загружает и разбирает профили пачкой.
+        
+        Страницы загружаются параллельно (fetch_many), HTML разбирается
+        в пуле процессов. Возвращает словарь URL -> данные профиля для
+        успешно загруженных страниц.
+        """
+        pages = self.fetch_many(profile_urls, max_workers=self.fetch_workers)
+        pages = {url: html for url, html in pages.items() if html}
+        print(f"   📥 Загружено страниц: {len(pages)}/{len(profile_urls)}")
+        
+        urls = list(pages)
+        htmls = [pages[url] for url in urls]
+        
+        # Для пары страниц запуск процессов дороже самого разбора
+        if self.extraction_engine == 'lxml' and self.parse_workers > 1 and len(htmls) > self.parse_workers:
+            try:
+                with ProcessPoolExecutor(max_workers=self.parse_workers) as executor:
+                    chunksize = max(1, len(htmls) // (self.parse_workers * 4))
+                    profiles = list(executor.map(_extract_profile_in_worker, htmls, chunksize=chunksize))
+                return {
+                    url: profile if profile is not None else self.extract_profile_data(html)
+                    for url, html, profile in zip(urls, htmls, profiles)
+                }
+            except Exception as e:
+                print(f"⚠️ Пул процессов недоступен, разбираем в текущем процессе: {e}")
+        
+        return {url: self.extract_profile_data(html) for url, html in zip(urls, htmls)}
+    
+    def update_fighters_from_rankings(self, limit: Optional[int] = None) -> None:
+        """
+        Обновляет профили бойцов из рейтингов.
+        
+        limit - сколько бойцов обработать за запуск (для порционного
+        обновления планировщиком). Бойцы берутся по давности обновления,
+        а обработанные отмечаются, поэтому профиль, который не удалось
+        загрузить, не блокирует очередь.
+        """
         db = SessionLocal()
         try:
-            # Получаем всех бойцов без полных профилей
-            fighters = db.query(Fighter).filter(
+            # Получаем бойцов без полных профилей (вместе с рекордами)
+            query = db.query(Fighter).options(joinedload(Fighter.fight_record)).filter(
                 Fighter.image_url.is_(None) | (Fighter.image_url == '')
-            ).all()
+            )
+            if limit:
+                query = query.order_by(Fighter.updated_at, Fighter.id).limit(limit)
+            fighters = query.all()
             
             print(f"🔄 Обновляем профили {len(fighters)} бойцов...")
             
-            for i, fighter in enumerate(fighters, 1):
-                print(f"   {i}/{len(fighters)}: {fighter.name_ru}")
-                
-                if not fighter.profile_url:
-                    continue
+            profiles = self.parse_fighter_profiles(
+                [fighter.profile_url for fighter in fighters if fighter.profile_url]
+            )
+            
+            # Все изменения применяются в одной транзакции
+            for fighter in fighters:
+                if limit:
+                    # Обработанные уходят в конец очереди
+                    fighter.updated_at = datetime.utcnow()
                 
-                profile_data = self.parse_fighter_profile(fighter.profile_url)
+                profile_data = profiles.get(fighter.profile_url)
                 if not profile_data:
                     continue
                 
@@ -254,7 +330,10 @@ class FighterProfilesParser(BaseParser):
                 if profile_data.get('fight_score'):
                     self._update_fight_record(fighter, profile_data['fight_score'])
             
+            # Данные бойцов входят в ответ /api/rankings
+            bump_data_version(db, 'rankings')
             db.commit()
+            invalidate_cache('fighters', 'rankings', 'fights')
             print("✅ Профили бойцов обновлены")
             
         except Exception as e:
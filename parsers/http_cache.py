@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Постоянный HTTP-кэш страниц для парсеров
+
+Тела ответов хранятся по SHA-256 содержимого (bodies/ab/abcdef...), поэтому
+одинаковые страницы занимают место один раз. Индекс в SQLite (index.sqlite)
+связывает URL с телом и хранит время загрузки, TTL, ETag/Last-Modified,
+размер и время последнего обращения (для LRU-вытеснения). Там же копятся
+счетчики попаданий, промахов и сэкономленных байт.
+"""
+
+import gzip
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# Файлы старого кэша: имена вида hash(url).html
+LEGACY_FILE_PATTERN = re.compile(r'^-?\d+\.html$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body_digest TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    ttl REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_body_digest ON entries(body_digest);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def url_key(url: str) -> str:
+    """Стабильный (не зависящий от процесса) ключ URL"""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class CachedPage:
+    """Запись кэша: тело страницы и валидаторы для условного запроса"""
+
+    def __init__(self, url: str, body: bytes, fetched_at: float, ttl: float,
+                 etag: Optional[str], last_modified: Optional[str]):
+        self.url = url
+        self.body = body
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, ttl: Optional[float] = None) -> bool:
+        """Свежесть по TTL записи или по переданному (текущей политике парсера)"""
+        return time.time() - self.fetched_at < (self.ttl if ttl is None else ttl)
+
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8')
+
+    def validators(self) -> Dict[str, str]:
+        """Заголовки условного запроса"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """Дисковый HTTP-кэш с индексом в SQLite и LRU-вытеснением по размеру"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 200 * 1024 * 1024, compress: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.bodies_dir = self.cache_dir / "bodies"
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+        # Одно соединение на кэш, доступ из потоков fetch_many - под блокировкой
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._remove_legacy_files()
+
+    def _remove_legacy_files(self) -> None:
+        """Удаляет файлы старого кэша, которые больше никогда не будут прочитаны"""
+        for path in self.cache_dir.glob("*.html"):
+            if LEGACY_FILE_PATTERN.match(path.name):
+                path.unlink(missing_ok=True)
+
+    def _body_path(self, digest: str, compressed: bool) -> Path:
+        suffix = ".html.gz" if compressed else ".html"
+        return self.bodies_dir / digest[:2] / f"{digest}{suffix}"
+
+    def _count(self, name: str, value: int = 1) -> None:
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, value)
+        )
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Возвращает запись кэша (в том числе устаревшую) или None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body_digest, fetched_at, ttl, etag, last_modified, compressed "
+                "FROM entries WHERE url_key = ?",
+                (url_key(url),)
+            ).fetchone()
+            if row is None:
+                return None
+
+            digest, fetched_at, ttl, etag, last_modified, compressed = row
+            path = self._body_path(digest, bool(compressed))
+            try:
+                body = path.read_bytes()
+            except FileNotFoundError:
+                self._conn.execute("DELETE FROM entries WHERE url_key = ?", (url_key(url),))
+                self._conn.commit()
+                return None
+
+            if compressed:
+                body = gzip.decompress(body)
+            return CachedPage(url, body, fetched_at, ttl, etag, last_modified)
+
+    def record_hit(self, page: CachedPage, revalidated: bool = False) -> None:
+        """Отмечает ответ из кэша (revalidated - после ответа 304)"""
+        with self._lock:
+            now = time.time()
+            if revalidated:
+                # 304: страница снова свежая
+                self._conn.execute(
+                    "UPDATE entries SET fetched_at = ?, last_access = ? WHERE url_key = ?",
+                    (now, now, url_key(page.url))
+                )
+                self._count('revalidated')
+            else:
+                self._conn.execute(
+                    "UPDATE entries SET last_access = ? WHERE url_key = ?",
+                    (now, url_key(page.url))
+                )
+            self._count('hits')
+            self._count('bytes_saved', len(page.body))
+            self._conn.commit()
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self._count('misses')
+            self._conn.commit()
+
+    def put(self, url: str, body: bytes, ttl: float, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """Сохраняет ответ и при необходимости вытесняет давно не читавшиеся записи"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._body_path(digest, self.compress)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = gzip.compress(body) if self.compress else body
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+        size = path.stat().st_size
+
+        with self._lock:
+            now = time.time()
+            previous = self._conn.execute(
+                "SELECT body_digest, compressed FROM entries WHERE url_key = ?", (url_key(url),)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url_key, url, body_digest, fetched_at, last_access, ttl, etag, last_modified, size, compressed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url_key(url), url, digest, now, now, ttl, etag, last_modified, size, int(self.compress))
+            )
+            if previous and previous[0] != digest:
+                self._drop_body_if_unused(*previous)
+            self._evict()
+            self._conn.commit()
+
+    def _drop_body_if_unused(self, digest: str, compressed: int) -> bool:
+        """Удаляет файл тела, если на него больше не ссылается ни одна запись"""
+        used = self._conn.execute(
+            "SELECT 1 FROM entries WHERE body_digest = ? AND compressed = ? LIMIT 1", (digest, compressed)
+        ).fetchone()
+        if used:
+            return False
+        self._body_path(digest, bool(compressed)).unlink(missing_ok=True)
+        return True
+
+    def _total_size(self) -> int:
+        """Размер тел на диске (одинаковые тела считаются один раз)"""
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body_digest, compressed, size FROM entries)"
+        ).fetchone()[0]
+
+    def _evict(self) -> None:
+        """Вытесняет записи с самым старым обращением, пока кэш больше max_bytes"""
+        total = self._total_size()
+        if total <= self.max_bytes:
+            return
+
+        for key, digest, compressed, size in self._conn.execute(
+            "SELECT url_key, body_digest, compressed, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE url_key = ?", (key,))
+            self._count('evicted')
+            if self._drop_body_if_unused(digest, compressed):
+                total -= size
+
+    def stats(self) -> Dict:
+        """Статистика кэша"""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total_size = self._total_size()
+
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        requests_total = hits + misses
+
+        return {
+            'total_files': entries,
+            'total_size_bytes': total_size,
+            'total_size_mb': round(total_size / (1024 * 1024), 2),
+            'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+            'hits': hits,
+            'misses': misses,
+            'revalidated': counters.get('revalidated', 0),
+            'evicted': counters.get('evicted', 0),
+            'hit_ratio': round(hits / requests_total, 3) if requests_total else 0.0,
+            'bytes_saved': counters.get('bytes_saved', 0),
+            'compressed': self.compress,
+            'cache_dir': str(self.cache_dir)
+        }
+
+    def clear(self) -> None:
+        """Удаляет все записи, тела и счетчики"""
+        with self._lock:
+            for path in self.bodies_dir.glob("*/*.html*"):
+                path.unlink(missing_ok=True)
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM counters")
+            self._conn.commit()
+        self._remove_legacy_files()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Инкрементальная загрузка CSV: условные запросы и отпечатки строк
+
+Рядом с загруженным файлом в папке кэша парсера хранятся:
+  - validators.json - ETag/Last-Modified последней загрузки каждого файла;
+  - <файл>.fingerprints.npy - отпечатки строк, уже загруженных в БД.
+При ответе 304 файл берется из кэша, а по отпечаткам определяются новые
+и измененные строки, которые только и передаются в импорт.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def row_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """64-битный отпечаток содержимого каждой строки (без учета индекса)"""
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+class IncrementalCsv:
+    """Условная загрузка CSV и выделение измененных строк"""
+
+    def __init__(self, transport, state_dir: Path):
+        self.transport = transport  # parsers.transport.Transport (лимиты хоста и повторы)
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.validators_file = self.state_dir / "validators.json"
+        self.validators = self._load_validators()
+        # Отпечатки, которые будут сохранены после успешного импорта
+        self._pending: Dict[str, np.ndarray] = {}
+
+    def _load_validators(self) -> Dict[str, Dict]:
+        """Загружает сохраненные ETag/Last-Modified"""
+        try:
+            with open(self.validators_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_validators(self) -> None:
+        """Сохраняет ETag/Last-Modified"""
+        with open(self.validators_file, 'w', encoding='utf-8') as f:
+            json.dump(self.validators, f, ensure_ascii=False, indent=2)
+
+    def fetch(self, url: str, filename: str, timeout: int = 30) -> Optional[pd.DataFrame]:
+        """
+        Загружает CSV условным запросом.
+
+        Возвращает полный DataFrame: при 304 - из ранее сохраненного файла.
+        None, если сервер ответил ошибкой.
+        """
+        path = self.state_dir / filename
+        saved = self.validators.get(filename, {})
+
+        headers = {}
+        if path.exists() and saved.get('url') == url:
+            if saved.get('etag'):
+                headers['If-None-Match'] = saved['etag']
+            if saved.get('last_modified'):
+                headers['If-Modified-Since'] = saved['last_modified']
+
+        response = self.transport.get(url, headers=headers, timeout=timeout)
+
+        if response.status_code == 304:
+            print(f"    ♻️ {filename} не изменился, используем сохраненную копию")
+            return pd.read_csv(path)
+
+        if response.status_code != 200:
+            return None
+
+        path.write_bytes(response.content)
+        self.validators[filename] = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        self._save_validators()
+
+        return pd.read_csv(path)
+
+    def _fingerprints_file(self, filename: str) -> Path:
+        return self.state_dir / f"{filename}.fingerprints.npy"
+
+    def changed_rows(self, filename: str, df: pd.DataFrame,
+                     group_by: Optional[List[str]] = None) -> pd.Series:
+        """
+        Маска новых и измененных строк по сравнению с последним импортом.
+
+        С group_by строки сравниваются группами: если изменилась хотя бы
+        одна строка группы, в маску попадает вся группа.
+        """
+        fingerprints = row_fingerprints(df)
+        if group_by:
+            # Сумма по модулю 2^64 не зависит от порядка строк в группе
+            fingerprints = fingerprints.groupby([df[column] for column in group_by], sort=False).transform('sum')
+
+        path = self._fingerprints_file(filename)
+        previous = np.load(path) if path.exists() else np.empty(0, dtype=np.uint64)
+
+        self._pending[filename] = fingerprints.unique()
+        return ~fingerprints.isin(previous)
+
+    def commit(self) -> None:
+        """Запоминает отпечатки импортированных строк (вызывать после успешного импорта)"""
+        for filename, fingerprints in self._pending.items():
+            np.save(self._fingerprints_file(filename), fingerprints.astype(np.uint64))
+        self._pending.clear()
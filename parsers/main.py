@@ -141,6 +141,11 @@ def main():
             init_database()
             official_parser = UFCOfficialAPIParser()
             official_parser.parse()
+        elif command == "schedule":
+            # Постоянный процесс с расписанием по наборам данных
+            from parsers.scheduler import Scheduler
+            init_database()
+            Scheduler().run_forever()
         elif command == "stats":
             # Только ufc.stats
             print("🥊 UFC Stats Parser")
@@ -156,6 +161,7 @@ def main():
             print("  python main.py rankings  - только рейтинги")
             print("  python main.py profiles  - только профили")
             print("  python main.py cards     - только карды")
+            print("  python main.py schedule  - планировщик обновлений (постоянный процесс)")
     else:
         # По умолчанию запускаем улучшенные парсеры
         run_enhanced_parsers()
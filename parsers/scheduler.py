@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Планировщик обновления данных (долгоживущий процесс)
+
+У каждого набора данных свой интервал:
+  - rankings       - раз в неделю;
+  - upcoming_cards - раз в час, чаще за несколько дней до турнира;
+  - profiles       - каждые полчаса порцией бойцов без профиля;
+  - ufc_stats      - раз в сутки, через очередь фоновых задач API (backend/jobs.py).
+
+Время следующего запуска сдвигается на случайную долю интервала (jitter),
+чтобы задачи не сходились в одну минуту. Состояние задач хранится в таблице
+scheduled_jobs: запуск пропущенной, пока процесс не работал, задачи
+выполняется один раз после старта (пропущенные запуски не копятся),
+а аренда running_until не дает запустить задачу повторно, пока она
+выполняется - в том числе из второго процесса планировщика. Задачи
+запускаются по одной и не чаще, чем раз в start_spacing секунд, поэтому
+нагрузка на БД распределяется во времени.
+
+Запуск:
+    python parsers/scheduler.py              # работать постоянно
+    python parsers/scheduler.py --once       # выполнить просроченные задачи и выйти
+    python parsers/scheduler.py --run rankings
+Состояние задач: GET /api/scheduler/status
+"""
+
+import argparse
+import random
+import signal
+import sys
+import os
+import threading
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, or_
+
+# Добавляем корневую папку в путь для импорта
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config import SessionLocal, init_database
+from database.models import Event, ScheduledJob
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Сколько бойцов обновлять за один запуск задачи profiles
+PROFILES_BATCH = 50
+
+# Через сколько повторять задачу, завершившуюся ошибкой (если интервал больше)
+RETRY_AFTER_ERROR = 15 * MINUTE
+
+
+def run_rankings() -> None:
+    from parsers.ufc_rankings import UFCRankingsParser
+    UFCRankingsParser().parse()
+
+
+def run_upcoming_cards() -> None:
+    from parsers.upcoming_cards import UpcomingCardsParser
+    UpcomingCardsParser().parse()
+
+
+def run_profiles() -> None:
+    from parsers.fighter_profiles import FighterProfilesParser
+    FighterProfilesParser().update_fighters_from_rankings(limit=PROFILES_BATCH)
+
+
+def run_ufc_stats() -> None:
+    # Через очередь фоновых задач API: если импорт уже запущен из
+    # POST /api/refresh-ufc-stats, дожидаемся его, а не запускаем второй
+    from backend import jobs
+    job, created = jobs.enqueue('ufc_stats')
+    if not created:
+        print(f"⏳ ufc_stats: ждем уже идущую задачу {job.id}")
+    job = jobs.wait_job(job.id)
+    if job is None or job.status != 'done':
+        raise RuntimeError(f"Не удалось обновить данные ufc.stats: {job.error if job else 'задача не найдена'}")
+
+
+def upcoming_cards_interval(db) -> float:
+    """Интервал обновления кардов: чем ближе турнир, тем чаще"""
+    next_event = db.query(func.min(Event.date)).filter(Event.date >= date.today()).scalar()
+    if next_event is None:
+        return HOUR
+
+    days_left = (next_event - date.today()).days
+    if days_left <= 1:
+        return 15 * MINUTE
+    if days_left <= 3:
+        return 30 * MINUTE
+    return HOUR
+
+
+class Job:
+    """Периодическая задача планировщика"""
+
+    def __init__(self, name: str, run: Callable[[], None], interval: float, jitter: float = 0.1,
+                 timeout: float = 2 * HOUR, interval_fn: Optional[Callable] = None):
+        self.name = name
+        self.run = run
+        self.interval = interval        # Базовый интервал между запусками, с
+        self.jitter = jitter            # Случайный сдвиг: доля интервала в обе стороны
+        self.timeout = timeout          # Срок аренды: после него зависшая задача считается завершенной
+        self.interval_fn = interval_fn  # Интервал, зависящий от данных (например, от даты турнира)
+
+    def next_delay(self, db, failed: bool = False) -> float:
+        """Через сколько секунд запустить задачу снова"""
+        interval = self.interval_fn(db) if self.interval_fn else self.interval
+        if failed:
+            interval = min(interval, RETRY_AFTER_ERROR)
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+DEFAULT_JOBS = [
+    Job('rankings', run_rankings, interval=7 * DAY, jitter=0.05),
+    Job('upcoming_cards', run_upcoming_cards, interval=HOUR, interval_fn=upcoming_cards_interval),
+    Job('profiles', run_profiles, interval=30 * MINUTE, jitter=0.2),
+    Job('ufc_stats', run_ufc_stats, interval=DAY, timeout=4 * HOUR),
+]
+
+
+class Scheduler:
+    """Запускает задачи по расписанию из таблицы scheduled_jobs"""
+
+    def __init__(self, jobs: List[Job] = None, tick: float = 30.0, max_concurrent: int = 1,
+                 start_spacing: float = 60.0):
+        self.jobs: Dict[str, Job] = {job.name: job for job in (jobs or DEFAULT_JOBS)}
+        self.tick = tick                      # Как часто проверять расписание, с
+        self.max_concurrent = max_concurrent  # Сколько задач может выполняться одновременно
+        self.start_spacing = start_spacing    # Минимальная пауза между запусками задач, с
+
+        self._threads: Dict[str, threading.Thread] = {}
+        self._last_start = 0.0
+        self._stop = threading.Event()
+
+    def ensure_jobs(self) -> None:
+        """Создает записи для новых задач (первый запуск - сразу)"""
+        db = SessionLocal()
+        try:
+            existing = {name for (name,) in db.query(ScheduledJob.name).all()}
+            for name in self.jobs:
+                if name not in existing:
+                    db.add(ScheduledJob(name=name, next_run_at=datetime.utcnow(), runs=0, failures=0))
+            db.commit()
+        finally:
+            db.close()
+
+    def due_jobs(self) -> List[str]:
+        """Задачи, время которых пришло и которые не выполняются (самые просроченные первыми)"""
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            rows = db.query(ScheduledJob.name).filter(
+                ScheduledJob.name.in_(list(self.jobs)),
+                ScheduledJob.next_run_at <= now,
+                or_(ScheduledJob.running_until.is_(None), ScheduledJob.running_until < now)
+            ).order_by(ScheduledJob.next_run_at).all()
+            return [name for (name,) in rows]
+        finally:
+            db.close()
+
+    def _claim(self, name: str) -> bool:
+        """Берет аренду задачи; False, если задачу уже выполняет другой процесс"""
+        job = self.jobs[name]
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            claimed = db.query(ScheduledJob).filter(
+                ScheduledJob.name == name,
+                or_(ScheduledJob.running_until.is_(None), ScheduledJob.running_until < now)
+            ).update(
+                {
+                    ScheduledJob.running_until: now + timedelta(seconds=job.timeout),
+                    ScheduledJob.last_started_at: now
+                },
+                synchronize_session=False
+            )
+            db.commit()
+            return claimed == 1
+        finally:
+            db.close()
+
+    def _execute(self, name: str) -> bool:
+        """Выполняет задачу, взятую в аренду, и планирует следующий запуск"""
+        job = self.jobs[name]
+        print(f"▶️ {name}: запуск")
+        started = time.monotonic()
+        error = None
+        try:
+            job.run()
+        except Exception:
+            error = traceback.format_exc()
+            print(f"❌ {name}: ошибка\n{error}")
+        duration = time.monotonic() - started
+
+        db = SessionLocal()
+        try:
+            next_run_at = datetime.utcnow() + timedelta(seconds=job.next_delay(db, failed=error is not None))
+            db.query(ScheduledJob).filter(ScheduledJob.name == name).update(
+                {
+                    ScheduledJob.running_until: None,
+                    ScheduledJob.last_finished_at: datetime.utcnow(),
+                    ScheduledJob.last_status: 'error' if error else 'ok',
+                    ScheduledJob.last_error: error,
+                    ScheduledJob.last_duration: round(duration, 2),
+                    ScheduledJob.next_run_at: next_run_at,
+                    ScheduledJob.runs: ScheduledJob.runs + 1,
+                    ScheduledJob.failures: ScheduledJob.failures + (1 if error else 0)
+                },
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        print(f"{'✅' if error is None else '⚠️'} {name}: {duration:.1f} с, следующий запуск {next_run_at:%Y-%m-%d %H:%M} UTC")
+        return error is None
+
+    def run_pending(self) -> Optional[str]:
+        """Запускает в фоне одну просроченную задачу, если позволяют лимиты. Возвращает ее имя"""
+        self._threads = {name: thread for name, thread in self._threads.items() if thread.is_alive()}
+        if len(self._threads) >= self.max_concurrent:
+            return None
+        if time.monotonic() - self._last_start < self.start_spacing:
+            return None
+
+        for name in self.due_jobs():
+            if name in self._threads or not self._claim(name):
+                continue
+            thread = threading.Thread(target=self._execute, args=(name,), name=f"job-{name}", daemon=True)
+            thread.start()
+            self._threads[name] = thread
+            self._last_start = time.monotonic()
+            return name
+        return None
+
+    def run_once(self) -> None:
+        """Выполняет все просроченные задачи по очереди и возвращается (для cron)"""
+        for name in self.due_jobs():
+            if self._claim(name):
+                self._execute(name)
+
+    def run_now(self, name: str) -> bool:
+        """Немедленно выполняет задачу, если она не выполняется где-то еще"""
+        if not self._claim(name):
+            print(f"⏳ {name}: уже выполняется")
+            return False
+        return self._execute(name)
+
+    def stop(self, *args) -> None:
+        """Останавливает цикл (выполняющиеся задачи дорабатывают)"""
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        """Главный цикл планировщика"""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        self.ensure_jobs()
+        print(f"🕒 Планировщик запущен: {', '.join(self.jobs)}")
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.tick)
+
+        print("⏹️ Планировщик останавливается, ждем выполняющиеся задачи...")
+        for thread in self._threads.values():
+            thread.join()
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description="Планировщик обновления данных UFC")
+    arg_parser.add_argument('--once', action='store_true', help="выполнить просроченные задачи и выйти")
+    arg_parser.add_argument('--run', choices=[job.name for job in DEFAULT_JOBS], help="выполнить задачу сейчас")
+    args = arg_parser.parse_args()
+
+    init_database()
+    scheduler = Scheduler()
+    scheduler.ensure_jobs()
+
+    if args.run:
+        sys.exit(0 if scheduler.run_now(args.run) else 1)
+    elif args.once:
+        scheduler.run_once()
+    else:
+        scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Здоровье источников данных: EWMA успешности и задержки, автоматические выключатели
+
+Для каждого источника хранится экспоненциально сглаженная доля успешных
+ответов и время ответа. По ним оценивается ожидаемое время до получения
+данных: задержка / вероятность успеха (в среднем столько попыток нужно,
+чтобы дождаться данных). После failure_threshold ошибок подряд источник
+выключается на cooldown секунд, при повторных срабатываниях пауза
+удваивается (до max_cooldown). Когда пауза истекает, источник получает
+одну пробную попытку: успех возвращает его в работу, ошибка снова выключает.
+Пробную попытку забирает первый вызвавший acquire, остальные получают отказ,
+пока ее результат не учтен в record (или не прошло probe_timeout секунд,
+если попытка так и не завершилась).
+
+Состояние хранится в JSON-файле и переживает перезапуск процесса.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+# Нижняя граница вероятности успеха при оценке ожидаемого времени
+MIN_SUCCESS = 0.05
+
+
+class SourceHealth:
+    """EWMA успешности и задержки источников с выключателями, сохраняется в JSON"""
+
+    def __init__(self, path, alpha: float = 0.3, failure_threshold: int = 3,
+                 cooldown: float = 600.0, max_cooldown: float = 6 * 3600.0, probe_timeout: float = 300.0):
+        self.path = Path(path)
+        self.alpha = alpha                          # Вес нового наблюдения в EWMA
+        self.failure_threshold = failure_threshold  # Ошибок подряд до выключения
+        self.cooldown = cooldown                    # Первая пауза выключенного источника, с
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout          # Через сколько секунд незавершенная проба считается потерянной
+        self._lock = threading.Lock()
+        # Источник -> время начала идущей пробной попытки (только в памяти процесса)
+        self._probes: Dict[str, float] = {}
+        self.sources: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        """Загружает сохраненное состояние"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        """Сохраняет состояние (запись через временный файл)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.sources, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(self.path)
+
+    def record(self, name: str, success: bool, latency: float) -> None:
+        """Учитывает результат обращения к источнику"""
+        with self._lock:
+            now = time.time()
+            state = self.sources.get(name)
+            if state is None:
+                # Первое наблюдение задает начальные значения EWMA
+                state = {'success': float(success), 'latency': latency, 'requests': 0,
+                         'failures_in_row': 0, 'trips': 0, 'open_until': None}
+                self.sources[name] = state
+            else:
+                state['success'] += self.alpha * (float(success) - state['success'])
+                state['latency'] += self.alpha * (latency - state['latency'])
+
+            state['requests'] += 1
+            state['last_request'] = now
+            self._probes.pop(name, None)
+
+            if success:
+                state['failures_in_row'] = 0
+                state['trips'] = 0
+                state['open_until'] = None
+            else:
+                state['failures_in_row'] += 1
+                if state['failures_in_row'] >= self.failure_threshold:
+                    # Выключаем; пробная попытка после паузы, при новой ошибке пауза дольше
+                    pause = min(self.max_cooldown, self.cooldown * 2 ** state['trips'])
+                    state['open_until'] = now + pause
+                    state['trips'] += 1
+
+            self._save()
+
+    def _probe_running(self, name: str, now: float) -> bool:
+        started = self._probes.get(name)
+        return started is not None and now - started < self.probe_timeout
+
+    def available(self, name: str) -> bool:
+        """Можно ли обращаться к источнику (выключатель замкнут или пауза истекла и проба не идет)"""
+        state = self.sources.get(name)
+        if not state or not state['open_until']:
+            return True
+        now = time.time()
+        return now >= state['open_until'] and not self._probe_running(name, now)
+
+    def acquire(self, name: str) -> bool:
+        """
+        Разрешение на обращение к источнику непосредственно перед запросом.
+
+        При замкнутом выключателе разрешено всегда. После паузы разрешение
+        получает только один вызывающий (пробная попытка); его результат
+        нужно передать в record, иначе проба освобождается через release
+        или по probe_timeout.
+        """
+        with self._lock:
+            state = self.sources.get(name)
+            if not state or not state['open_until']:
+                return True
+            now = time.time()
+            if now < state['open_until'] or self._probe_running(name, now):
+                return False
+            self._probes[name] = now
+            return True
+
+    def release(self, name: str) -> None:
+        """Освобождает пробную попытку, которая не была выполнена"""
+        with self._lock:
+            self._probes.pop(name, None)
+
+    def success_rate(self, name: str) -> float:
+        state = self.sources.get(name)
+        return round(state['success'], 3) if state else 0.0
+
+    def expected_time(self, name: str) -> float:
+        """Ожидаемое время до получения данных, с (0 для еще не опрошенного источника)"""
+        state = self.sources.get(name)
+        if not state:
+            return 0.0
+        return state['latency'] / max(state['success'], MIN_SUCCESS)
+
+    def order(self, names: Iterable[str]) -> List[str]:
+        """Доступные источники по возрастанию ожидаемого времени (сортировка устойчивая)"""
+        return sorted((name for name in names if self.available(name)), key=self.expected_time)
+
+    def status(self, name: str) -> Dict:
+        """Состояние источника для отчетов и API"""
+        state = self.sources.get(name)
+        if not state:
+            return {'state': 'unknown', 'requests': 0}
+
+        open_until = state['open_until']
+        if not open_until:
+            breaker = 'closed'
+        elif time.time() < open_until:
+            breaker = 'open'
+        else:
+            breaker = 'half_open'
+
+        return {
+            'state': breaker,
+            'success_ewma': round(state['success'], 3),
+            'latency_ewma': round(state['latency'], 3),
+            'expected_time': round(self.expected_time(name), 3),
+            'requests': state['requests'],
+            'failures_in_row': state['failures_in_row'],
+            'open_until': datetime.fromtimestamp(open_until).isoformat() if open_until else None
+        }
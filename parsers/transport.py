@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Общий HTTP-транспорт для всех парсеров
+
+Одна сессия requests на процесс: соединения с каждым хостом держатся
+открытыми (keep-alive) в отдельном пуле urllib3. Для каждого хоста
+действует token bucket (средняя частота и допустимый всплеск) и
+ограничение одновременных запросов. Неудачные запросы повторяются
+с экспоненциальной паузой со случайным разбросом (full jitter).
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Коды ответа, при которых запрос повторяется
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Лимиты по хостам: запросов в секунду, всплеск, одновременных запросов
+DEFAULT_HOST_LIMIT = (5.0, 5, 4)
+HOST_LIMITS = {
+    'fight.ru': (10.0, 10, 4),
+    'raw.githubusercontent.com': (5.0, 5, 4),
+    'api.github.com': (1.0, 2, 2),
+}
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в секунду, не больше burst накопленных"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Забирает токен, при необходимости ожидая его. Возвращает время ожидания"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Токен резервируется сразу, даже если его еще нужно дождаться
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HostLimiter:
+    """Частота (token bucket) и число одновременных запросов к одному хосту"""
+
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        self.bucket.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.semaphore.release()
+
+
+class Transport:
+    """Сессия с пулами соединений, лимитами по хостам и повторами"""
+
+    def __init__(self, pool_size: int = 16, max_retries: int = 3, backoff_factor: float = 0.5,
+                 max_backoff: float = 30.0):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        # pool_connections - сколько хостов держать, pool_maxsize - соединений на хост
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._limits = dict(HOST_LIMITS)
+        self._lock = threading.Lock()
+
+    def set_host_limit(self, host: str, rate: float, burst: int, concurrency: int) -> None:
+        """Задает лимиты для хоста (действует на следующие запросы)"""
+        with self._lock:
+            self._limits[host] = (rate, burst, concurrency)
+            self._limiters.pop(host, None)
+
+    def limiter(self, url: str) -> HostLimiter:
+        """Возвращает ограничитель для хоста URL"""
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = HostLimiter(*self._limits.get(host, DEFAULT_HOST_LIMIT))
+                self._limiters[host] = limiter
+            return limiter
+
+    def _backoff(self, attempt: int) -> float:
+        """Пауза перед повтором: случайная в [0, backoff_factor * 2^attempt]"""
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+    def request(self, method: str, url: str, timeout: int = 30, **kwargs) -> requests.Response:
+        """Запрос с лимитами хоста и повторами при сетевых ошибках и 429/5xx"""
+        limiter = self.limiter(url)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with limiter:
+                    response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+
+                retry_after = response.headers.get('Retry-After', '')
+                delay = min(self.max_backoff, float(retry_after)) if retry_after.isdigit() else self._backoff(attempt)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+
+            time.sleep(delay)
+
+    def get(self, url: str, timeout: int = 30, headers: Optional[Dict[str, str]] = None,
+            **kwargs) -> requests.Response:
+        return self.request('GET', url, timeout=timeout, headers=headers, **kwargs)
+
+
+_transport: Optional[Transport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Общий транспорт процесса"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
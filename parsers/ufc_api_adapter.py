@@ -21,6 +21,7 @@ except ImportError:
 
 from database.models import Fighter, WeightClass, Event, Fight, FightRecord, Ranking
 from database.config import SessionLocal
+from database.versions import invalidate as invalidate_cache
 
 
 class UFCAPIAdapter:
@@ -198,6 +199,7 @@ class UFCAPIAdapter:
                 imported_fighters.append(fighter)
         
         self.db.commit()
+        invalidate_cache('fighters')
         print(f"\n🎉 Импорт завершен! Импортировано {len(imported_fighters)} бойцов")
         return imported_fighters
     
@@ -3,13 +3,13 @@
 Парсер официального UFC API
 """
 
-import requests
 import json
 from typing import Dict, List, Optional
 from datetime import datetime
 from .base_parser import BaseParser
 from database.models import Fighter, WeightClass, Ranking, Event, Fight
 from database.config import SessionLocal
+from database.versions import bump_data_version, invalidate as invalidate_cache
 
 
 class UFCOfficialAPIParser(BaseParser):
@@ -30,7 +30,7 @@ class UFCOfficialAPIParser(BaseParser):
         print("🥊 Получение рейтингов с официального UFC API...")
         
         try:
-            response = requests.get(f"{self.base_url}{self.api_endpoints['rankings']}", timeout=30)
+            response = self._get(f"{self.base_url}{self.api_endpoints['rankings']}")
             if response.status_code == 200:
                 data = response.json()
                 return self._parse_rankings_data(data)
@@ -46,7 +46,7 @@ class UFCOfficialAPIParser(BaseParser):
         print("👥 Получение бойцов с официального UFC API...")
         
         try:
-            response = requests.get(f"{self.base_url}{self.api_endpoints['fighters']}", timeout=30)
+            response = self._get(f"{self.base_url}{self.api_endpoints['fighters']}")
             if response.status_code == 200:
                 data = response.json()
                 return self._parse_fighters_data(data)
@@ -62,7 +62,7 @@ class UFCOfficialAPIParser(BaseParser):
         print("🎪 Получение событий с официального UFC API...")
         
         try:
-            response = requests.get(f"{self.base_url}{self.api_endpoints['events']}", timeout=30)
+            response = self._get(f"{self.base_url}{self.api_endpoints['events']}")
             if response.status_code == 200:
                 data = response.json()
                 return self._parse_events_data(data)
@@ -147,6 +147,7 @@ class UFCOfficialAPIParser(BaseParser):
             # Сохраняем рейтинги
             if 'rankings' in data:
                 self._save_rankings(db, data['rankings'])
+                bump_data_version(db, 'rankings')
             
             # Сохраняем бойцов
             if 'fighters' in data:
@@ -157,6 +158,7 @@ class UFCOfficialAPIParser(BaseParser):
                 self._save_events(db, data['events'])
             
             db.commit()
+            invalidate_cache('rankings', 'fighters', 'events')
             print("✅ Данные успешно сохранены в БД")
             
         except Exception as e:
@@ -4,22 +4,42 @@
 """
 
 import re
+import uuid
+from datetime import datetime
 from typing import Dict, List, Optional
 from bs4 import BeautifulSoup
+from sqlalchemy import DateTime, case, delete, func, insert, literal, select
 from .base_parser import BaseParser
-from database.models import Fighter, WeightClass, Ranking, FightRecord
+from .fast_extract import extract_rankings, parse_document
+from database.models import Fighter, WeightClass, Ranking, RankingStaging, FightRecord
 from database.config import SessionLocal
+from database.versions import bump_data_version, invalidate as invalidate_cache
+from database.rankings_history import save_rankings_snapshot
+
+# Категория, в которой бойцов стало меньше этой доли от прежнего, не заменяется
+MIN_CATEGORY_SHARE = 0.5
 
 
 class UFCRankingsParser(BaseParser):
     """Парсер рейтингов UFC"""
     
+    # Рейтинги обновляются раз в неделю, проверяем чаще
+    cache_ttl = 6 * 3600
+    
+    # 'lxml' - быстрый разбор скомпилированными XPath, 'soup' - через BeautifulSoup
+    extraction_engine = 'lxml'
+    
     def __init__(self, cache_dir: str = ".cache/rankings"):
         super().__init__(cache_dir)
         self.base_url = "https://fight.ru/fighter-ratings/ufc/"
     
     def parse_rankings(self, html: str) -> Dict[str, List[Dict]]:
         """Парсит рейтинги из HTML"""
+        if self.extraction_engine == 'lxml':
+            root = parse_document(html)
+            if root is not None:
+                return extract_rankings(root)
+        
         soup = self.parse_html(html)
         categories = {}
         
@@ -120,60 +140,63 @@ class UFCRankingsParser(BaseParser):
         }
     
     def save_to_database(self, categories: Dict[str, List[Dict]]) -> None:
-        """Сохраняет рейтинги в базу данных"""
+        """
+        Сохраняет рейтинги в базу данных и снимок на сегодня в историю рейтингов.
+        
+        Весь набор записывается в rankings_staging одной пакетной вставкой,
+        проверяется и заменяет рейтинги своих категорий в той же транзакции,
+        поэтому читатели видят либо старые, либо новые рейтинги целиком.
+        Число запросов не зависит от числа бойцов.
+        """
+        if not categories:
+            print("⚠️ Нет рейтингов для сохранения")
+            return
+        
         db = SessionLocal()
         try:
+            self._ensure_weight_classes(db, list(categories))
+            profile_urls = {}
+            for fighters in categories.values():
+                for fighter_data in fighters:
+                    profile_urls.setdefault(fighter_data['name'], fighter_data.get('profile_url'))
+            fighter_ids = self._ensure_fighters(db, profile_urls)
+            
+            # Один боец встречается в категории один раз (первое вхождение)
+            staged = {}
             for category_name, fighters in categories.items():
-                # Создаем или получаем весовую категорию
-                weight_class = db.query(WeightClass).filter(
-                    WeightClass.name_ru == category_name
-                ).first()
-                
-                if not weight_class:
-                    weight_class = WeightClass(
-                        name_ru=category_name,
-                        name_en=self._translate_category_name(category_name),
-                        gender=self._detect_gender(category_name),
-                        is_p4p='p4p' in category_name.lower()
-                    )
-                    db.add(weight_class)
-                    db.flush()
-                
-                # Обрабатываем каждого бойца
                 for fighter_data in fighters:
-                    # Создаем или получаем бойца
-                    fighter = db.query(Fighter).filter(
-                        Fighter.name_ru == fighter_data['name']
-                    ).first()
-                    
-                    if not fighter:
-                        fighter = Fighter(
-                            name_ru=fighter_data['name'],
-                            profile_url=fighter_data.get('profile_url')
-                        )
-                        db.add(fighter)
-                        db.flush()
-                    
-                    # Создаем или обновляем рейтинг
-                    ranking = db.query(Ranking).filter(
-                        Ranking.fighter_id == fighter.id,
-                        Ranking.weight_class_id == weight_class.id
-                    ).first()
-                    
-                    if not ranking:
-                        ranking = Ranking(
-                            fighter_id=fighter.id,
-                            weight_class_id=weight_class.id,
-                            rank_position=fighter_data.get('rank_position'),
-                            is_champion=fighter_data['is_champion']
-                        )
-                        db.add(ranking)
-                    else:
-                        ranking.rank_position = fighter_data.get('rank_position')
-                        ranking.is_champion = fighter_data['is_champion']
+                    staged.setdefault((category_name, fighter_ids[fighter_data['name']]), fighter_data)
+            
+            batch_id = uuid.uuid4().hex
+            db.execute(insert(RankingStaging), [
+                {
+                    'batch_id': batch_id,
+                    'weight_class': category_name,
+                    'fighter_id': fighter_id,
+                    'rank_position': fighter_data.get('rank_position'),
+                    'is_champion': fighter_data['is_champion']
+                }
+                for (category_name, fighter_id), fighter_data in staged.items()
+            ])
+            
+            problems = self._validate_staging(db, batch_id)
+            if problems:
+                db.rollback()
+                for problem in problems:
+                    print(f"  ❌ {problem}")
+                print("❌ Рейтинги не прошли проверку, в БД оставлены прежние")
+                return
             
+            self._swap_rankings(db, batch_id)
+            
+            # Снимок в историю и rank_change относительно предыдущего снимка
+            save_rankings_snapshot(db, datetime.utcnow().date(), categories.keys())
+            
+            # Новая версия рейтингов инвалидирует снапшот /api/rankings
+            bump_data_version(db, 'rankings')
             db.commit()
-            print(f"✅ Сохранено {len(categories)} категорий в БД")
+            invalidate_cache('rankings', 'fighters')
+            print(f"✅ Сохранено {len(categories)} категорий в БД ({len(staged)} позиций)")
             
         except Exception as e:
             db.rollback()
@@ -181,6 +204,91 @@ class UFCRankingsParser(BaseParser):
         finally:
             db.close()
     
+    def _ensure_weight_classes(self, db, names: List[str]) -> None:
+        """Создает недостающие весовые категории одной пакетной вставкой"""
+        existing = {name for (name,) in db.query(WeightClass.name_ru).filter(WeightClass.name_ru.in_(names))}
+        missing = [name for name in names if name not in existing]
+        if missing:
+            db.execute(insert(WeightClass), [
+                {
+                    'name_ru': name,
+                    'name_en': self._translate_category_name(name),
+                    'gender': self._detect_gender(name),
+                    'is_p4p': 'p4p' in name.lower()
+                }
+                for name in missing
+            ])
+    
+    def _ensure_fighters(self, db, profile_urls: Dict[str, Optional[str]]) -> Dict[str, int]:
+        """Возвращает словарь имя бойца -> id, создавая недостающих бойцов (имя -> URL профиля)"""
+        names = list(profile_urls)
+        fighter_ids = {}
+        # При однофамильцах используется боец с меньшим id
+        for fighter_id, name_ru in db.query(Fighter.id, Fighter.name_ru).filter(
+            Fighter.name_ru.in_(names)
+        ).order_by(Fighter.id.desc()):
+            fighter_ids[name_ru] = fighter_id
+        
+        missing = [name for name in names if name not in fighter_ids]
+        if missing:
+            db.execute(insert(Fighter), [
+                {'name_ru': name, 'profile_url': profile_urls[name]}
+                for name in missing
+            ])
+            fighter_ids.update(dict(
+                db.query(Fighter.name_ru, Fighter.id).filter(Fighter.name_ru.in_(missing))
+            ))
+        
+        return fighter_ids
+    
+    def _validate_staging(self, db, batch_id: str) -> List[str]:
+        """Проверяет загруженный набор. Возвращает список проблем (пустой - можно заменять)"""
+        staged = db.query(
+            RankingStaging.weight_class,
+            func.count(),
+            func.sum(case((RankingStaging.is_champion == True, 1), else_=0))
+        ).filter(RankingStaging.batch_id == batch_id).group_by(RankingStaging.weight_class).all()
+        
+        current = dict(
+            db.query(Ranking.weight_class, func.count()).filter(
+                Ranking.weight_class.in_([weight_class for weight_class, _, _ in staged])
+            ).group_by(Ranking.weight_class)
+        )
+        
+        problems = []
+        for weight_class, count, champions in staged:
+            if champions > 1:
+                problems.append(f"{weight_class}: чемпионов {champions}")
+            # Резкое сокращение категории - скорее всего, страница разобрана не полностью
+            previous = current.get(weight_class, 0)
+            if count < previous * MIN_CATEGORY_SHARE:
+                problems.append(f"{weight_class}: {count} бойцов вместо {previous}")
+        
+        return problems
+    
+    def _swap_rankings(self, db, batch_id: str) -> None:
+        """Заменяет рейтинги категорий из набора строками rankings_staging"""
+        staging = RankingStaging.__table__
+        rankings = Ranking.__table__
+        batch_classes = select(staging.c.weight_class).where(staging.c.batch_id == batch_id).distinct()
+        now = datetime.utcnow()
+        
+        db.execute(delete(rankings).where(rankings.c.weight_class.in_(batch_classes)))
+        db.execute(insert(rankings).from_select(
+            ['fighter_id', 'weight_class', 'rank_position', 'is_champion', 'rank_change', 'created_at', 'updated_at'],
+            select(
+                staging.c.fighter_id,
+                staging.c.weight_class,
+                staging.c.rank_position,
+                staging.c.is_champion,
+                literal(0),
+                literal(now, DateTime),
+                literal(now, DateTime)
+            ).where(staging.c.batch_id == batch_id)
+        ))
+        # Строки набора не переживают транзакцию
+        db.execute(delete(staging).where(staging.c.batch_id == batch_id))
+    
     def _translate_category_name(self, name_ru: str) -> str:
         """Переводит название категории на английский"""
         translations = {
@@ -206,6 +314,13 @@ class UFCRankingsParser(BaseParser):
             return 'female'
         return 'male'
     
+    def get_rankings(self) -> Dict[str, List[Dict]]:
+        """Загружает и разбирает рейтинги без записи в БД (источник для DataSourceManager)"""
+        html = self.fetch(self.base_url)
+        if not html:
+            return {}
+        return self.parse_rankings(html)
+    
     def parse(self, use_cache: bool = True) -> Dict[str, List[Dict]]:
         """Основной метод парсинга"""
         print("🥊 Парсинг рейтингов UFC...")
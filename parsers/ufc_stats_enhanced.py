@@ -4,13 +4,45 @@
 """
 
 import requests
+import time
 import pandas as pd
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date
 from .base_parser import BaseParser
+from .incremental import IncrementalCsv
+from .source_health import SourceHealth
 from database.models import Fighter, WeightClass, Event, Fight, FightStats, Ranking
 from database.local_config import SessionLocal
+from database.versions import bump_data_version, invalidate as invalidate_cache
+from database.upsert import upsert_rows, lookup_ids, clean_value
+
+# Числовые колонки статистики раунда, переносимые из источника как есть
+STATS_COLUMNS = [
+    'knockdowns',
+    'significant_strikes_landed',
+    'significant_strikes_attempted',
+    'significant_strikes_rate',
+    'total_strikes_landed',
+    'total_strikes_attempted',
+    'takedown_successful',
+    'takedown_attempted',
+    'takedown_rate',
+    'submission_attempt',
+    'reversals',
+    'head_landed',
+    'head_attempted',
+    'body_landed',
+    'body_attempted',
+    'leg_landed',
+    'leg_attempted',
+    'distance_landed',
+    'distance_attempted',
+    'clinch_landed',
+    'clinch_attempted',
+    'ground_landed',
+    'ground_attempted',
+]
 
 
 class UFCStatsEnhanced(BaseParser):
@@ -32,19 +64,32 @@ class UFCStatsEnhanced(BaseParser):
             'fight_stats': 'fight_stats.csv',
             'rankings': 'rankings.csv'
         }
+        
+        # Условные запросы и отпечатки строк хранятся рядом с файлами в cache_dir
+        self.incremental = IncrementalCsv(self.transport, self.cache_dir)
+        # Успешность и задержка зеркал: мертвые зеркала выключаются на время
+        self.mirror_health = SourceHealth(self.cache_dir / "mirrors_health.json")
+        # Маски новых/измененных строк последней загрузки по типам данных
+        self.changed_rows: Dict[str, pd.Series] = {}
     
     def download_all_data(self) -> Dict[str, pd.DataFrame]:
         """Загружает все доступные данные"""
         print("📥 Загрузка всех данных ufc.stats...")
         
         data = {}
+        self.changed_rows = {}
         
         for data_type, filename in self.files.items():
             print(f"  📊 Загружаем {data_type}...")
             df = self._download_file(filename)
             if df is not None:
                 data[data_type] = df
-                print(f"  ✅ {data_type}: {len(df)} записей")
+                if df.attrs.get('source_file'):
+                    self.changed_rows[data_type] = self.incremental.changed_rows(filename, df)
+                    print(f"  ✅ {data_type}: {len(df)} записей, новых или измененных "
+                          f"{int(self.changed_rows[data_type].sum())}")
+                else:
+                    print(f"  ✅ {data_type}: {len(df)} записей")
             else:
                 print(f"  ❌ Не удалось загрузить {data_type}")
         
@@ -52,26 +97,31 @@ class UFCStatsEnhanced(BaseParser):
     
     def _download_file(self, filename: str) -> Optional[pd.DataFrame]:
         """Загружает конкретный файл"""
-        for source_name, base_url in self.data_sources.items():
+        # Зеркала по ожидаемому времени до данных, выключенные пропускаются
+        for source_name in self.data_sources:
+            if not self.mirror_health.available(source_name):
+                print(f"    ⛔ {source_name}: выключен до {self.mirror_health.status(source_name)['open_until']}")
+        
+        for source_name in self.mirror_health.order(self.data_sources):
+            # После паузы выключателя пробную попытку делает только один вызывающий
+            if not self.mirror_health.acquire(source_name):
+                continue
+            base_url = self.data_sources[source_name]
+            started = time.monotonic()
             try:
                 url = f"{base_url}{filename}"
                 print(f"    🔗 Пробуем {source_name}: {url}")
                 
-                response = requests.get(url, timeout=30)
-                if response.status_code == 200:
-                    # Сохраняем во временный файл
-                    temp_file = self.cache_dir / filename
-                    temp_file.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    with open(temp_file, 'w', encoding='utf-8') as f:
-                        f.write(response.text)
-                    
-                    # Загружаем в pandas
-                    df = pd.read_csv(temp_file)
+                # Условный запрос: при 304 файл читается из кэша
+                df = self.incremental.fetch(url, filename)
+                self.mirror_health.record(source_name, df is not None, time.monotonic() - started)
+                if df is not None:
+                    df.attrs['source_file'] = filename
                     print(f"    ✅ Успешно загружено с {source_name}")
                     return df
                     
             except Exception as e:
+                self.mirror_health.record(source_name, False, time.monotonic() - started)
                 print(f"    ❌ Ошибка с {source_name}: {e}")
                 continue
         
@@ -208,147 +258,268 @@ class UFCStatsEnhanced(BaseParser):
         ]
         return pd.DataFrame(rankings_data)
     
-    def import_all_data(self, data: Dict[str, pd.DataFrame]) -> None:
-        """Импортирует все данные в базу данных"""
+    def import_all_data(self, data: Dict[str, pd.DataFrame],
+                        changed: Optional[Dict[str, pd.Series]] = None) -> Optional[Dict[str, Dict[str, int]]]:
+        """
+        Импортирует все данные в базу данных.
+        
+        Строки сопоставляются с уже загруженными по естественному ключу:
+        новые вставляются, измененные обновляются, совпадающие пропускаются,
+        поэтому повторный импорт тех же данных ничего не пишет в БД.
+        changed - маски новых/измененных строк (см. IncrementalCsv): строки
+        вне маски не сравниваются с БД, для них только находятся id.
+        Возвращает счетчики inserted/updated/unchanged по таблицам или None при ошибке.
+        """
         print("💾 Импорт всех данных в базу данных...")
         
+        changed = changed or {}
+        if data and all(table in changed and not changed[table].any() for table in data):
+            print("✅ Источник не изменился с прошлого импорта")
+            return {table: {'inserted': 0, 'updated': 0, 'unchanged': len(df)} for table, df in data.items()}
+        
+        report = {}
         db = SessionLocal()
         try:
+            # Соответствие id из источника -> id в БД
+            fighter_ids, event_ids, fight_ids = {}, {}, {}
+            
             # Импортируем бойцов
             if 'fighters' in data:
-                self._import_fighters(db, data['fighters'])
+                report['fighters'], fighter_ids = self._import_fighters(db, data['fighters'], changed.get('fighters'))
             
             # Импортируем события
             if 'events' in data:
-                self._import_events(db, data['events'])
+                report['events'], event_ids = self._import_events(db, data['events'], changed.get('events'))
             
             # Импортируем бои
             if 'fights' in data:
-                self._import_fights(db, data['fights'])
+                report['fights'], fight_ids = self._import_fights(
+                    db, data['fights'], fighter_ids, event_ids, changed.get('fights')
+                )
             
             # Импортируем статистику боев
             if 'fight_stats' in data:
-                self._import_fight_stats(db, data['fight_stats'])
+                report['fight_stats'] = self._import_fight_stats(
+                    db, data['fight_stats'], fight_ids, fighter_ids, changed.get('fight_stats')
+                )
+                if self._has_changes(report['fight_stats']):
+                    bump_data_version(db, 'fight_stats')
             
             # Импортируем рейтинги
             if 'rankings' in data:
-                self._import_rankings(db, data['rankings'])
+                report['rankings'] = self._import_rankings(db, data['rankings'], fighter_ids, changed.get('rankings'))
+                if self._has_changes(report['rankings']):
+                    bump_data_version(db, 'rankings')
             
             db.commit()
-            print("✅ Все данные успешно импортированы")
+            
+            for table, counts in report.items():
+                print(f"  📈 {table}: новых {counts['inserted']}, обновлено {counts['updated']}, "
+                      f"без изменений {counts['unchanged']}")
+            
+            if any(self._has_changes(counts) for counts in report.values()):
+                invalidate_cache('fighters', 'events', 'fights', 'stats', 'rankings')
+                print("✅ Все данные успешно импортированы")
+            else:
+                print("✅ Данные не изменились")
             
         except Exception as e:
             db.rollback()
             print(f"❌ Ошибка при импорте: {e}")
+            return None
         finally:
             db.close()
+        
+        return report
+    
+    def _has_changes(self, counts: Dict[str, int]) -> bool:
+        """Были ли вставлены или обновлены строки"""
+        return counts['inserted'] > 0 or counts['updated'] > 0
+    
+    def _records(self, df: pd.DataFrame) -> List[Dict]:
+        """Строки DataFrame как словари с типами Python"""
+        return [
+            {column: clean_value(value) for column, value in record.items()}
+            for record in df.to_dict('records')
+        ]
+    
+    def _parse_date(self, value) -> Optional[date]:
+        """Преобразует строку YYYY-MM-DD в дату"""
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    
+    def _write_rows(self, db, model, rows: List[Dict], key_columns: List[str],
+                    changed: Optional[pd.Series] = None, insert_only: List[str] = (),
+                    with_ids: bool = True) -> Tuple[Dict[str, int], Dict[tuple, int]]:
+        """Загружает новые/измененные строки, для остальных только находит id"""
+        if changed is None:
+            return upsert_rows(db, model, rows, key_columns, insert_only=insert_only)
+        
+        flags = changed.tolist()
+        counts, ids = upsert_rows(
+            db, model, [row for row, flag in zip(rows, flags) if flag], key_columns, insert_only=insert_only
+        )
+        
+        unchanged = [tuple(row[column] for column in key_columns) for row, flag in zip(rows, flags) if not flag]
+        counts['unchanged'] += len(unchanged)
+        if with_ids:
+            ids.update(lookup_ids(db, model, unchanged, key_columns))
+        
+        return counts, ids
     
-    def _import_fighters(self, db, df: pd.DataFrame) -> None:
-        """Импортирует бойцов"""
+    def _source_ids(self, records: List[Dict], keys: List[tuple], ids: Dict[tuple, int]) -> Dict[int, int]:
+        """Соответствие id строки в источнике -> id в БД"""
+        return {
+            record['id']: ids[key]
+            for record, key in zip(records, keys)
+            if record.get('id') is not None and key in ids
+        }
+    
+    def _import_fighters(self, db, df: pd.DataFrame,
+                         changed: Optional[pd.Series] = None) -> Tuple[Dict[str, int], Dict[int, int]]:
+        """Импортирует бойцов (ключ - имя)"""
         print(f"  👥 Импорт {len(df)} бойцов...")
         
-        for _, row in df.iterrows():
-            fighter = Fighter(
-                name_ru=row.get('name', ''),
-                name_en=row.get('name', ''),
-                nickname=row.get('nickname', ''),
-                country=row.get('country', ''),
-                height=row.get('height', 0),
-                weight=row.get('weight', 0),
-                reach=row.get('reach', 0),
-                age=row.get('age', 0),
-                win=row.get('wins', 0),
-                lose=row.get('losses', 0),
-                draw=row.get('draws', 0),
-                weight_class=row.get('weight_class', ''),
-                career=row.get('career', 'UFC')
-            )
-            db.add(fighter)
+        records = self._records(df)
+        rows = [
+            {
+                'name_ru': record.get('name') or '',
+                'name_en': record.get('name') or '',
+                'nickname': record.get('nickname'),
+                'country': record.get('country'),
+                'height': record.get('height'),
+                'weight': record.get('weight'),
+                'reach': record.get('reach'),
+                'age': record.get('age'),
+                'wins': record.get('wins', 0),
+                'losses': record.get('losses', 0),
+                'draws': record.get('draws', 0),
+                'weight_class': record.get('weight_class'),
+                'career': record.get('career') or 'UFC'
+            }
+            for record in records
+        ]
+        
+        # Английское имя могло быть уточнено другими парсерами - задаем его только новым бойцам
+        counts, ids = self._write_rows(db, Fighter, rows, ['name_ru'], changed, insert_only=['name_en'])
+        return counts, self._source_ids(records, [(row['name_ru'],) for row in rows], ids)
     
-    def _import_events(self, db, df: pd.DataFrame) -> None:
-        """Импортирует события"""
+    def _import_events(self, db, df: pd.DataFrame,
+                       changed: Optional[pd.Series] = None) -> Tuple[Dict[str, int], Dict[int, int]]:
+        """Импортирует события (ключ - название)"""
         print(f"  🎪 Импорт {len(df)} событий...")
         
-        for _, row in df.iterrows():
-            event = Event(
-                name=row.get('name', ''),
-                date=datetime.strptime(row.get('date', ''), '%Y-%m-%d').date() if row.get('date') else None,
-                location=row.get('location', ''),
-                venue=row.get('venue', ''),
-                attendance=row.get('attendance', 0),
-                is_upcoming=row.get('is_upcoming', True)
-            )
-            db.add(event)
+        records = self._records(df)
+        rows = [
+            {
+                'name': record.get('name') or '',
+                'date': self._parse_date(record.get('date')),
+                'location': record.get('location'),
+                'venue': record.get('venue'),
+                'attendance': record.get('attendance'),
+                'is_upcoming': bool(record.get('is_upcoming', True))
+            }
+            for record in records
+        ]
+        
+        counts, ids = self._write_rows(db, Event, rows, ['name'], changed)
+        return counts, self._source_ids(records, [(row['name'],) for row in rows], ids)
     
-    def _import_fights(self, db, df: pd.DataFrame) -> None:
-        """Импортирует бои"""
+    def _import_fights(self, db, df: pd.DataFrame, fighter_ids: Dict[int, int],
+                       event_ids: Dict[int, int], changed: Optional[pd.Series] = None) -> Tuple[Dict[str, int], Dict[int, int]]:
+        """Импортирует бои (ключ - событие и пара бойцов)"""
         print(f"  🥊 Импорт {len(df)} боев...")
         
-        for _, row in df.iterrows():
-            fight = Fight(
-                event_id=row.get('event_id', 0),
-                fighter1_id=row.get('fighter1_id', 0),
-                fighter2_id=row.get('fighter2_id', 0),
-                weight_class_id=row.get('weight_class_id', 0),
-                scheduled_rounds=row.get('scheduled_rounds', 3),
-                result=row.get('result', ''),
-                winner_id=row.get('winner_id'),
-                fight_date=datetime.strptime(row.get('fight_date', ''), '%Y-%m-%d').date() if row.get('fight_date') else None,
-                is_title_fight=row.get('is_title_fight', False)
-            )
-            db.add(fight)
+        records = self._records(df)
+        for record in records:
+            for column in ('fighter1_id', 'fighter2_id', 'winner_id'):
+                record[column] = fighter_ids.get(record.get(column), record.get(column))
+            record['event_id'] = event_ids.get(record.get('event_id'), record.get('event_id'))
+        
+        # Имена для текстовых полей боя одним запросом
+        referenced = {record[column] for record in records for column in ('fighter1_id', 'fighter2_id', 'winner_id')}
+        fighter_names = dict(db.query(Fighter.id, Fighter.name_ru).filter(Fighter.id.in_(referenced)))
+        event_names = dict(db.query(Event.id, Event.name).filter(
+            Event.id.in_({record['event_id'] for record in records})
+        ))
+        
+        rows = [
+            {
+                'event_id': record['event_id'],
+                'fighter1_id': record['fighter1_id'],
+                'fighter2_id': record['fighter2_id'],
+                'event_name': event_names.get(record['event_id']),
+                'fighter1_name': fighter_names.get(record['fighter1_id']),
+                'fighter2_name': fighter_names.get(record['fighter2_id']),
+                'winner_name': fighter_names.get(record['winner_id']),
+                'scheduled_rounds': record.get('scheduled_rounds', 3),
+                'method': record.get('result'),
+                'fight_date': self._parse_date(record.get('fight_date')),
+                'is_title_fight': bool(record.get('is_title_fight', False))
+            }
+            for record in records
+        ]
+        
+        keys = [(row['event_id'], row['fighter1_id'], row['fighter2_id']) for row in rows]
+        counts, ids = self._write_rows(db, Fight, rows, ['event_id', 'fighter1_id', 'fighter2_id'], changed)
+        return counts, self._source_ids(records, keys, ids)
     
-    def _import_fight_stats(self, db, df: pd.DataFrame) -> None:
-        """Импортирует статистику боев"""
+    def _import_fight_stats(self, db, df: pd.DataFrame, fight_ids: Dict[int, int],
+                            fighter_ids: Dict[int, int], changed: Optional[pd.Series] = None) -> Dict[str, int]:
+        """Импортирует статистику боев (ключ - бой, боец и раунд)"""
         print(f"  📊 Импорт {len(df)} записей статистики...")
         
-        for _, row in df.iterrows():
-            fight_stat = FightStats(
-                fight_id=row.get('fight_id', 0),
-                fighter_id=row.get('fighter_id', 0),
-                round_number=row.get('round_number', 1),
-                knockdowns=row.get('knockdowns', 0),
-                significant_strikes_landed=row.get('significant_strikes_landed', 0),
-                significant_strikes_attempted=row.get('significant_strikes_attempted', 0),
-                significant_strikes_rate=row.get('significant_strikes_rate', 0.0),
-                total_strikes_landed=row.get('total_strikes_landed', 0),
-                total_strikes_attempted=row.get('total_strikes_attempted', 0),
-                takedown_successful=row.get('takedown_successful', 0),
-                takedown_attempted=row.get('takedown_attempted', 0),
-                takedown_rate=row.get('takedown_rate', 0.0),
-                submission_attempt=row.get('submission_attempt', 0),
-                reversals=row.get('reversals', 0),
-                head_landed=row.get('head_landed', 0),
-                head_attempted=row.get('head_attempted', 0),
-                body_landed=row.get('body_landed', 0),
-                body_attempted=row.get('body_attempted', 0),
-                leg_landed=row.get('leg_landed', 0),
-                leg_attempted=row.get('leg_attempted', 0),
-                distance_landed=row.get('distance_landed', 0),
-                distance_attempted=row.get('distance_attempted', 0),
-                clinch_landed=row.get('clinch_landed', 0),
-                clinch_attempted=row.get('clinch_attempted', 0),
-                ground_landed=row.get('ground_landed', 0),
-                ground_attempted=row.get('ground_attempted', 0),
-                result=row.get('result', ''),
-                last_round=row.get('last_round', False),
-                time=row.get('time', ''),
-                winner=row.get('winner', '')
+        rows = []
+        for record in self._records(df):
+            row = {column: record.get(column, 0) for column in STATS_COLUMNS}
+            row.update(
+                fight_id=fight_ids.get(record.get('fight_id'), record.get('fight_id')),
+                fighter_id=fighter_ids.get(record.get('fighter_id'), record.get('fighter_id')),
+                round_number=record.get('round_number', 1),
+                result=record.get('result'),
+                last_round=bool(record.get('last_round', False)),
+                time=record.get('time'),
+                winner=record.get('winner')
             )
-            db.add(fight_stat)
+            rows.append(row)
+        
+        counts, _ = self._write_rows(
+            db, FightStats, rows, ['fight_id', 'fighter_id', 'round_number'], changed, with_ids=False
+        )
+        return counts
     
-    def _import_rankings(self, db, df: pd.DataFrame) -> None:
-        """Импортирует рейтинги"""
+    def _import_rankings(self, db, df: pd.DataFrame, fighter_ids: Dict[int, int],
+                         changed: Optional[pd.Series] = None) -> Dict[str, int]:
+        """Импортирует рейтинги (ключ - боец и весовая категория)"""
         print(f"  🏆 Импорт {len(df)} рейтингов...")
         
-        for _, row in df.iterrows():
-            ranking = Ranking(
-                fighter_id=int(row.get('fighter_id', 0)),
-                weight_class_id=int(row.get('weight_class_id', 0)),
-                rank_position=int(row.get('rank_position', 0)),
-                is_champion=bool(row.get('is_champion', False))
-            )
-            db.add(ranking)
+        records = self._records(df)
+        for record in records:
+            record['fighter_id'] = fighter_ids.get(record.get('fighter_id'), record.get('fighter_id'))
+        
+        # Рейтинг хранит название категории: берем его из weight_classes, иначе из карточки бойца
+        class_names = dict(db.query(WeightClass.id, WeightClass.name_ru))
+        fighter_classes = dict(db.query(Fighter.id, Fighter.weight_class).filter(
+            Fighter.id.in_({record['fighter_id'] for record in records})
+        ))
+        
+        rows, kept = [], []
+        for record in records:
+            weight_class = class_names.get(record.get('weight_class_id')) or fighter_classes.get(record['fighter_id'])
+            kept.append(bool(weight_class))
+            if not weight_class:
+                continue
+            rows.append({
+                'fighter_id': record['fighter_id'],
+                'weight_class': weight_class,
+                'rank_position': record.get('rank_position', 0),
+                'is_champion': bool(record.get('is_champion', False))
+            })
+        
+        if changed is not None:
+            changed = changed[kept]
+        
+        counts, _ = self._write_rows(db, Ranking, rows, ['fighter_id', 'weight_class'], changed, with_ids=False)
+        return counts
     
     def parse(self, *args, **kwargs) -> Dict[str, pd.DataFrame]:
         """Основной метод парсинга"""
@@ -357,9 +528,12 @@ class UFCStatsEnhanced(BaseParser):
         # Загружаем все данные
         data = self.download_all_data()
         
-        # Импортируем в БД
+        # Импортируем в БД (в импорт попадают только новые и измененные строки)
         if data:
-            self.import_all_data(data)
+            report = self.import_all_data(data, self.changed_rows)
+            if report is not None:
+                # Отпечатки запоминаются только после успешного импорта
+                self.incremental.commit()
         
         return data
 
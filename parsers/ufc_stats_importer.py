@@ -3,14 +3,49 @@
 Импортер данных ufc.stats для загрузки статистики боев UFC
 """
 
+import io
 import requests
+import numpy as np
 import pandas as pd
 import json
-from typing import Dict, List, Optional
-from datetime import datetime, date
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, date, timedelta
+from sqlalchemy import insert
 from database.models import Fighter, WeightClass, Event, Fight, FightStats
 from database.config import SessionLocal
+from database.versions import bump_data_version, invalidate as invalidate_cache
+from database.upsert import KEY_CHUNK_SIZE, upsert_rows
 from .base_parser import BaseParser
+from .incremental import IncrementalCsv
+
+# Естественные ключи: бой - группа строк (событие, категория, дата), статистика - бой, боец и раунд
+FIGHT_KEY = ['event_id', 'weight_class', 'fight_date']
+FIGHT_STATS_KEY = ['fight_id', 'fighter_id', 'round_number']
+
+# Целочисленные колонки статистики, переносимые из ufc.stats без изменений
+STATS_INT_COLUMNS = [
+    'knockdowns',
+    'significant_strikes_landed',
+    'significant_strikes_attempted',
+    'total_strikes_landed',
+    'total_strikes_attempted',
+    'takedown_successful',
+    'takedown_attempted',
+    'submission_attempt',
+    'reversals',
+    'head_landed',
+    'head_attempted',
+    'body_landed',
+    'body_attempted',
+    'leg_landed',
+    'leg_attempted',
+    'distance_landed',
+    'distance_attempted',
+    'clinch_landed',
+    'clinch_attempted',
+    'ground_landed',
+    'ground_attempted',
+]
 
 
 class UFCStatsImporter(BaseParser):
@@ -21,24 +56,20 @@ class UFCStatsImporter(BaseParser):
         # URL для загрузки данных ufc.stats (если доступен)
         self.data_url = "https://raw.githubusercontent.com/mtoto/ufc.stats/master/data/ufc_stats.rda"
         self.csv_url = "https://raw.githubusercontent.com/mtoto/ufc.stats/master/data/ufc_stats.csv"
+        # Условные запросы и отпечатки боев хранятся рядом с файлом в cache_dir
+        self.incremental = IncrementalCsv(self.transport, self.cache_dir)
+        # Обработчик прогресса: (этап, доля 0..1, обработано строк), см. refresh_data
+        self.progress: Optional[Callable[[str, float, int], None]] = None
         
     def download_ufc_stats_data(self) -> Optional[pd.DataFrame]:
         """Загружает данные ufc.stats"""
         print("📥 Загрузка данных ufc.stats...")
         
         try:
-            # Пробуем загрузить CSV версию
-            response = requests.get(self.csv_url, timeout=30)
-            if response.status_code == 200:
-                # Сохраняем во временный файл
-                temp_file = self.cache_dir / "ufc_stats.csv"
-                temp_file.parent.mkdir(parents=True, exist_ok=True)
-                
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                
-                # Загружаем в pandas
-                df = pd.read_csv(temp_file)
+            # Пробуем загрузить CSV версию (условный запрос: при 304 файл читается из кэша)
+            df = self.incremental.fetch(self.csv_url, "ufc_stats.csv")
+            if df is not None:
+                df.attrs['source_file'] = "ufc_stats.csv"
                 print(f"✅ Загружено {len(df)} записей из ufc.stats")
                 return df
                 
@@ -123,133 +154,291 @@ class UFCStatsImporter(BaseParser):
         print(f"✅ Создано {len(df)} тестовых записей")
         return df
     
-    def import_to_database(self, df: pd.DataFrame) -> None:
-        """Импортирует данные в базу данных"""
+    def import_to_database(self, df: pd.DataFrame, chunk_size: int = 5000) -> bool:
+        """
+        Импортирует данные в базу данных пакетно.
+        
+        Справочники (события, весовые категории, бойцы) загружаются в словари
+        одним запросом, недостающие записи вставляются пачкой. Бои и строки
+        статистики собираются из колонок DataFrame и загружаются через
+        upsert_rows по естественным ключам (FIGHT_KEY, FIGHT_STATS_KEY)
+        кусками по chunk_size: повторный импорт тех же данных ничего
+        не добавляет, измененные строки обновляются. Новые строки статистики
+        на PostgreSQL вставляются через COPY.
+        """
         print("💾 Импорт данных в базу данных...")
         
         db = SessionLocal()
         try:
-            imported_fights = 0
-            imported_stats = 0
+            df = df.copy()
+            df['fight_date'] = pd.to_datetime(df['fight_date']).dt.date
             
-            # Группируем данные по боям
-            fight_groups = df.groupby(['event', 'fight_date', 'weight_class'])
+            event_ids = self._ensure_events(db, df)
+            weight_class_ids = self._ensure_weight_classes(db, df['weight_class'].unique())
+            fighter_ids = self._ensure_fighters(db, df['fighter'].unique())
+            self._report('references', 0.4)
             
-            print(f"📊 Найдено групп боев: {len(fight_groups)}")
+            fights = self._upsert_fights(db, df, event_ids, fighter_ids)
+            print(f"📊 Найдено групп боев: {len(fights)}, весовых категорий: {len(weight_class_ids)}")
+            self._report('fights', 0.5)
             
-            for (event_name, fight_date, weight_class_name), fight_data in fight_groups:
-                # Создаем или получаем событие
-                event = db.query(Event).filter(Event.name == event_name).first()
-                if not event:
-                    event = Event(
-                        name=event_name,
-                        date=datetime.strptime(fight_date, "%Y-%m-%d").date(),
-                        location=fight_data['location'].iloc[0],
-                        attendance=int(fight_data['attendance'].iloc[0]),
-                        is_upcoming=False
-                    )
-                    db.add(event)
-                    db.flush()
-                
-                # Создаем или получаем весовую категорию
-                weight_class = db.query(WeightClass).filter(
-                    WeightClass.name_ru == weight_class_name
-                ).first()
-                if not weight_class:
-                    weight_class = WeightClass(
-                        name_ru=weight_class_name,
-                        name_en=self._translate_weight_class(weight_class_name),
-                        gender='male'  # По умолчанию мужская категория
-                    )
-                    db.add(weight_class)
-                    db.flush()
-                
-                # Получаем бойцов из данных
-                fighters_in_fight = fight_data['fighter'].unique()
-                if len(fighters_in_fight) >= 2:
-                    fighter1_name = fighters_in_fight[0]
-                    fighter2_name = fighters_in_fight[1]
-                    
-                    # Создаем или получаем бойцов
-                    fighter1 = self._get_or_create_fighter(db, fighter1_name)
-                    fighter2 = self._get_or_create_fighter(db, fighter2_name)
-                    
-                    # Создаем бой
-                    fight = Fight(
-                        event_id=event.id,
-                        fighter1_id=fighter1.id,
-                        fighter2_id=fighter2.id,
-                        weight_class_id=weight_class.id,
-                        scheduled_rounds=int(fight_data['scheduled_rounds'].iloc[0]),
-                        result=fight_data['result'].iloc[0],
-                        fight_date=datetime.strptime(fight_date, "%Y-%m-%d").date(),
-                        is_title_fight=False,
-                        is_main_event=False
-                    )
-                    db.add(fight)
-                    db.flush()
-                    imported_fights += 1
-                    
-                    # Создаем статистику по раундам
-                    for _, row in fight_data.iterrows():
-                        fighter = fighter1 if row['fighter'] == fighter1_name else fighter2
-                        
-                        fight_stat = FightStats(
-                            fight_id=fight.id,
-                            fighter_id=fighter.id,
-                            round_number=int(row['round']),
-                            knockdowns=int(row['knockdowns']),
-                            significant_strikes_landed=int(row['significant_strikes_landed']),
-                            significant_strikes_attempted=int(row['significant_strikes_attempted']),
-                            significant_strikes_rate=float(row['significant_strikes_rate']),
-                            total_strikes_landed=int(row['total_strikes_landed']),
-                            total_strikes_attempted=int(row['total_strikes_attempted']),
-                            takedown_successful=int(row['takedown_successful']),
-                            takedown_attempted=int(row['takedown_attempted']),
-                            takedown_rate=float(row['takedown_rate']),
-                            submission_attempt=int(row['submission_attempt']),
-                            reversals=int(row['reversals']),
-                            head_landed=int(row['head_landed']),
-                            head_attempted=int(row['head_attempted']),
-                            body_landed=int(row['body_landed']),
-                            body_attempted=int(row['body_attempted']),
-                            leg_landed=int(row['leg_landed']),
-                            leg_attempted=int(row['leg_attempted']),
-                            distance_landed=int(row['distance_landed']),
-                            distance_attempted=int(row['distance_attempted']),
-                            clinch_landed=int(row['clinch_landed']),
-                            clinch_attempted=int(row['clinch_attempted']),
-                            ground_landed=int(row['ground_landed']),
-                            ground_attempted=int(row['ground_attempted']),
-                            result=row['result'],
-                            last_round=bool(row['last_round']),
-                            time=str(row['time']),
-                            winner=row['winner']
-                        )
-                        db.add(fight_stat)
-                        imported_stats += 1
+            imported_stats = self._upsert_fight_stats(db, df, fights, chunk_size)
             
+            bump_data_version(db, 'fight_stats')
             db.commit()
-            print(f"✅ Импортировано {imported_fights} боев и {imported_stats} записей статистики")
+            invalidate_cache('fighters', 'events', 'fights', 'stats', 'rankings')
+            print(f"✅ Импортировано {len(fights)} боев и {imported_stats} записей статистики")
+            self._report('done', 1.0, imported_stats)
+            return True
             
         except Exception as e:
             db.rollback()
             print(f"❌ Ошибка при импорте: {e}")
+            return False
         finally:
             db.close()
     
-    def _get_or_create_fighter(self, db, fighter_name: str) -> Fighter:
-        """Создает или получает бойца"""
-        fighter = db.query(Fighter).filter(Fighter.name_ru == fighter_name).first()
-        if not fighter:
-            fighter = Fighter(
-                name_ru=fighter_name,
-                name_en=fighter_name,  # Для тестовых данных используем то же имя
-                career="UFC"
+    def _ensure_events(self, db, df: pd.DataFrame) -> Dict[str, int]:
+        """Возвращает словарь название события -> id, создавая недостающие события"""
+        event_ids = {}
+        for event_id, name in db.query(Event.id, Event.name).order_by(Event.id.desc()):
+            event_ids[name] = event_id  # при дублях остается меньший id
+        
+        first_rows = df.drop_duplicates('event')
+        missing = first_rows[~first_rows['event'].isin(list(event_ids))]
+        if len(missing):
+            db.execute(insert(Event), [
+                {
+                    'name': name,
+                    'date': fight_date,
+                    'location': location,
+                    'attendance': int(attendance),
+                    'is_upcoming': False
+                }
+                for name, fight_date, location, attendance in zip(
+                    missing['event'], missing['fight_date'], missing['location'], missing['attendance']
+                )
+            ])
+            event_ids.update(self._lookup_new(db, Event.name, Event.id, missing['event'].tolist()))
+        
+        return event_ids
+    
+    def _lookup_new(self, db, name_column, id_column, names: List[str]) -> Dict[str, int]:
+        """id только что вставленных записей по именам (IN кусками по KEY_CHUNK_SIZE)"""
+        ids = {}
+        for start in range(0, len(names), KEY_CHUNK_SIZE):
+            chunk = names[start:start + KEY_CHUNK_SIZE]
+            ids.update(dict(db.query(name_column, id_column).filter(name_column.in_(chunk))))
+        return ids
+    
+    def _ensure_weight_classes(self, db, names) -> Dict[str, int]:
+        """Возвращает словарь название категории -> id, создавая недостающие категории"""
+        weight_class_ids = {}
+        for weight_class_id, name_ru in db.query(WeightClass.id, WeightClass.name_ru).order_by(WeightClass.id.desc()):
+            weight_class_ids[name_ru] = weight_class_id
+        
+        missing = [name for name in names if name not in weight_class_ids]
+        if missing:
+            db.execute(insert(WeightClass), [
+                {
+                    'name_ru': name,
+                    'name_en': self._translate_weight_class(name),
+                    'gender': 'male'  # По умолчанию мужская категория
+                }
+                for name in missing
+            ])
+            weight_class_ids.update(self._lookup_new(db, WeightClass.name_ru, WeightClass.id, missing))
+        
+        return weight_class_ids
+    
+    def _ensure_fighters(self, db, names) -> Dict[str, int]:
+        """Возвращает словарь имя бойца -> id, создавая недостающих бойцов"""
+        fighter_ids = {}
+        for fighter_id, name_ru in db.query(Fighter.id, Fighter.name_ru).order_by(Fighter.id.desc()):
+            fighter_ids[name_ru] = fighter_id
+        
+        missing = [name for name in names if name not in fighter_ids]
+        if missing:
+            db.execute(insert(Fighter), [
+                {
+                    'name_ru': name,
+                    'name_en': name,  # Для тестовых данных используем то же имя
+                    'career': "UFC"
+                }
+                for name in missing
+            ])
+            fighter_ids.update(self._lookup_new(db, Fighter.name_ru, Fighter.id, missing))
+        
+        return fighter_ids
+    
+    def _upsert_fights(self, db, df: pd.DataFrame, event_ids: Dict[str, int],
+                       fighter_ids: Dict[str, int]) -> pd.DataFrame:
+        """
+        Загружает по одному бою на группу (событие, дата, категория).
+        
+        Первые два разных бойца группы становятся fighter1/fighter2, группы
+        с одним бойцом пропускаются. Бой, уже загруженный для группы,
+        обновляется. Возвращает таблицу боев с их id.
+        """
+        keys = ['event', 'fight_date', 'weight_class']
+        
+        participants = df.drop_duplicates(keys + ['fighter'])
+        participants = participants.assign(slot=participants.groupby(keys, sort=False).cumcount())
+        fighter1 = participants[participants['slot'] == 0].set_index(keys)
+        fighter2 = participants[participants['slot'] == 1].set_index(keys)['fighter']
+        
+        fights = fighter1.join(fighter2.rename('fighter2_name'), how='inner').reset_index()
+        fights = fights.rename(columns={'fighter': 'fighter1_name'})
+        
+        mappings = [
+            {
+                'event_id': event_ids[event],
+                'event_name': event,
+                'fighter1_id': fighter_ids[fighter1_name],
+                'fighter2_id': fighter_ids[fighter2_name],
+                'fighter1_name': fighter1_name,
+                'fighter2_name': fighter2_name,
+                'weight_class': weight_class,
+                'scheduled_rounds': int(scheduled_rounds),
+                'method': method,
+                'fight_date': fight_date,
+                'location': location,
+                'is_title_fight': False,
+                'is_main_event': False
+            }
+            for event, fight_date, weight_class, fighter1_name, fighter2_name, scheduled_rounds, method, location in zip(
+                fights['event'], fights['fight_date'], fights['weight_class'],
+                fights['fighter1_name'], fights['fighter2_name'],
+                fights['scheduled_rounds'], fights['result'], fights['location']
+            )
+        ]
+        
+        # Титульность и главный бой задают другие парсеры - только при вставке
+        _, ids = upsert_rows(db, Fight, mappings, FIGHT_KEY, insert_only=['is_title_fight', 'is_main_event'])
+        self._delete_duplicate_fights(db, ids)
+        
+        fights['fight_id'] = [ids[tuple(mapping[column] for column in FIGHT_KEY)] for mapping in mappings]
+        fights['fighter1_id'] = [mapping['fighter1_id'] for mapping in mappings]
+        fights['fighter2_id'] = [mapping['fighter2_id'] for mapping in mappings]
+        return fights[keys + ['fight_id', 'fighter1_name', 'fighter2_name', 'fighter1_id', 'fighter2_id']]
+    
+    def _delete_duplicate_fights(self, db, ids: Dict[tuple, int]) -> int:
+        """
+        Удаляет другие бои с тем же ключом, что у загруженных, вместе с их статистикой.
+        
+        Такие дубли оставались от прежних повторных импортов без upsert.
+        """
+        keep = set(ids.values())
+        event_ids = list({key[0] for key in ids})
+        duplicates = []
+        for start in range(0, len(event_ids), KEY_CHUNK_SIZE):
+            chunk = event_ids[start:start + KEY_CHUNK_SIZE]
+            records = db.query(Fight.id, *[getattr(Fight, column) for column in FIGHT_KEY]).filter(
+                Fight.event_id.in_(chunk)
             )
-            db.add(fighter)
-            db.flush()
-        return fighter
+            duplicates += [record[0] for record in records if tuple(record[1:]) in ids and record[0] not in keep]
+        
+        for start in range(0, len(duplicates), KEY_CHUNK_SIZE):
+            chunk = duplicates[start:start + KEY_CHUNK_SIZE]
+            db.query(FightStats).filter(FightStats.fight_id.in_(chunk)).delete(synchronize_session=False)
+            db.query(Fight).filter(Fight.id.in_(chunk)).delete(synchronize_session=False)
+        
+        if duplicates:
+            print(f"🧹 Удалено дублей боев: {len(duplicates)}")
+        return len(duplicates)
+    
+    def _delete_stale_stats(self, db, fight_ids: List[int], rows: pd.DataFrame) -> int:
+        """
+        Удаляет строки статистики загружаемых боев, которых больше нет в источнике.
+        
+        Для каждого ключа остается строка с меньшим id (ее обновил upsert_rows),
+        остальные дубли ключа тоже удаляются.
+        """
+        current = set(zip(rows['fight_id'], rows['fighter_id'], rows['round_number']))
+        stale, seen = [], set()
+        for start in range(0, len(fight_ids), KEY_CHUNK_SIZE):
+            chunk = fight_ids[start:start + KEY_CHUNK_SIZE]
+            records = db.query(FightStats.id, *[getattr(FightStats, column) for column in FIGHT_STATS_KEY]).filter(
+                FightStats.fight_id.in_(chunk)
+            ).order_by(FightStats.id)
+            for record in records:
+                key = tuple(record[1:])
+                if key not in current or key in seen:
+                    stale.append(record[0])
+                seen.add(key)
+        
+        for start in range(0, len(stale), KEY_CHUNK_SIZE):
+            db.query(FightStats).filter(
+                FightStats.id.in_(stale[start:start + KEY_CHUNK_SIZE])
+            ).delete(synchronize_session=False)
+        return len(stale)
+    
+    def _upsert_fight_stats(self, db, df: pd.DataFrame, fights: pd.DataFrame, chunk_size: int) -> int:
+        """
+        Собирает строки статистики по колонкам и загружает их пачками по ключу (бой, боец, раунд).
+        
+        Учитываются только строки двух участников боя. Бой импортируется
+        целиком, поэтому строки статистики боя, пропавшие из источника,
+        удаляются. Возвращает число вставленных, обновленных и удаленных строк.
+        """
+        stats = df.merge(fights, on=['event', 'fight_date', 'weight_class'], how='inner')
+        stats = stats[(stats['fighter'] == stats['fighter1_name']) | (stats['fighter'] == stats['fighter2_name'])]
+        
+        columns = {
+            'fight_id': stats['fight_id'],
+            'fighter_id': stats['fighter1_id'].where(stats['fighter'] == stats['fighter1_name'], stats['fighter2_id']),
+            'round_number': stats['round'].astype(int),
+            'significant_strikes_rate': stats['significant_strikes_rate'].astype(float),
+            'takedown_rate': stats['takedown_rate'].astype(float),
+            'result': stats['result'],
+            'last_round': stats['last_round'].astype(bool),
+            'time': stats['time'].astype(str),
+            'winner': stats['winner']
+        }
+        for column in STATS_INT_COLUMNS:
+            columns[column] = stats[column].astype(int)
+        rows = pd.DataFrame(columns).drop_duplicates(FIGHT_STATS_KEY)
+        # NaN -> None, чтобы пустые значения совпадали с NULL в БД
+        rows = rows.astype(object).where(rows.notna(), None)
+        
+        written = self._delete_stale_stats(db, fights['fight_id'].tolist(), rows)
+        if rows.empty:
+            return written
+        
+        insert_rows = None
+        if db.bind.dialect.name == 'postgresql':
+            insert_rows = lambda new_rows: self._copy_rows(db, FightStats.__tablename__, self._with_timestamps(new_rows))
+        
+        for start in range(0, len(rows), chunk_size):
+            counts, _ = upsert_rows(
+                db, FightStats, rows.iloc[start:start + chunk_size].to_dict('records'), FIGHT_STATS_KEY,
+                insert=insert_rows
+            )
+            written += counts['inserted'] + counts['updated']
+            done = min(start + chunk_size, len(rows))
+            self._report('fight_stats', 0.5 + 0.45 * done / len(rows), written)
+        
+        return written
+    
+    def _with_timestamps(self, rows: List[dict]) -> pd.DataFrame:
+        """Новые строки для COPY: значения по умолчанию created_at/updated_at COPY не заполняет"""
+        now = datetime.utcnow()
+        return pd.DataFrame(rows).assign(created_at=now, updated_at=now)
+    
+    def _copy_rows(self, db, table: str, rows: pd.DataFrame) -> None:
+        """Загружает строки в таблицу через COPY (PostgreSQL)"""
+        buffer = io.StringIO()
+        rows.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(rows.columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
     
     def _translate_weight_class(self, name_ru: str) -> str:
         """Переводит название весовой категории"""
@@ -265,19 +454,131 @@ class UFCStatsImporter(BaseParser):
         }
         return translations.get(name_ru, name_ru)
     
-    def refresh_data(self) -> None:
-        """Обновляет данные (аналог refresh_data() из ufc.stats)"""
+    def _report(self, stage: str, fraction: float, rows: int = 0) -> None:
+        """Сообщает прогресс обработчику self.progress (если он задан)"""
+        if self.progress is not None:
+            self.progress(stage, fraction, rows)
+    
+    def refresh_data(self, progress: Optional[Callable[[str, float, int], None]] = None) -> bool:
+        """
+        Обновляет данные (аналог refresh_data() из ufc.stats).
+        
+        progress вызывается с этапом, долей выполненной работы и числом
+        записанных строк статистики. Возвращает False, если данные
+        загрузить или импортировать не удалось.
+        """
         print("🔄 Обновление данных ufc.stats...")
+        self.progress = progress
+        self._report('download', 0.0)
         
         # Загружаем данные
         df = self.download_ufc_stats_data()
-        if df is not None:
-            # Импортируем в БД
-            self.import_to_database(df)
-            print("✅ Данные успешно обновлены")
-        else:
+        if df is None:
             print("❌ Не удалось обновить данные")
+            return False
+        self._report('diff', 0.2)
+        
+        if df.attrs.get('source_file'):
+            # Бой импортируется целиком, поэтому отпечатки сравниваются по группам боя
+            changed = self.incremental.changed_rows(
+                df.attrs['source_file'], df, group_by=['event', 'fight_date', 'weight_class']
+            )
+            df = df[changed]
+            print(f"🔍 Новых или измененных записей: {len(df)}")
+            if df.empty:
+                print("✅ Данные не изменились")
+                self._report('done', 1.0)
+                return True
+        self._report('import', 0.3)
+        
+        # Импортируем в БД
+        if not self.import_to_database(df):
+            return False
+        
+        self.incremental.commit()
+        print("✅ Данные успешно обновлены")
+        return True
     
     def parse(self, *args, **kwargs) -> None:
         """Основной метод парсинга"""
         self.refresh_data()
+
+
+def _synthetic_stats(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Синтетическая выгрузка ufc.stats: бои по 2 бойца и 3 раунда (6 строк на бой)"""
+    rng = np.random.default_rng(seed)
+    fights = max(1, rows // 6)
+    rows = fights * 6
+    fight = np.repeat(np.arange(fights), 6)
+    corner = np.tile(np.repeat([0, 1], 3), fights)
+    event = fight // 12
+    landed = rng.integers(0, 60, rows)
+    attempted = landed + rng.integers(0, 40, rows)
+
+    df = pd.DataFrame({
+        'fighter': [f"Fighter {2 * f + c}" for f, c in zip(fight, corner)],
+        'round': np.tile([1, 2, 3], fights * 2),
+        'event': [f"UFC {e}" for e in event],
+        'fight_date': [str(date(2000, 1, 1) + timedelta(days=int(e))) for e in event],
+        # Бои события различаются категорией (ключ группы - событие, дата, категория)
+        'weight_class': [f"Категория {f % 12}" for f in fight],
+        'location': "Las Vegas",
+        'attendance': 15000,
+        'scheduled_rounds': 3,
+        'result': "Decision",
+        'last_round': np.tile([False, False, True], fights * 2),
+        'time': "5:00",
+        'winner': np.where(corner == 0, 'W', 'L'),
+        'significant_strikes_landed': landed,
+        'significant_strikes_attempted': attempted,
+        'significant_strikes_rate': np.round(landed / np.maximum(attempted, 1) * 100, 2),
+        'takedown_rate': 0.0,
+    })
+    for column in STATS_INT_COLUMNS:
+        if column not in df:
+            df[column] = rng.integers(0, 10, rows)
+    return df
+
+
+def main():
+    """Замер импорта: строк статистики в секунду при первой загрузке и повторном импорте"""
+    import argparse
+    import os
+    import tempfile
+    import time
+    from sqlalchemy import create_engine
+    from backend.cache_manager import cache_manager
+    from database.models import Base
+    from database.migrations import upgrade_schema
+
+    arg_parser = argparse.ArgumentParser(description="Замер импорта ufc.stats")
+    arg_parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help="размеры синтетической выгрузки")
+    arg_parser.add_argument('--chunk-size', type=int, default=5000, help="строк в одном upsert")
+    args = arg_parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ufc-import-')
+    print(f"📄 Временная БД и кэш: {workdir}")
+    # Первое обращение к недоступному Redis ждет повторов подключения - не включаем его в замер
+    cache_manager.delete_pattern('*', cache_manager.prefixes['stats'])
+
+    for rows in args.rows:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, f'bench_{rows}.db')}")
+        Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
+        # Импорт открывает сессии через SessionLocal - направляем их во временную БД
+        SessionLocal.configure(bind=engine)
+
+        df = _synthetic_stats(rows)
+        importer = UFCStatsImporter(cache_dir=os.path.join(workdir, 'cache'))
+        for stage in ('первая загрузка', 'повторный импорт'):
+            started = time.perf_counter()
+            if not importer.import_to_database(df, chunk_size=args.chunk_size):
+                raise SystemExit(1)
+            elapsed = time.perf_counter() - started
+            print(f"⏱️ {rows:>9} строк, {stage:<16}: {elapsed:7.2f} с, {rows / elapsed:10.0f} строк/с")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,15 @@ from bs4 import BeautifulSoup
 from .base_parser import BaseParser
 from database.models import Fighter, WeightClass, UpcomingFight, Event
 from database.config import SessionLocal
+from database.versions import invalidate as invalidate_cache
 
 
 class UpcomingCardsParser(BaseParser):
     """Парсер предстоящих кардов UFC"""
     
+    # Карды меняются за несколько часов до турнира
+    cache_ttl = 3600
+    
     def __init__(self, cache_dir: str = ".cache/cards"):
         super().__init__(cache_dir)
         self.base_url = "https://www.ufc.com/events"
@@ -172,6 +176,7 @@ class UpcomingCardsParser(BaseParser):
                         self._save_fights_to_database(db, event.id, details['fights'])
             
             db.commit()
+            invalidate_cache('events', 'fights')
             print(f"✅ Сохранено {len(events)} событий в БД")
             
         except Exception as e:
@@ -213,6 +218,13 @@ class UpcomingCardsParser(BaseParser):
             )
             db.add(fight)
     
+    def get_events(self) -> List[Dict]:
+        """Загружает и разбирает события без записи в БД (источник для DataSourceManager)"""
+        html = self.fetch(self.base_url)
+        if not html:
+            return []
+        return self.parse_upcoming_events(html)
+    
     def parse(self, use_cache: bool = True) -> List[Dict]:
         """Основной метод парсинга"""
         print("🥊 Парсинг предстоящих кардов UFC...")
@@ -0,0 +1,65 @@
+"""
+Общие фикстуры тестов: временная SQLite БД и кэш без Redis
+
+Запуск из корня репозитория:
+    python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Окружение задается до импорта модулей проекта: движок БД и кэш создаются при импорте
+_TMP_DIR = tempfile.mkdtemp(prefix='ufc-ranker-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ['CACHE_DIR'] = os.path.join(_TMP_DIR, 'cache')
+os.environ.pop('REDIS_URL', None)
+# Поколения кэша тесты сверяют сами (cache_manager.sync_generations)
+os.environ['CACHE_SYNC_INTERVAL'] = '3600'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.cache_manager import cache_manager
+from database.config import SessionLocal, engine
+from database.migrations import upgrade_schema
+from database.models import Base
+
+# Тесты не ходят в Redis: вторым уровнем кэша служит локальный файловый кэш
+cache_manager.redis_client = None
+
+
+@pytest.fixture
+def db_engine():
+    """Пустая схема БД и пустой кэш для каждого теста"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    cache_manager.clear_all()
+    yield engine
+
+
+@pytest.fixture
+def db(db_engine):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def tmp_cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+@pytest.fixture
+def client(db_engine):
+    """Клиент API без событий запуска (их прогрев кэша тестам не нужен)"""
+    from fastapi.testclient import TestClient
+
+    from backend.app import app, rankings_snapshot
+
+    rankings_snapshot.invalidate()
+    return TestClient(app)
@@ -0,0 +1,83 @@
+"""Колоночное хранилище статистики боев против SQL-агрегатов"""
+
+from backend.analytics import COLUMNS, FightStatsColumns, FightStatsStore, _sql_fighter_totals
+from database.config import SessionLocal
+from database.models import Fighter, FightStats
+
+
+def test_empty_snapshot():
+    columns = FightStatsColumns((0, 0), [], {})
+    assert len(columns) == 0 and columns.totals.shape == (0, len(COLUMNS))
+
+
+def test_store_matches_sql_totals(db):
+    db.add_all([Fighter(id=i, name_ru=f"Боец {i}", weight_class="Легкий вес") for i in (1, 2, 3)])
+    db.add_all([
+        FightStats(fight_id=fight_id, fighter_id=fighter_id, round_number=round_number,
+                   significant_strikes_landed=fighter_id * round_number,
+                   significant_strikes_attempted=fighter_id * round_number + 5,
+                   takedown_successful=round_number % 2, takedown_attempted=1, knockdowns=None)
+        for fight_id, fighter_id in ((1, 1), (1, 2), (2, 1), (2, 3))
+        for round_number in (1, 2, 3)
+    ])
+    db.commit()
+
+    store = FightStatsStore(session_factory=SessionLocal)
+    for fighter_id in (1, 2, 3):
+        summary = store.fighter_summary(fighter_id)
+        expected = _sql_fighter_totals(db, fighter_id)
+        assert summary['total_rounds'] == expected['total_rounds']
+        assert summary['totals'] == expected['totals']
+    assert store.fighter_summary(1)['total_fights'] == 2
+    assert store.fighter_summary(4) is None
+
+    # Точность значимых ударов растет с номером бойца
+    top = store.leaderboard('significant_strikes_accuracy', limit=2)
+    assert [row['fighter_id'] for row in top] == [3, 2]
+
+
+def test_get_serves_old_snapshot_while_rebuilding(db):
+    from database.versions import bump_data_version
+
+    db.add(Fighter(id=1, name_ru="Боец 1", weight_class="Легкий вес"))
+    db.add(FightStats(fight_id=1, fighter_id=1, round_number=1, knockdowns=1))
+    db.commit()
+
+    store = FightStatsStore(check_interval=0, session_factory=SessionLocal)
+    old = store.refresh()
+
+    # Импорт добавил строки и увеличил версию
+    db.add(FightStats(fight_id=2, fighter_id=1, round_number=1, knockdowns=2))
+    bump_data_version(db, 'fight_stats')
+    db.commit()
+
+    # Пока блокировка пересборки занята, запрос получает старый снимок сразу
+    with store._lock:
+        assert store.get() is old
+        assert not store.refresh_in_background()
+
+    # После фоновой пересборки - новый (больше фоновых проверок в тесте не нужно)
+    with store._background:
+        store.check_interval = 3600
+    assert store.get() is not old
+    assert store.fighter_summary(1)['totals']['knockdowns'] == 3
+
+
+def test_division_change_rebuilds_snapshot(db):
+    from database.versions import invalidate
+
+    db.add_all([Fighter(id=i, name_ru=f"Боец {i}", weight_class="Легкий вес") for i in (1, 2)])
+    db.add_all([FightStats(fight_id=1, fighter_id=i, round_number=1, knockdowns=i) for i in (1, 2)])
+    db.commit()
+
+    store = FightStatsStore(session_factory=SessionLocal)
+    assert store.fighter_summary(1)['division_size'] == 2
+
+    # Профиль бойца обновил весовую категорию, fight_stats не менялась
+    db.query(Fighter).filter(Fighter.id == 2).update({Fighter.weight_class: "Полусредний вес"})
+    db.commit()
+    invalidate('fighters')
+
+    store.refresh()
+    assert store.fighter_summary(1)['division_size'] == 1
+    assert store.fighter_summary(2)['weight_class'] == "Полусредний вес"
@@ -0,0 +1,188 @@
+"""Ответы API на небольшой заполненной базе"""
+
+from datetime import date, timedelta
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import event
+
+from database.models import Event, Fight, Fighter, Ranking, WeightClass
+
+FIGHTS = 200
+
+
+@pytest.fixture
+def seeded(db):
+    """Категории, бойцы с рейтингом, событие и FIGHTS боев между бойцами"""
+    db.add_all([
+        WeightClass(name_ru="Легкий вес", name_en="Lightweight", weight_max=70),
+        WeightClass(name_ru="Тяжелый вес", name_en="Heavyweight", weight_max=120),
+    ])
+    fighters = [
+        Fighter(name_ru=f"Боец {i}", name_en=f"Fighter {i}", country="Россия", weight_class="Легкий вес",
+                wins=i, losses=1, draws=0, no_contests=0)
+        for i in range(20)
+    ]
+    db.add_all(fighters)
+    db.flush()
+    db.add_all([
+        Ranking(fighter_id=fighter.id, weight_class="Легкий вес", rank_position=i,
+                is_champion=i == 0)
+        for i, fighter in enumerate(fighters[:10])
+    ])
+    ufc = Event(name="UFC 300", date=date(2024, 4, 13), is_upcoming=False)
+    db.add(ufc)
+    db.flush()
+    db.add_all([
+        Fight(event_id=ufc.id, event_name=ufc.name, weight_class="Lightweight",
+              fighter1_id=fighters[i % 20].id, fighter1_name=fighters[i % 20].name_en,
+              fighter2_id=fighters[(i + 1) % 20].id, fighter2_name=fighters[(i + 1) % 20].name_ru,
+              fight_date=ufc.date - timedelta(days=i), fight_order=i)
+        for i in range(FIGHTS)
+    ])
+    db.commit()
+    return db
+
+
+def _count_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Сверка поколений кэша идет в своем фоновом потоке, а не в запросе
+        if 'data_versions' not in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_fights_query_count_does_not_depend_on_limit(client, seeded, db_engine):
+    counts = {}
+    for limit in (5, 50, 150):
+        statements, stop = _count_statements(db_engine)
+        try:
+            response = client.get("/api/fights", params={"limit": limit})
+        finally:
+            stop()
+        assert response.status_code == 200
+        fights = response.json()
+        assert len(fights) == limit
+        assert all(fight['fighter1_country'] == "Россия" for fight in fights)
+        counts[limit] = len(statements)
+
+    assert len(set(counts.values())) == 1, counts
+
+
+def _response_model(path):
+    from backend.app import app
+
+    return next(route.response_model for route in app.routes if getattr(route, 'path', None) == path
+                and 'GET' in route.methods)
+
+
+@pytest.mark.parametrize('path, params', [
+    ("/api/rankings", {}),
+    ("/api/fighters", {}),
+    ("/api/fighters", {"ids": "1,2,3"}),
+    ("/api/weight-classes", {}),
+])
+def test_fast_responses_match_response_model(client, seeded, path, params):
+    """Ответы, собранные без pydantic, проходят проверку response_model и ничего не теряют"""
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    assert response.json()
+
+    validated = TypeAdapter(_response_model(path)).validate_json(response.content)
+    assert jsonable_encoder(validated) == response.json()
+
+
+def test_stats_fragments(client, seeded):
+    """Фрагменты главной страницы считаются через run_db в своей сессии"""
+    stats = client.get("/api/stats").json()
+    assert stats['total_fights'] == FIGHTS
+    assert stats['total_fighters'] == 20
+    assert stats['top_countries'] == [{"country": "Россия", "count": 20}]
+
+
+def test_events_page_is_the_same_on_miss_and_hit(client, seeded):
+    from backend.app import _events_page
+
+    page = _events_page(skip=0, limit=10, cursor=None, upcoming_only=False, db=seeded)
+    assert all(isinstance(item, dict) for item in page['items'])
+
+    miss = client.get("/api/events", params={"limit": 20}).json()
+    hit = client.get("/api/events", params={"limit": 20}).json()
+    assert miss == hit
+    assert miss[0]['event_date'] == "2024-04-13"
+
+
+
+def test_pages_by_slug_in_one_batch(client, seeded):
+    """Страницы бойца и события по адресу (как его строит фронтенд) - одним пакетным запросом"""
+    response = client.post("/api/batch", json={"requests": {
+        "fighter": {"resource": "fighter_by_slug", "params": {"slug": "Боец_1"}},
+        "fights": {"resource": "fights", "params": {"fighter_slug": "Боец_1"}},
+        "byEnglishName": {"resource": "fighter_by_slug", "params": {"slug": "fighter_1"}},
+        "event": {"resource": "event_by_slug", "params": {"slug": "ufc_300"}},
+        "eventFights": {"resource": "fights", "params": {"event_slug": "UFC_300", "limit": 500}},
+        "missing": {"resource": "fighter_by_slug", "params": {"slug": "Боец_99"}},
+        "missingFights": {"resource": "fights", "params": {"fighter_slug": "Боец_99"}},
+    }}).json()
+
+    # "Боец_1" не совпадает с "Боец 10".."Боец 19", хотя их находит LIKE
+    fighter = response['fighter']['data']
+    assert fighter['name_ru'] == "Боец 1"
+    assert response['byEnglishName']['data']['id'] == fighter['id']
+    fights = response['fights']['data']
+    assert len(fights) == FIGHTS // 10
+    assert all(fighter['name_en'] in (fight['fighter1_name'], fight['fighter2_name'])
+               or fighter['name_ru'] in (fight['fighter1_name'], fight['fighter2_name']) for fight in fights)
+
+    assert response['event']['data']['name'] == "UFC 300"
+    assert len(response['eventFights']['data']) == FIGHTS
+
+    assert response['missing'] == {"status": 404, "error": "Боец не найден"}
+    assert response['missingFights'] == {"status": 200, "data": []}
+
+
+@pytest.mark.parametrize("path, table", [
+    ("/api/weight-classes", "weight_classes"),
+    ("/api/events", "events"),
+    ("/api/fights", "fights"),
+])
+def test_transient_db_error_is_not_cached(client, seeded, db_engine, path, table):
+    """Ошибка БД отдается как 500 и не попадает в кэш: следующий запрос получает данные"""
+    def fail(conn, cursor, statement, parameters, context, executemany):
+        if f"FROM {table}" in statement:
+            raise RuntimeError("database is unavailable")
+
+    event.listen(db_engine, 'before_cursor_execute', fail)
+    try:
+        assert client.get(path).status_code == 500
+    finally:
+        event.remove(db_engine, 'before_cursor_execute', fail)
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_startup_survives_index_build_errors(db_engine, seeded, monkeypatch):
+    """Ошибка сборки аналитики или поиска при запуске не мешает API: индексы строятся лениво"""
+    from fastapi.testclient import TestClient
+
+    from backend.app import app
+    from backend.analytics import fight_stats_store
+    from backend.search import fighter_search
+
+    def fail(force=False):
+        raise RuntimeError("index build failed")
+
+    monkeypatch.setattr(fight_stats_store, 'refresh', fail)
+    monkeypatch.setattr(fighter_search, 'refresh', fail)
+    with TestClient(app) as client:
+        assert client.get("/api/weight-classes").status_code == 200
+
+    monkeypatch.undo()
+    assert fighter_search.search("Боец", 1)
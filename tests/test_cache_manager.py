@@ -0,0 +1,58 @@
+"""Сброс кэша, сделанный в другом процессе, доходит до LRU этого процесса и общего кэша"""
+
+from backend.cache_manager import CacheManager, cache_manager
+from database.models import DataVersion
+from database.versions import GENERATION_PREFIX, bump_data_version, invalidate
+
+
+def _bump_in_other_process(db, name):
+    """Так поколение увеличивает invalidate в другом процессе"""
+    bump_data_version(db, f"{GENERATION_PREFIX}{name}")
+    db.commit()
+
+
+def test_generation_bump_clears_lru(db):
+    prefix = cache_manager.prefixes['fighters']
+    cache_manager.sync_generations()
+    cache_manager.lru.set(f"{prefix}page", [1], 60)
+    cache_manager.lru.set(f"{cache_manager.prefixes['events']}page", [2], 60)
+    cache_manager.lru.set(f"{cache_manager.prefixes['home']}top_countries", [3], 60)
+
+    _bump_in_other_process(db, 'fighters')
+    assert cache_manager.sync_generations() == ['fighters']
+
+    assert cache_manager.lru.get(f"{prefix}page") == (False, None)
+    assert cache_manager.lru.get(f"{cache_manager.prefixes['home']}top_countries") == (False, None)
+    assert cache_manager.lru.get(f"{cache_manager.prefixes['events']}page") == (True, [2])
+    assert cache_manager.sync_generations() == []
+
+
+def test_invalidate_bumps_generations(db):
+    invalidate('rankings', 'fighters')
+    invalidate('rankings')
+    versions = dict(db.query(DataVersion.name, DataVersion.version))
+    assert versions[f"{GENERATION_PREFIX}rankings"] == 2
+    assert versions[f"{GENERATION_PREFIX}fighters"] == 1
+
+
+def test_generation_bump_clears_shared_cache(db):
+    prefix = cache_manager.prefixes['events']
+    cache_manager.sync_generations()
+    cache_manager.set('page', [1], prefix, 600)
+    cache_manager.set('counts', {'total_events': 1}, cache_manager.prefixes['home'], 600)
+
+    # Парсер сбрасывает набор, не трогая кэш сам
+    invalidate('events')
+    assert cache_manager.get('page', prefix) == [1]
+
+    # Процесс API, запущенный уже после сброса, тоже видит неучтенное поколение
+    restarted = CacheManager()
+    restarted.redis_client = None
+    assert restarted.sync_generations() == ['events']
+    assert restarted.get('page', prefix) is None
+    assert restarted.get('counts', cache_manager.prefixes['home']) is None
+
+    # Общий кэш уже сброшен, этот процесс чистит только свой LRU
+    assert cache_manager.sync_generations() == ['events']
+    assert cache_manager.get('page', prefix) is None
+    assert restarted.sync_generations() == []
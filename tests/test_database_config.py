@@ -0,0 +1,30 @@
+"""Выбор асинхронного драйвера по DATABASE_URL"""
+
+from database.config import async_database_url
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./ufc.db") == "sqlite+aiosqlite:///./ufc.db"
+    assert async_database_url("postgresql://user@host/ufc") == "postgresql+asyncpg://user@host/ufc"
+    assert async_database_url("postgresql+psycopg2://user@host/ufc") == "postgresql+asyncpg://user@host/ufc"
+    assert async_database_url("mysql://user@host/ufc") is None
+
+
+def test_session_slots_per_event_loop():
+    """Слоты сессий работают под конкуренцией в каждом новом event loop"""
+    import asyncio
+
+    from database import config
+
+    async def contend():
+        async def hold():
+            async with config._session_slots():
+                await asyncio.sleep(0.01)
+
+        # Больше задач, чем слотов: часть ждет освобождения семафора
+        await asyncio.gather(*(hold() for _ in range(config.DB_MAX_CONNECTIONS + 5)))
+        return config._session_slots()
+
+    first = asyncio.run(contend())
+    second = asyncio.run(contend())
+    assert first is not second
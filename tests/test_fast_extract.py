@@ -0,0 +1,58 @@
+"""Разбор через lxml (fast_extract) совпадает с разбором через BeautifulSoup"""
+
+import os
+
+import pytest
+
+from parsers.benchmark import parse_with_engines
+from parsers.fighter_profiles import FighterProfilesParser, _extract_profile_in_worker
+from parsers.ufc_rankings import UFCRankingsParser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Файл страницы -> (класс парсера, метод разбора)
+PAGES = {
+    'rankings.html': (UFCRankingsParser, 'parse_rankings'),
+    'fighter_profile.html': (FighterProfilesParser, 'extract_profile_data'),
+    'fighter_profile_meta.html': (FighterProfilesParser, 'extract_profile_data'),
+}
+
+
+def _parse(filename, tmp_cache_dir):
+    parser_class, method_name = PAGES[filename]
+    with open(os.path.join(FIXTURES_DIR, filename), encoding='utf-8') as f:
+        html = f.read()
+    return parse_with_engines(parser_class(cache_dir=tmp_cache_dir), method_name, html)
+
+
+@pytest.mark.parametrize('filename', sorted(PAGES))
+def test_lxml_matches_soup(filename, tmp_cache_dir):
+    results = _parse(filename, tmp_cache_dir)
+    assert results['lxml']
+    assert results['lxml'] == results['soup']
+
+
+def test_template_text_is_skipped(tmp_cache_dir):
+    rankings = _parse('rankings.html', tmp_cache_dir)['lxml']
+    assert list(rankings) == ['Легкий вес', 'Тяжелый вес']
+
+    profile = _parse('fighter_profile.html', tmp_cache_dir)['lxml']
+    assert profile['name_ru'] == 'Александр Волкановски'
+
+
+def test_rankings_fields(tmp_cache_dir):
+    fighters = _parse('rankings.html', tmp_cache_dir)['lxml']['Легкий вес']
+    assert [fighter['name'] for fighter in fighters] == [
+        'Ислам Махачев', 'Арман Царукян', 'Чарльз Оливейра', 'Дастин Порье'
+    ]
+    assert fighters[0]['profile_url'] == 'https://fight.ru/fighters/islam-makhachev/'
+    assert [fighter['move_info'] for fighter in fighters] == ['', '↑2', '↓1', '']
+    assert fighters[3]['rank_position'] is None
+
+
+def test_profile_worker_matches_parser(tmp_cache_dir):
+    with open(os.path.join(FIXTURES_DIR, 'fighter_profile.html'), encoding='utf-8') as f:
+        html = f.read()
+    parser = FighterProfilesParser(cache_dir=tmp_cache_dir)
+    assert _extract_profile_in_worker(html) == parser.extract_profile_data(html)
+    assert _extract_profile_in_worker('') is None
@@ -0,0 +1,56 @@
+"""Плановый и ручной запуски ufc_stats идут через одну очередь фоновых задач"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import jobs
+from database.models import BackgroundJob
+from parsers import scheduler
+
+
+def _add_job(db, status='running', heartbeat_at=None):
+    job = BackgroundJob(id='a' * 32, kind='ufc_stats', status=status, progress=0.0, rows_processed=0,
+                        created_at=datetime.utcnow(), heartbeat_at=heartbeat_at or datetime.utcnow())
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def test_enqueue_returns_running_job(db):
+    job_id = _add_job(db)
+    job, created = jobs.enqueue('ufc_stats')
+    assert not created
+    assert job.id == job_id
+
+
+def test_scheduler_waits_for_api_job(db, monkeypatch):
+    job_id = _add_job(db)
+    waited = []
+
+    def wait_job(wait_id, poll=jobs.WAIT_POLL_INTERVAL):
+        waited.append(wait_id)
+        jobs._update(wait_id, status='done', finished_at=datetime.utcnow())
+        return jobs.get_job(wait_id)
+
+    monkeypatch.setattr(jobs, 'wait_job', wait_job)
+    scheduler.run_ufc_stats()
+    assert waited == [job_id]
+
+
+def test_scheduler_raises_when_job_fails(db, monkeypatch):
+    _add_job(db)
+
+    def wait_job(wait_id, poll=0):
+        jobs._update(wait_id, status='error', error='boom', finished_at=datetime.utcnow())
+        return jobs.get_job(wait_id)
+
+    monkeypatch.setattr(jobs, 'wait_job', wait_job)
+    with pytest.raises(RuntimeError, match='boom'):
+        scheduler.run_ufc_stats()
+
+
+def test_wait_job_fails_stale_job(db):
+    job_id = _add_job(db, heartbeat_at=datetime.utcnow() - timedelta(seconds=jobs.STALE_AFTER + 60))
+    job = jobs.wait_job(job_id, poll=0)
+    assert job.status == 'error'
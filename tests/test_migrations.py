@@ -0,0 +1,63 @@
+"""Разовое заполнение связей боев по именам"""
+
+from sqlalchemy import inspect, text
+
+from database.migrations import backfill_fight_references, upgrade_schema
+from database.models import Event, Fight, Fighter
+
+
+def test_backfill_links_fights_by_name(db, db_engine):
+    db.add_all([
+        Fighter(name_en="Jon Jones", name_ru="Джон Джонс"),
+        Fighter(name_en="Stipe Miocic", name_ru="Стипе Миочич"),
+        Event(name="UFC 309"),
+    ])
+    db.add_all([
+        # Бои, записанные до появления колонок связей: только имена
+        Fight(event_name="UFC 309", fighter1_name="Джон Джонс", fighter2_name="Stipe Miocic"),
+        Fight(event_name="UFC 1", fighter1_name="Royce Gracie", fighter2_name="Stipe Miocic"),
+    ])
+    db.commit()
+
+    # Обновление схемы при инициализации БД данные не трогает
+    upgrade_schema(db_engine)
+    assert db.query(Fight).filter(Fight.fighter2_id.isnot(None)).count() == 0
+
+    assert backfill_fight_references(db) == {'fighter1_id': 1, 'fighter2_id': 2, 'event_id': 1}
+    db.commit()
+    db.expire_all()
+
+    jones, miocic = (db.query(Fighter.id).filter(Fighter.name_en == name).scalar()
+                     for name in ("Jon Jones", "Stipe Miocic"))
+    event_id = db.query(Event.id).scalar()
+    linked, unknown = db.query(Fight).order_by(Fight.id).all()
+    assert (linked.event_id, linked.fighter1_id, linked.fighter2_id) == (event_id, jones, miocic)
+    # Без совпадения по имени связь остается пустой
+    assert (unknown.event_id, unknown.fighter1_id, unknown.fighter2_id) == (None, None, miocic)
+
+    # Повторный запуск ничего не меняет
+    assert backfill_fight_references(db) == {'fighter1_id': 0, 'fighter2_id': 0, 'event_id': 0}
+
+
+def test_event_listing_index_replaces_event_id_index(db_engine):
+    # База, созданная до появления составного индекса
+    with db_engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS idx_fights_event_listing"))
+        conn.execute(text("CREATE INDEX idx_fights_event_id ON fights(event_id)"))
+
+    upgrade_schema(db_engine)
+
+    indexes = {index['name'] for index in inspect(db_engine).get_indexes('fights')}
+    assert 'idx_fights_event_listing' in indexes
+    assert 'idx_fights_event_id' not in indexes
+
+    # Карта события читается по индексу в порядке списка, без сортировки в памяти.
+    # План строится на новом соединении: EXPLAIN на соединении из пула видит схему до DROP INDEX
+    db_engine.dispose()
+    with db_engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM fights WHERE event_id = 1 "
+            "ORDER BY card_type DESC, fight_order, is_main_event DESC, is_title_fight DESC, fight_date DESC, id"
+        )))
+    assert 'idx_fights_event_listing' in plan
+    assert 'TEMP B-TREE' not in plan
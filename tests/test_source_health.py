@@ -0,0 +1,65 @@
+"""Выключатели источников: одна пробная попытка после паузы"""
+
+import threading
+import time
+
+from parsers.source_health import SourceHealth
+
+
+def _tripped(tmp_path, **kwargs) -> SourceHealth:
+    """Источник, выключенный после ошибок подряд, с уже истекшей паузой"""
+    health = SourceHealth(tmp_path / 'health.json', failure_threshold=2, cooldown=60, **kwargs)
+    for _ in range(2):
+        health.record('mirror', False, 1.0)
+    assert not health.acquire('mirror')
+    health.sources['mirror']['open_until'] = time.time() - 1
+    return health
+
+
+def test_half_open_lets_exactly_one_probe_through(tmp_path):
+    health = _tripped(tmp_path)
+
+    granted = []
+    barrier = threading.Barrier(8)
+
+    def caller():
+        barrier.wait()
+        granted.append(health.acquire('mirror'))
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert granted.count(True) == 1
+    assert not health.available('mirror')
+    assert health.order(['mirror']) == []
+
+    # Успешная проба замыкает выключатель для всех
+    health.record('mirror', True, 0.5)
+    assert health.acquire('mirror') and health.acquire('mirror')
+    assert health.status('mirror')['state'] == 'closed'
+
+
+def test_failed_probe_reopens_breaker(tmp_path):
+    health = _tripped(tmp_path)
+
+    assert health.acquire('mirror')
+    health.record('mirror', False, 1.0)
+
+    assert health.status('mirror')['state'] == 'open'
+    assert not health.acquire('mirror')
+
+
+def test_released_or_lost_probe_is_given_to_next_caller(tmp_path):
+    health = _tripped(tmp_path, probe_timeout=60)
+
+    assert health.acquire('mirror')
+    health.release('mirror')
+    assert health.acquire('mirror')
+    assert not health.acquire('mirror')
+
+    # Проба без результата перестает блокировать источник по probe_timeout
+    health._probes['mirror'] -= 61
+    assert health.acquire('mirror')
@@ -0,0 +1,66 @@
+"""Повторный импорт ufc.stats: измененная строка обновляется, а не дублирует бой"""
+
+from database.models import Fight, FightStats
+from parsers.ufc_stats_importer import UFCStatsImporter
+
+
+def _sample(cache_dir):
+    """Тестовая выгрузка, где каждые 6 строк - бой двух бойцов по 3 раунда"""
+    df = UFCStatsImporter(cache_dir=cache_dir)._create_sample_data()
+    fighters = df['fighter'].unique()
+    fight = df.index // 6
+    df['fighter'] = fighters[(df.index % 2) + 2 * (fight % 3)]
+    df['round'] = (df.index // 2) % 3 + 1
+    df['event'] = "UFC " + (300 + fight // 4).astype(str)
+    df['weight_class'] = df['weight_class'].iloc[(fight % 4).tolist()].values
+    df['fight_date'] = "2023-03-" + (1 + fight // 4).astype(str).str.zfill(2)
+    return df.iloc[:len(df) // 6 * 6].reset_index(drop=True)
+
+
+def _importer(cache_dir, df):
+    importer = UFCStatsImporter(cache_dir=cache_dir)
+    df.attrs['source_file'] = "ufc_stats.csv"
+    # Вместо загрузки из сети - подготовленная выгрузка
+    importer.download_ufc_stats_data = lambda: df.copy()
+    return importer
+
+
+def _counts(db):
+    db.expire_all()
+    return db.query(Fight).count(), db.query(FightStats).count()
+
+
+def test_refresh_with_edited_row_keeps_row_counts(db, tmp_cache_dir):
+    df = _sample(tmp_cache_dir)
+    assert _importer(tmp_cache_dir, df).refresh_data()
+    fights, stats = _counts(db)
+    assert fights > 0 and stats > 0
+
+    edited = df.copy()
+    edited.loc[0, 'significant_strikes_landed'] += 7
+    assert _importer(tmp_cache_dir, edited).refresh_data()
+
+    assert _counts(db) == (fights, stats)
+    landed = db.query(FightStats.significant_strikes_landed).order_by(FightStats.id).all()
+    assert edited.loc[0, 'significant_strikes_landed'] in {value for (value,) in landed}
+
+
+def test_reimport_is_idempotent(db, tmp_cache_dir):
+    df = _sample(tmp_cache_dir)
+    importer = UFCStatsImporter(cache_dir=tmp_cache_dir)
+    assert importer.import_to_database(df)
+    before = _counts(db)
+
+    assert importer.import_to_database(df)
+    assert _counts(db) == before
+
+
+def test_row_removed_from_source_is_deleted(db, tmp_cache_dir):
+    df = _sample(tmp_cache_dir)
+    assert _importer(tmp_cache_dir, df).refresh_data()
+    fights, stats = _counts(db)
+
+    # Последний раунд одного из бойцов пропал из источника
+    assert _importer(tmp_cache_dir, df.drop(index=len(df) - 1)).refresh_data()
+
+    assert _counts(db) == (fights, stats - 1)
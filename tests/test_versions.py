@@ -0,0 +1,52 @@
+"""Версии наборов данных"""
+
+import threading
+
+from database.config import SessionLocal
+from database.versions import bump_data_version, get_data_version
+
+
+def test_concurrent_first_bumps_do_not_conflict(db):
+    """Параллельные первые увеличения версии не падают на первичном ключе"""
+    errors = []
+    barrier = threading.Barrier(4)
+
+    def writer():
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            bump_data_version(session, 'fight_stats')
+            session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert get_data_version(db, 'fight_stats') == 4
+
+
+def test_bump_is_a_single_upsert(db, db_engine):
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        bump_data_version(db, 'rankings')
+        bump_data_version(db, 'rankings')
+    finally:
+        event.remove(db_engine, 'before_cursor_execute', before_cursor_execute)
+    db.commit()
+
+    assert len(statements) == 2 and all('ON CONFLICT' in statement for statement in statements)
+    assert get_data_version(db, 'rankings') == 2
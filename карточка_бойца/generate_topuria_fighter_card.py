@@ -71,10 +71,11 @@ class TopuriaFighterCardGenerator:
                    f.fighter1_record, f.fighter2_record, f.is_win, f.method,
                    f.round, f.time, f.referee, f.weight_class
             FROM fights f
-            WHERE f.fighter1_name LIKE ? OR f.fighter2_name LIKE ?
+            WHERE f.fighter1_id IN (SELECT id FROM fighters WHERE name_ru LIKE ? OR name_en LIKE ?)
+               OR f.fighter2_id IN (SELECT id FROM fighters WHERE name_ru LIKE ? OR name_en LIKE ?)
             ORDER BY f.fight_date DESC
             LIMIT ?
-        """, (f"%{fighter_name}%", f"%{fighter_name}%", limit))
+        """, (f"%{fighter_name}%", f"%{fighter_name}%", f"%{fighter_name}%", f"%{fighter_name}%", limit))
         
         fights = cursor.fetchall()
         conn.close()